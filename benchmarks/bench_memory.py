@@ -0,0 +1,70 @@
+"""Measure the peak memory used to hold the parsed references of a vault.
+
+Each representation is measured in a fresh subprocess, which generates the
+notes one at a time, parses them and keeps every reference in a dict as
+``ReferenceChecker.file_refs`` does. The reported figure is the growth of
+the peak RSS over the process's baseline. POSIX only (uses ``resource``).
+
+Usage:
+    python -m benchmarks.bench_memory [--notes N] [--lines N]
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+from md_ref_checker.parsers import MarkdownParser
+
+from .bench_parser import generate_document
+from .legacy import LegacyMarkdownParser
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def measure(mode: str, notes: int, lines: int) -> float:
+    """Parse a synthetic vault and return the peak RSS growth in MB."""
+    parser: Any = LegacyMarkdownParser() if mode == "legacy" else MarkdownParser()
+    baseline = peak_rss_mb()
+    file_refs: Dict[str, List[Any]] = {}
+    for i in range(notes):
+        path = f"notes/dir{i % 50}/note{i}.md"
+        content = generate_document(lines, seed=i)
+        file_refs[path] = list(parser.parse_references(path, content))
+    return peak_rss_mb() - baseline
+
+
+def main() -> None:
+    """Run each representation in a subprocess and print the results."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--notes", type=int, default=2000)
+    arg_parser.add_argument("--lines", type=int, default=200)
+    arg_parser.add_argument("--mode", choices=["legacy", "compact"])
+    args = arg_parser.parse_args()
+
+    if args.mode:
+        print(f"{measure(args.mode, args.notes, args.lines):.1f}")
+        return
+
+    results = {}
+    for mode in ("legacy", "compact"):
+        output = subprocess.run(
+            [sys.executable, "-m", __spec__.name, "--mode", mode]
+            + ["--notes", str(args.notes), "--lines", str(args.lines)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results[mode] = float(output)
+        print(f"{mode:8} {results[mode]:8.1f} MB peak RSS growth")
+    print(f"saving   {1 - results['compact'] / results['legacy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
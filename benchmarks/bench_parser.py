@@ -0,0 +1,142 @@
+"""Benchmark MarkdownParser.parse_references on large synthetic files.
+
+Compares the whole-buffer scanner with the previous line-by-line parser,
+and with the scanner before standard and reference-style links and HTML
+images were recognized, both kept in ``benchmarks.legacy`` for reference.
+The documents mix wiki links, images and brackets that are not links
+(tasks, footnotes, asides). The last comparison, against the older scanner,
+is the cost of looking for the new syntaxes on a document without them,
+with and without a definition of a reference-style link, which sends the
+file through a slower path of the scanner. On a document that also uses
+standard links and reference-style links, it includes building the
+references that the older scanner doesn't find.
+
+Usage:
+    python -m benchmarks.bench_parser [--lines N] [--repeat N]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+from md_ref_checker.parsers import MarkdownParser
+
+from .legacy import LegacyMarkdownParser, WikiScanner
+
+
+def generate_document(
+    lines: int, seed: int = 0, links: bool = True, definitions: bool = True
+) -> str:
+    """Generate a Markdown document mixing prose, references and code.
+
+    Args:
+        lines: Number of lines to generate
+        seed: Seed of the random choices
+        links: Whether to use standard links too, besides wiki links and
+               images
+        definitions: Whether to use reference-style links and their
+                     definitions, which make the scanner look for labels
+    """
+    rng = random.Random(seed)
+    words = ["note", "vault", "graph", "link", "idea", "参考", "笔记", "text"]
+    out: List[str] = []
+    # Labels of the reference-style links whose definition is still to come
+    labels: List[str] = []
+    while len(out) < lines:
+        kind = rng.random()
+        target = f"{rng.choice(words)}{rng.randint(0, 999)}"
+        if kind < 0.05:
+            out.append("```python")
+            out.extend(f"print('[[in code {i}]]')" for i in range(rng.randint(2, 10)))
+            out.append("```")
+        elif kind < 0.25:
+            out.append(
+                f"See [[{target}|alias]] and `code` then ![img](assets/{target}.png)"
+            )
+        elif kind < 0.35:
+            # Brackets that are not links: tasks, footnotes and asides
+            note = rng.randint(1, 99)
+            out.append(
+                rng.choice(
+                    [
+                        f"- [ ] {rng.choice(words)} task",
+                        f"- [x] done {rng.choice(words)}",
+                        f"A claim[^{note}] and an [aside] in prose",
+                        f"[^{note}]: The footnote.",
+                    ]
+                )
+            )
+        elif kind < 0.45 and links:
+            out.append(f"Read [the {rng.choice(words)}](docs/{target}.md) first")
+        elif kind < 0.50 and definitions:
+            label = f"{rng.choice(words)} {rng.randint(0, 999)}"
+            labels.append(label)
+            out.append(f"As [{rng.choice(words)}][{label}] and [{label}] show")
+        else:
+            out.append(" ".join(rng.choice(words) for _ in range(rng.randint(5, 15))))
+        if labels and rng.random() < 0.2:
+            # Define the label a few lines after its first use
+            out.append(f"[{labels.pop()}]: refs/{target}.md")
+    out.extend(f"[{label}]: refs/{label}.md" for label in labels)
+    return "\n".join(out)
+
+
+def bench(parse: Callable[[str, str], Iterator[Any]], content: str) -> float:
+    """Time one full parse of the content.
+
+    The references are collected in a list, like the checker does.
+    """
+    start = time.perf_counter()
+    list(parse("bench.md", content))
+    return time.perf_counter() - start
+
+
+def compare(content: str, repeat: int) -> None:
+    """Time every parser on the content and print the results."""
+    size_mb = len(content.encode("utf-8")) / 1e6
+    parsers = {
+        "legacy": LegacyMarkdownParser().parse_references,
+        "wiki": WikiScanner().parse_references,
+        "scanner": MarkdownParser().parse_references,
+    }
+    timings: Dict[str, List[float]] = {name: [] for name in parsers}
+    # Alternate between the parsers, so that they all see the same load
+    for _ in range(repeat):
+        for name, parse in parsers.items():
+            timings[name].append(bench(parse, content))
+    best = {name: min(times) for name, times in timings.items()}
+    for name, seconds in best.items():
+        print(f"{name:8} {seconds:.3f}s  {size_mb / seconds:6.1f} MB/s")
+    print(f"speedup  {best['legacy'] / best['scanner']:.2f}x")
+    # The median ratio of the runs of the same round is steadier than the
+    # ratio of the best times when the load of the machine changes
+    ratios = [new / old for new, old in zip(timings["scanner"], timings["wiki"])]
+    print(f"new syntaxes cost {statistics.median(ratios) - 1:+.1%}")
+
+
+def main() -> None:
+    """Run the benchmark and print the timings."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--lines", type=int, default=200_000)
+    arg_parser.add_argument("--repeat", type=int, default=9)
+    args = arg_parser.parse_args()
+
+    # The older syntaxes are all the older scanner finds, so on them the
+    # comparison is the cost of looking for the new ones. A file with a
+    # definition takes the slower path of the scanner, which looks for
+    # reference-style links too, so both paths are measured.
+    older = generate_document(args.lines, links=False, definitions=False)
+    documents = {
+        "older syntaxes": older,
+        "older syntaxes and a definition": "[ref]: ref.md\n" + older,
+        "all syntaxes": generate_document(args.lines),
+    }
+    for title, content in documents.items():
+        print(f"{title}:")
+        compare(content, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
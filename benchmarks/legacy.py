@@ -0,0 +1,144 @@
+"""Earlier implementations, kept as baselines for the benchmarks."""
+
+import re
+from dataclasses import dataclass
+from typing import Iterator
+
+from md_ref_checker.models import Reference
+from md_ref_checker.parsers import MarkdownParser
+
+
+@dataclass(frozen=True)
+class LegacyReference:
+    """The reference representation that stored each reference's whole line."""
+
+    source_file: str
+    target: str
+    line_number: int
+    column: int
+    line_content: str
+    is_embed: bool
+
+    def __hash__(self) -> int:
+        return hash(
+            (
+                self.source_file,
+                self.target,
+                self.line_number,
+                self.column,
+                self.line_content,
+                self.is_embed,
+            )
+        )
+
+
+class LegacyMarkdownParser:
+    """The line-by-line parser that preceded the whole-buffer scanner."""
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self.wiki_ref_pattern = re.compile(r"(!?\[\[([^]|]+)(?:\|[^]]+)?\]\])")
+        self.md_img_pattern = re.compile(r"!\[([^]]*)\]\(([^)]+)\)")
+
+    def parse_references(
+        self, source_file: str, content: str
+    ) -> Iterator[LegacyReference]:
+        """Parse references line by line."""
+        in_code_block = False
+        for line_num, line in enumerate(content.split("\n"), start=1):
+            if line.strip().startswith("```"):
+                in_code_block = not in_code_block
+                continue
+            if in_code_block:
+                continue
+            parts = line.split("`")
+            clean_line = ""
+            for i, part in enumerate(parts):
+                if i % 2 == 0:
+                    clean_line += part
+                else:
+                    clean_line += " " * len(part)
+            for match in self.wiki_ref_pattern.finditer(clean_line):
+                full_match, target = match.groups()
+                yield LegacyReference(
+                    source_file=source_file,
+                    target=target.split("#")[0],
+                    line_number=line_num,
+                    column=match.start() + 1,
+                    line_content=line,
+                    is_embed=full_match.startswith("!"),
+                )
+            for match in self.md_img_pattern.finditer(clean_line):
+                target = match.group(2)
+                if target.startswith(("http://", "https://")):
+                    continue
+                yield LegacyReference(
+                    source_file=source_file,
+                    target=target,
+                    line_number=line_num,
+                    column=match.start() + 1,
+                    line_content=line,
+                    is_embed=True,
+                )
+
+
+class WikiScanner(MarkdownParser):
+    """The whole-buffer scanner before standard links, reference-style links
+    and HTML images were recognized: wiki links, embeds and ``![alt](file)``.
+    """
+
+    SCAN_PATTERN = re.compile(
+        r"`[^`\n]*`?"
+        r"|\[\[(?P<link>[^]|`\n]+)(?:\|[^]`\n]+)?\]\]"
+        r"|!(?:\[\[(?P<embed>[^]|`\n]+)(?:\|[^]`\n]+)?\]\]"
+        r"|\[[^]`\n]*\]\((?P<image>[^)`\n]+)\))"
+    )
+
+    def parse_references(self, source_file: str, content: str) -> Iterator[Reference]:
+        """Parse references with a single scan of the content."""
+        search = self.SCAN_PATTERN.search
+        pos = 0
+        fence = self._find_fence(content, 0)
+        line_num = 1
+        line_start = 0
+        counted = 0
+
+        while True:
+            match = search(content, pos, len(content) if fence < 0 else fence)
+            if match is None:
+                if fence < 0:
+                    return
+                pos = content.find("\n", fence)
+                closing = self._find_fence(content, pos + 1) if pos >= 0 else -1
+                pos = content.find("\n", closing) if closing >= 0 else -1
+                if pos < 0:
+                    return
+                fence = self._find_fence(content, pos + 1)
+                continue
+
+            pos = match.end()
+            link, embed, image = match.group("link", "embed", "image")
+            if link is not None:
+                target, is_embed = link.split("#")[0], False
+            elif embed is not None:
+                target, is_embed = embed.split("#")[0], True
+            elif image is not None and not image.startswith(("http://", "https://")):
+                target, is_embed = image, True
+            else:
+                continue
+
+            start = match.start()
+            newlines = content.count("\n", counted, start)
+            if newlines:
+                line_num += newlines
+                line_start = content.rfind("\n", counted, start) + 1
+            counted = start
+            yield Reference(
+                source_file,
+                target,
+                line_num,
+                start - line_start + 1,
+                None,
+                is_embed,
+                start,
+            )
@@ -0,0 +1,184 @@
+"""Phase-level benchmark of the checker on synthetic vaults.
+
+Generates a vault of each requested size (cached under ``--work-dir``),
+then times each phase of a check separately:
+
+- walk: listing the vault (``FileSystem.refresh_index``)
+- read: reading every note, with the reference prefilter
+- parse: extracting references from the notes
+- resolve: resolving every reference (``Resolver``)
+- image-scan: finding unused images
+- graph: building the link graph and its unidirectional links
+- check: a complete ``ReferenceChecker.check_directory``, for reference
+
+Results are written as JSON so that runs on different commits can be
+compared with ``--compare``.
+
+Usage:
+    python -m benchmarks.run [--sizes 1000,10000,100000] [--output FILE]
+                             [--compare BASELINE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from md_ref_checker.checker import ReferenceChecker
+from md_ref_checker.graph import LinkGraph
+from md_ref_checker.models import Reference
+from md_ref_checker.parsers import MarkdownParser
+from md_ref_checker.resolver import Resolver
+from md_ref_checker.utils import FileSystem
+
+from .vault import VaultSpec, generate_vault
+
+T = TypeVar("T")
+
+
+def timed(func: Callable[[], T], repeat: int) -> Tuple[float, T]:
+    """Run ``func`` ``repeat`` times, returning the best time and last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_phases(root: str, repeat: int) -> Dict[str, float]:
+    """Time each phase of a check of the vault at ``root``."""
+    fs = FileSystem(root)
+    parser = MarkdownParser()
+    times: Dict[str, float] = {}
+
+    times["walk"], index = timed(fs.refresh_index, repeat)
+
+    def read() -> Dict[str, str]:
+        return {
+            path: fs.read_file(path, parser.MARKERS) for path in index.markdown_files
+        }
+
+    times["read"], contents = timed(read, repeat)
+
+    def parse() -> Dict[str, List[Reference]]:
+        return {
+            path: list(parser.parse_references(path, content)) if content else []
+            for path, content in contents.items()
+        }
+
+    times["parse"], file_refs = timed(parse, repeat)
+
+    def resolve() -> Dict[str, List[Optional[str]]]:
+        resolver = Resolver(index, fs.ignore_matcher)
+        return {
+            path: [resolver.resolve(path, ref.target) for ref in refs]
+            for path, refs in file_refs.items()
+        }
+
+    times["resolve"], resolved = timed(resolve, repeat)
+
+    def image_scan() -> List[str]:
+        used = {
+            path
+            for paths in resolved.values()
+            for path in paths
+            if path is not None and fs.is_image_file(path)
+        }
+        return [
+            path
+            for path in index.attachments
+            if fs.is_image_file(path) and path not in used
+        ]
+
+    times["image-scan"], _ = timed(image_scan, repeat)
+
+    def graph() -> List[Tuple[str, str]]:
+        link_graph = LinkGraph()
+        for path, paths in resolved.items():
+            link_graph.set_links(
+                path, {p for p in paths if p is not None and not fs.is_image_file(p)}
+            )
+        return link_graph.unidirectional_links()
+
+    times["graph"], _ = timed(graph, repeat)
+
+    times["check"], _ = timed(lambda: ReferenceChecker(root).check_directory(), repeat)
+    return times
+
+
+def git_revision() -> Optional[str]:
+    """Commit of the working tree, if it is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the ratio of each phase time to the baseline."""
+    print(f"\nCompared with {baseline.get('revision') or 'baseline'}:")
+    for size, times in results["sizes"].items():
+        old_times = baseline["sizes"].get(size)
+        if old_times is None:
+            continue
+        ratios = "  ".join(
+            f"{phase} {seconds / old_times[phase]:.2f}x"
+            for phase, seconds in times.items()
+            if old_times.get(phase)
+        )
+        print(f"  {size:>7} notes: {ratios}")
+
+
+def main() -> None:
+    """Generate the vaults, run the phases and write the results."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--sizes", default="1000,10000,100000")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--work-dir", default=os.path.join("benchmarks", ".vaults"))
+    arg_parser.add_argument("--output", default="benchmark-results.json")
+    arg_parser.add_argument("--compare", metavar="BASELINE")
+    args = arg_parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "sizes": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",")):
+        spec = VaultSpec(notes=size, seed=args.seed)
+        root = os.path.join(args.work_dir, f"vault-{size}-{args.seed}")
+        if not os.path.isdir(root):
+            print(f"Generating {size} notes in {root}...")
+            generate_vault(root, spec)
+        times = run_phases(root, args.repeat)
+        results["sizes"][str(size)] = times
+        results.setdefault("spec", asdict(spec))
+        print(
+            f"{size:>7} notes: "
+            + "  ".join(f"{phase} {seconds:.3f}s" for phase, seconds in times.items())
+        )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Deterministic synthetic vault generator for the benchmarks."""
+
+import os
+import random
+from dataclasses import dataclass, field
+from typing import List
+
+# Syllables for generated Chinese file names
+_HANZI = "知识笔记物理化学历史地理数学语文英语生物哲学经济项目会议计划总结"
+_WORDS = ["note", "vault", "graph", "link", "idea", "draft", "topic", "review"]
+
+
+@dataclass
+class VaultSpec:
+    """Shape of a synthetic vault.
+
+    Attributes:
+        notes: Number of Markdown notes
+        links_per_note: Average number of wiki links per note
+        image_ratio: Images per note; each note embeds about this many
+        depth: Directory depth of the notes (0 puts them all in the root)
+        chinese_names: Fraction of notes and images with Chinese names
+        broken_ratio: Fraction of links and embeds whose target does not exist
+        code_block_density: Fraction of paragraphs that are fenced code blocks
+        ignore_rules: Lines of the generated .gitignore; a directory named by a
+                     rule gets a share of the notes
+        lines_per_note: Average number of prose lines per note
+        seed: Seed of the random generator
+    """
+
+    notes: int = 1000
+    links_per_note: float = 5.0
+    image_ratio: float = 0.3
+    depth: int = 2
+    chinese_names: float = 0.3
+    broken_ratio: float = 0.02
+    code_block_density: float = 0.05
+    ignore_rules: List[str] = field(default_factory=lambda: ["archive/", "*.tmp"])
+    lines_per_note: int = 40
+    seed: int = 0
+
+
+def _name(rng: random.Random, i: int, chinese: bool) -> str:
+    """Return a unique file name (without extension) for item ``i``."""
+    if chinese:
+        return "".join(rng.choice(_HANZI) for _ in range(3)) + str(i)
+    return f"{rng.choice(_WORDS)}-{i}"
+
+
+def _directory(rng: random.Random, depth: int) -> str:
+    """Return a random directory of the given depth."""
+    return "/".join(f"d{level}-{rng.randrange(8)}" for level in range(depth))
+
+
+def generate_vault(root: str, spec: VaultSpec) -> None:
+    """Write a synthetic vault to ``root``, which should be empty."""
+    rng = random.Random(spec.seed)
+    ignored_dirs = [rule.strip("/") for rule in spec.ignore_rules if rule.endswith("/")]
+
+    notes = []
+    for i in range(spec.notes):
+        directory = _directory(rng, spec.depth)
+        if ignored_dirs and rng.random() < 0.05:
+            directory = os.path.join(rng.choice(ignored_dirs), directory)
+        name = _name(rng, i, rng.random() < spec.chinese_names)
+        notes.append((directory, name))
+
+    images = [
+        _name(rng, i, rng.random() < spec.chinese_names) + ".png"
+        for i in range(int(spec.notes * spec.image_ratio))
+    ]
+
+    for directory, name in notes:
+        lines = []
+        for _ in range(spec.lines_per_note):
+            if rng.random() < spec.code_block_density / 4:
+                lines.append("```python")
+                lines.extend(f"x = '[[not-a-link-{j}]]'" for j in range(5))
+                lines.append("```")
+            lines.append(" ".join(rng.choice(_WORDS) for _ in range(12)))
+
+        for _ in range(int(rng.expovariate(1 / spec.links_per_note))):
+            if rng.random() < spec.broken_ratio:
+                target = f"missing-{rng.randrange(1 << 30)}"
+            else:
+                target = rng.choice(notes)[1]
+            lines.insert(rng.randrange(len(lines) + 1), f"See [[{target}|alias]].")
+        if images and rng.random() < spec.image_ratio:
+            if rng.random() < spec.broken_ratio:
+                image = f"missing-{rng.randrange(1 << 30)}.png"
+            else:
+                image = rng.choice(images)
+            lines.insert(rng.randrange(len(lines) + 1), f"![[{image}]]")
+        if rng.random() < 0.1:
+            lines.append("Inline `[[code]]` is not a link.")
+
+        path = os.path.join(root, directory, name + ".md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+    os.makedirs(os.path.join(root, "assets"), exist_ok=True)
+    for image in images:
+        with open(os.path.join(root, "assets", image), "wb") as f:
+            f.write(b"\x89PNG\r\n")
+
+    # Files matched by the glob rules, e.g. *.tmp
+    for rule in spec.ignore_rules:
+        if rule.startswith("*."):
+            for i in range(max(1, spec.notes // 100)):
+                with open(os.path.join(root, f"scratch-{i}{rule[1:]}"), "w") as f:
+                    f.write("[[scratch]]")
+
+    with open(os.path.join(root, ".gitignore"), "w", encoding="utf-8") as f:
+        f.write("\n".join(spec.ignore_rules) + "\n")
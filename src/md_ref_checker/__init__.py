@@ -1,21 +1,64 @@
-"""Markdown reference checker package."""
-
-from importlib.metadata import version
-
-from .checker import ReferenceChecker
-from .cli import main
-from .models import CheckResult, FileStats, Reference
-from .parsers import MarkdownParser
-from .utils import FileSystem
-
-__version__ = version("md-ref-checker")
-
-__all__ = [
-    "Reference",
-    "FileStats",
-    "CheckResult",
-    "ReferenceChecker",
-    "MarkdownParser",
-    "FileSystem",
-    "main",
-]
+"""Markdown reference checker package.
+
+The public names are imported on first use, so that importing the package
+(as the command line entry point does) stays cheap.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .checker import ReferenceChecker
+    from .cli import main
+    from .graph import LinkGraph
+    from .models import (
+        CheckResult,
+        FileStats,
+        Finding,
+        InvalidReference,
+        Reference,
+        ResultSink,
+        UnidirectionalLink,
+        UnusedImage,
+        VaultIndex,
+    )
+    from .parsers import MarkdownParser
+    from .utils import FileSystem
+
+# Module defining each public name
+_EXPORTS = {
+    "Reference": "models",
+    "FileStats": "models",
+    "CheckResult": "models",
+    "ResultSink": "models",
+    "Finding": "models",
+    "InvalidReference": "models",
+    "UnusedImage": "models",
+    "UnidirectionalLink": "models",
+    "VaultIndex": "models",
+    "ReferenceChecker": "checker",
+    "LinkGraph": "graph",
+    "MarkdownParser": "parsers",
+    "FileSystem": "utils",
+    "main": "cli",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """Import public names, and look up the version, on first access."""
+    if name == "__version__":
+        from importlib.metadata import version
+
+        value: Any = version("md-ref-checker")
+    elif name in _EXPORTS:
+        value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + __all__ + ["__version__"])
@@ -0,0 +1,221 @@
+"""Reading a vault from a zip or tar archive, without extracting it.
+
+The archive's index, the central directory of a zip or the member headers
+of a tar, is read once to list the files, and members are read when the
+checker asks for them. If every member is below one top-level directory, as
+in an archive made with ``zip -r vault.zip vault/``, that directory is the
+vault root. Only regular files and directories are listed: links are
+skipped.
+"""
+
+import shutil
+import stat
+import tarfile
+import tempfile
+import threading
+import zipfile
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
+
+from .storage import ListedEntry, ListedStorage
+
+# Magic numbers of gzip, bzip2 and xz, the compressions tarfile reads
+_COMPRESSED_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+# Names of the files read besides Markdown files, see FileSystem
+_IGNORE_FILES = frozenset({".gitignore", ".mdignore"})
+
+
+def _member_path(name: str) -> Optional[str]:
+    """Normalized path of a member, or None if it points outside the archive."""
+    parts = [
+        part for part in name.replace("\\", "/").split("/") if part not in ("", ".")
+    ]
+    if not parts or ".." in parts:
+        return None
+    return "/".join(parts)
+
+
+class ArchiveEntry(ListedEntry):
+    """Entry of an archive, holding its member info."""
+
+    __slots__ = ("member",)
+
+    def __init__(
+        self,
+        path: str,
+        kind: str,
+        size: int,
+        mtime_ns: int,
+        member: Union[zipfile.ZipInfo, tarfile.TarInfo],
+    ) -> None:
+        """Initialize with the member's path in the vault and its info."""
+        super().__init__(path, kind, size, mtime_ns)
+        self.member = member
+
+
+class ArchiveStorage(ListedStorage):
+    """Files of an archive."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize with the path of the archive."""
+        super().__init__(path)
+        self.path = path
+
+    def _scan(self) -> Iterator[ArchiveEntry]:
+        """List the members of the archive, with their paths in the archive."""
+        raise NotImplementedError
+
+    def _list(self) -> List[ArchiveEntry]:
+        """List the members, relative to the vault root."""
+        try:
+            entries = list(self._scan())
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e:
+            raise RuntimeError(f"Cannot read archive {self.path}: {e}") from e
+
+        roots = {entry.path.split("/", 1)[0] for entry in entries}
+        if len(roots) != 1:
+            return entries
+        root = roots.pop()
+        if any(entry.path == root and not entry.is_dir() for entry in entries):
+            return entries
+        prefix = len(root) + 1
+        return [
+            ArchiveEntry(
+                entry.path[prefix:],
+                "dir" if entry.is_dir() else "file",
+                entry.st_size,
+                entry.st_mtime_ns,
+                entry.member,
+            )
+            for entry in entries
+            if entry.path != root
+        ]
+
+
+class ZipStorage(ArchiveStorage):
+    """Files of a zip archive, decompressed as they are read.
+
+    The CRC of a member stands in for its modification time, so the parse
+    cache recognizes unchanged files across snapshots.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open the archive.
+
+        Raises:
+            zipfile.BadZipFile: If the file is not a zip archive
+        """
+        super().__init__(path)
+        self._zip = zipfile.ZipFile(path)
+
+    def _scan(self) -> Iterator[ArchiveEntry]:
+        """List the members from the central directory."""
+        for info in self._zip.infolist():
+            path = _member_path(info.filename)
+            if path is None or stat.S_ISLNK(info.external_attr >> 16):
+                continue
+            kind = "dir" if info.is_dir() else "file"
+            yield ArchiveEntry(path, kind, info.file_size, info.CRC, info)
+
+    def _read_entry(self, entry: ListedEntry) -> bytes:
+        """Decompress a member."""
+        assert isinstance(entry, ArchiveEntry)
+        # ZipFile serializes the reads of the archive file itself, and each
+        # member is decompressed separately, so reader threads need no lock
+        return self._zip.read(entry.member)  # type: ignore[arg-type]
+
+
+class TarStorage(ArchiveStorage):
+    """Files of a tar archive, possibly compressed.
+
+    An uncompressed archive is read like a zip, seeking to each member as it
+    is read. A compressed one can't be seeked into without decompressing it
+    from the start, so it is decompressed once, in a single pass that lists
+    the members and copies the contents of the files the checker reads,
+    Markdown and ignore files, to an anonymous temporary file, which reads
+    then seek into. Worker processes would each decompress the archive
+    again, so it is not read in parallel.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize with the path of the archive."""
+        super().__init__(path)
+        with open(path, "rb") as f:
+            self.compressed = f.read(6).startswith(_COMPRESSED_MAGIC)
+        self._lock = threading.Lock()
+        self.parallel = not self.compressed
+        self._tar: Optional[tarfile.TarFile] = None
+        self._spill: Optional[IO[bytes]] = None  # Kept contents, if compressed
+        self._offsets: Dict[str, Tuple[int, int]] = {}  # Member name to its range
+
+    def _open(self) -> tarfile.TarFile:
+        """The archive, opened for random access on first use."""
+        if self._tar is None:
+            self._tar = tarfile.open(self.path)
+        return self._tar
+
+    def _scan(self) -> Iterator[ArchiveEntry]:
+        """List the members from their headers."""
+        if not self.compressed:
+            for info in self._open():
+                entry = self._entry(info)
+                if entry is not None:
+                    yield entry
+            return
+
+        spill = self._spill = tempfile.TemporaryFile()
+        with tarfile.open(self.path, "r|*") as tar:
+            for info in tar:
+                entry = self._entry(info)
+                if entry is None:
+                    continue
+                if entry.is_file() and (
+                    entry.name.lower().endswith(".md") or entry.name in _IGNORE_FILES
+                ):
+                    f = tar.extractfile(info)
+                    assert f is not None
+                    self._offsets[info.name] = (spill.tell(), info.size)
+                    shutil.copyfileobj(f, spill)
+                yield entry
+
+    @staticmethod
+    def _entry(info: tarfile.TarInfo) -> Optional[ArchiveEntry]:
+        """Entry of a member, or None if it is skipped."""
+        path = _member_path(info.name)
+        if path is None or not (info.isreg() or info.isdir()):
+            return None
+        kind = "dir" if info.isdir() else "file"
+        return ArchiveEntry(path, kind, info.size, int(info.mtime * 10**9), info)
+
+    def _read_entry(self, entry: ListedEntry) -> bytes:
+        """Read a member, from the temporary file if it was kept."""
+        assert isinstance(entry, ArchiveEntry)
+        info = entry.member
+        assert isinstance(info, tarfile.TarInfo)
+        kept = self._offsets.get(info.name)
+        # Reads share the position of the archive or the temporary file
+        with self._lock:
+            if kept is not None:
+                assert self._spill is not None
+                self._spill.seek(kept[0])
+                return self._spill.read(kept[1])
+            f = self._open().extractfile(info)
+            if f is None:
+                raise OSError(f"Cannot read {info.name} from {self.path}")
+            return f.read()
+
+
+def open_archive(path: str) -> ArchiveStorage:
+    """Open a zip or tar archive, recognized by its contents.
+
+    Raises:
+        RuntimeError: If the file is not a zip or tar archive
+    """
+    try:
+        if zipfile.is_zipfile(path):
+            return ZipStorage(path)
+        if tarfile.is_tarfile(path):
+            return TarStorage(path)
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise RuntimeError(f"Cannot open archive {path}: {e}") from e
+    raise RuntimeError(f"{path} is not a zip or tar archive")
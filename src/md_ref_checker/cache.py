@@ -0,0 +1,227 @@
+"""Persistent cache of parsed references."""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import Reference
+
+# Default cache location, relative to the checked directory
+DEFAULT_CACHE_DIR = ".md-ref-checker"
+
+# File holding the state of the last incremental run, inside the cache directory
+STATE_FILENAME = "state.json"
+
+# Row layout: (mtime_ns, size, encoded references, or None if not loaded)
+_Entry = Tuple[int, int, Optional[str]]
+
+
+class ParseCache:
+    """On-disk cache of the references extracted from each Markdown file.
+
+    Entries are keyed by path, mtime_ns, size and parser version, so a file
+    only needs to be parsed again when it changes or the parser does. All rows
+    are loaded with one query when the cache is opened, and new rows are
+    written in one transaction by ``save``.
+
+    A lazy cache only loads the keys of the rows up front, fetches the
+    references of a file when they are needed, and writes new rows in
+    batches, so that its memory doesn't grow with the vault.
+    """
+
+    FILENAME = "cache.sqlite"
+
+    # Number of new rows a lazy cache holds before writing them out
+    FLUSH_SIZE = 1000
+
+    def __init__(
+        self,
+        cache_dir: str,
+        parser_version: int,
+        debug: bool = False,
+        lazy: bool = False,
+    ) -> None:
+        """Open (or create) the cache in the given directory."""
+        self.path = os.path.join(cache_dir, self.FILENAME)
+        self.parser_version = parser_version
+        self.debug = debug
+        self.lazy = lazy
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._dirty: Dict[str, _Entry] = {}
+        # Imported here, so that the command line starts without it, see cli
+        import sqlite3
+
+        self._conn: Optional[sqlite3.Connection] = None
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS refs ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, "
+                "version INTEGER, data TEXT)"
+            )
+            rows = self._conn.execute(
+                "SELECT path, mtime_ns, size, "
+                + ("NULL" if lazy else "data")
+                + " FROM refs WHERE version = ?",
+                (parser_version,),
+            )
+            for path, mtime_ns, size, data in rows:
+                self._entries[path] = (mtime_ns, size, data)
+        except sqlite3.Error as e:
+            print(f"Warning: Parse cache disabled, error opening {self.path}: {e}")
+            self.close()
+
+        if self.debug:
+            print(f"Loaded {len(self._entries)} cached files from {self.path}")
+
+    def __len__(self) -> int:
+        """Number of files in the cache."""
+        return len(self._entries)
+
+    def is_fresh(self, source_file: str, stat: Tuple[int, int]) -> bool:
+        """Whether the cache holds the references of a file in this state.
+
+        If not, the file counts as a cache miss.
+        """
+        entry = self._entries.get(source_file)
+        if entry is None or (entry[0], entry[1]) != stat:
+            self.misses += 1
+            return False
+        return True
+
+    def get(self, source_file: str, stat: Tuple[int, int]) -> Optional[List[Reference]]:
+        """Return the cached references of a file, if it is unchanged."""
+        entry = self._entries.get(source_file)
+        data = None
+        if entry is not None and (entry[0], entry[1]) == stat:
+            data = entry[2]
+            if data is None:
+                data = self._load_data(source_file)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [
+            Reference.from_record(source_file, tuple(record))
+            for record in json.loads(data)
+        ]
+
+    def _load_data(self, source_file: str) -> Optional[str]:
+        """Fetch the encoded references of a file not loaded by a lazy cache."""
+        dirty = self._dirty.get(source_file)
+        if dirty is not None:
+            return dirty[2]
+        if self._conn is None:
+            return None
+        import sqlite3
+
+        try:
+            row = self._conn.execute(
+                "SELECT data FROM refs WHERE path = ? AND version = ?",
+                (source_file, self.parser_version),
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: Error reading parse cache {self.path}: {e}")
+            return None
+        return None if row is None else row[0]
+
+    def put(
+        self, source_file: str, stat: Tuple[int, int], refs: List[Reference]
+    ) -> None:
+        """Store the references of a file."""
+        data = json.dumps([ref.to_record() for ref in refs], ensure_ascii=False)
+        self._entries[source_file] = (stat[0], stat[1], None if self.lazy else data)
+        self._dirty[source_file] = (stat[0], stat[1], data)
+        if self.lazy and len(self._dirty) >= self.FLUSH_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write the new rows of a lazy cache to disk."""
+        if self._conn is None:
+            return
+        import sqlite3
+
+        try:
+            with self._conn:
+                self._write_dirty()
+        except sqlite3.Error as e:
+            print(f"Warning: Error writing parse cache {self.path}: {e}")
+
+    def _write_dirty(self) -> None:
+        """Insert or replace the new rows, as part of a transaction."""
+        assert self._conn is not None
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO refs VALUES (?, ?, ?, ?, ?)",
+            [
+                (path, mtime_ns, size, self.parser_version, data)
+                for path, (mtime_ns, size, data) in self._dirty.items()
+            ],
+        )
+        self._dirty.clear()
+
+    def save(self, live_paths: Optional[List[str]] = None) -> None:
+        """Write new entries to disk, dropping files no longer in ``live_paths``."""
+        if self._conn is None:
+            return
+        import sqlite3
+
+        try:
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM refs WHERE version != ?", (self.parser_version,)
+                )
+                if live_paths is not None:
+                    live = set(live_paths)
+                    stale = [(p,) for p in self._entries if p not in live]
+                    self._conn.executemany("DELETE FROM refs WHERE path = ?", stale)
+                    for (path,) in stale:
+                        del self._entries[path]
+                        self._dirty.pop(path, None)
+                self._write_dirty()
+        except sqlite3.Error as e:
+            print(f"Warning: Error writing parse cache {self.path}: {e}")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def load_state(cache_dir: str, key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+    """Load the state saved by ``save_state``, if it was saved under ``key``.
+
+    The state is plain JSON, so that a state file committed to a vault can't
+    run code when it is loaded.
+    """
+    path = os.path.join(cache_dir, STATE_FILENAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            saved = json.load(f)
+        saved_key, state = saved["key"], saved["state"]
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable state file {path}: {e}")
+        return None
+    # Compare in JSON form, where the tuples of the key became lists
+    if saved_key != json.loads(json.dumps(key)) or not isinstance(state, dict):
+        return None
+    return state
+
+
+def save_state(cache_dir: str, key: Tuple[Any, ...], state: Dict[str, Any]) -> None:
+    """Save a JSON-serializable state, replacing the previous one atomically."""
+    path = os.path.join(cache_dir, STATE_FILENAME)
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "state": state}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Warning: Error writing state file {path}: {e}")
@@ -1,196 +1,983 @@
 """Markdown reference checker implementation."""
 
 import os
-from typing import Dict, Optional, Set
+import time
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    AbstractSet,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-from .models import CheckResult, Reference
+from .cache import ParseCache, load_state, save_state
+from .graph import CompactLinkGraph, LinkGraph
+from .models import (
+    CheckResult,
+    Finding,
+    FindingQueue,
+    Reference,
+    ReferenceRecord,
+    ResultSink,
+    VaultChanges,
+    VaultIndex,
+)
 from .parsers import MarkdownParser
-from .utils import FileSystem
+from .pipeline import PipelineStats, prefetch, timed
+from .resolver import RESOLUTION_STEPS, Resolver
+from .stats import CacheStats, CheckStats
+from .storage import open_storage
+from .utils import FileSystem, normalize_path
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+# Version of the saved incremental state, bump when its layout changes
+STATE_VERSION = 4
+
+# Below this many files to parse, starting worker processes costs more than
+# it saves, so parsing stays in the main process
+PARALLEL_MIN_FILES = 200
+
+# Parse batches submitted ahead of the one being consumed, per worker
+# process. Enough to keep the workers busy, while bounding the parsed batches
+# waiting in memory to a constant, however large the vault
+PENDING_BATCHES_PER_JOB = 2
+
+# Maximum number of entries of each resolver cache in low-memory mode
+LOW_MEMORY_CACHE_SIZE = 1 << 16
+
+# Per-process state of parse workers, set up once by _init_worker
+_worker_fs: Optional[FileSystem] = None
+_worker_parser: Optional[MarkdownParser] = None
+
+
+def _init_worker(root_dir: str, rev: Optional[str]) -> None:
+    """Set up the file system and parser of a parse worker process."""
+    global _worker_fs, _worker_parser
+    _worker_fs = FileSystem(root_dir, storage=open_storage(root_dir, rev))
+    _worker_parser = MarkdownParser()
+
+
+def _parse_batch(
+    paths: List[str],
+) -> Tuple[List[List[ReferenceRecord]], PipelineStats]:
+    """Read and parse a batch of files in a worker process."""
+    assert _worker_fs is not None and _worker_parser is not None
+    stats = PipelineStats()
+    batch = []
+    for path in paths:
+        start = time.perf_counter()
+        content = _worker_fs.read_file(path, MarkdownParser.MARKERS)
+        read_done = time.perf_counter()
+        refs = _worker_parser.parse_references(path, content) if content else ()
+        batch.append([ref.to_record() for ref in refs])
+        stats.read.add(1, read_done - start, len(content))
+        stats.parse.add(1, time.perf_counter() - read_done)
+    return batch, stats
 
 
 class ReferenceChecker:
     """Main reference checker class."""
 
     def __init__(
-        self, root_dir: str, debug: bool = False, strict_image_refs: bool = False
+        self,
+        root_dir: str,
+        debug: bool = False,
+        strict_image_refs: bool = False,
+        cache_dir: Optional[str] = None,
+        jobs: int = 1,
+        readers: int = 4,
+        low_memory: bool = False,
+        rev: Optional[str] = None,
     ) -> None:
         """Initialize with root directory.
 
         Args:
-            root_dir: The root directory to check
+            root_dir: The root directory to check, or a zip or tar archive
+                     holding it, which is read without extracting it
             debug: Whether to enable debug output
-            strict_image_refs: If True, only count ![[]] and ![] as image usage.
-                             If False (default), also count [[]] as image usage.
+            strict_image_refs: If True, only count embeds (![[]], ![] and
+                             <img>) as image usage. If False (default), also
+                             count links ([[]], []()) as image usage.
+            cache_dir: Directory of the persistent parse cache. If None
+                      (default), every file is parsed on every run.
+            jobs: Number of processes reading and parsing files. 1 (default)
+                 parses in the main process, 0 uses one process per CPU.
+                 Compressed tar archives are always parsed in the main
+                 process, see ``TarStorage``.
+            readers: Number of threads reading files ahead of the parser when
+                    parsing in the main process. 0 reads each file when it is
+                    parsed.
+            low_memory: Keep memory flat as the vault grows: the references of
+                       each file are dropped once it is checked, keeping only
+                       its links and image uses, the resolver caches are
+                       bounded and the parse cache is loaded lazily. Rules
+                       out incremental checks.
+            rev: Check the vault as of this git revision, reading the files
+                from the repository's objects instead of the working tree.
+                The root directory must be inside the repository.
         """
-        self.fs = FileSystem(root_dir, debug=debug)
+        self.rev = rev
+        self.fs = FileSystem(
+            root_dir, debug=debug, storage=open_storage(os.path.abspath(root_dir), rev)
+        )
         self.parser = MarkdownParser()
-        self.file_refs: Dict[str, Set[Reference]] = {}  # Map of file to its references
-        self.image_refs: Set[str] = set()  # Set of all referenced image files
+        self.file_refs: Dict[str, List[Reference]] = {}  # Map of file to its references
         self.strict_image_refs = strict_image_refs
-        self._resolution_cache: Dict[str, Optional[str]] = (
-            {}
-        )  # Cache for resolved paths
-        self._ref_map: Dict[str, Set[str]] = {}  # Map of file to its referenced files
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        if not self.fs.storage.parallel:
+            self.jobs = 1
+        self.readers = readers
+        self.low_memory = low_memory
+        self.pipeline_stats = PipelineStats()  # Per-stage statistics of the last check
+        self._resolver: Optional[Resolver] = None  # Resolver of the current index
+        # Called with the name of each phase of a check as it ends, e.g. by
+        # a MemoryTracker
+        self.phase_hook: Optional[Callable[[str], None]] = None
+
+        # What every checked file contributes to the result. Kept up to date
+        # file by file, so that a change only touches the entries it affects.
+        self._resolved: Dict[str, List[Optional[str]]] = {}  # Parallel to file_refs
+        self.graph = self._new_graph()  # Links between files, resolved
+        self._dependents: Dict[str, Set[str]] = {}  # Target key to referencing files
+        self._image_usage: Dict[str, int] = {}  # Image to number of references
+        self._unused_images: Set[str] = set()
+        self._index: Optional[VaultIndex] = None  # Index of the last full check
+        self.cache: Optional[ParseCache] = None
+        if cache_dir is not None:
+            self.cache = ParseCache(
+                cache_dir, MarkdownParser.VERSION, debug=debug, lazy=low_memory
+            )
+            # Keep the cache itself out of the vault listing
+            rel_cache_dir = os.path.relpath(
+                os.path.abspath(cache_dir), self.fs.root_dir
+            )
+            if rel_cache_dir != "." and not rel_cache_dir.startswith(".."):
+                self.fs.ignore_patterns.append(
+                    "/" + self.fs.normalize_path(rel_cache_dir) + "/"
+                )
+
+    @property
+    def image_refs(self) -> AbstractSet[str]:
+        """Set of all referenced image files."""
+        return self._image_usage.keys()
+
+    def _reset(self) -> None:
+        """Forget everything recorded by previous checks."""
+        self.pipeline_stats = PipelineStats()
+        self.file_refs.clear()
+        self._resolved.clear()
+        self.graph = self._new_graph()
+        self._dependents.clear()
+        self._image_usage.clear()
+        self._unused_images.clear()
+        self._index = None
+
+    def _new_graph(self) -> Union[LinkGraph, CompactLinkGraph]:
+        """Create an empty link graph."""
+        return CompactLinkGraph() if self.low_memory else LinkGraph()
+
+    @property
+    def resolver(self) -> Resolver:
+        """Resolver for the current index of the vault."""
+        index = self.fs.index
+        if self._resolver is None or self._resolver.index is not index:
+            self._resolver = Resolver(
+                index,
+                self.fs.ignore_matcher,
+                cache_size=LOW_MEMORY_CACHE_SIZE if self.low_memory else None,
+            )
+        return self._resolver
 
     def _resolve_reference(self, ref: Reference) -> Optional[str]:
         """Resolve a reference to its actual file path.
 
-        Resolution order for both links ([[...]]) and embeds (![[...]]):
-        1. Try exact path with extension
-        2. Try adding .md extension if no extension (for non-image files)
-        3. Try in assets directory (for image files)
-        4. Try finding any file with the same basename in the same directory
-        5. Try finding any file with the same basename in any directory
-        """
-        # Check cache first
-        cache_key = f"{ref.source_file}:{ref.target}"
-        if cache_key in self._resolution_cache:
-            return self._resolution_cache[cache_key]
-
-        # Get the directory of the source file
-        source_dir = os.path.dirname(ref.source_file)
-
-        # Try different path combinations
-        possible_paths = [
-            # Original path (keep as is)
-            ref.target,
-            # Path relative to source file (normalized)
-            os.path.normpath(os.path.join(source_dir, ref.target)),
-            # Try in root directory
-            os.path.basename(ref.target),
-        ]
-
-        # For image files, also try in assets directory
-        if os.path.splitext(ref.target)[1].lower() in {
-            ".png",
-            ".jpg",
-            ".jpeg",
-            ".gif",
-            ".svg",
-            ".webp",
-        }:
-            possible_paths.append(os.path.join("assets", os.path.basename(ref.target)))
-
-        # Try each possible path
-        for path in possible_paths:
-            if not path:
-                continue
+        References to ignored paths are treated as invalid. See ``Resolver``
+        for the resolution order.
+        """
+        return self.resolver.resolve(ref.source_file, ref.target)
 
-            # Normalize path
-            path = self.fs.normalize_path(path)
+    def _phase_done(self, name: str) -> None:
+        """Notify the phase hook, if any, that a phase of the check ended."""
+        if self.phase_hook is not None:
+            self.phase_hook(name)
 
-            # If path has extension, try it directly
-            if os.path.splitext(path)[1]:
-                if self.fs.file_exists(path):
-                    self._resolution_cache[cache_key] = path
-                    return path
-                continue
+    def _is_cached(self, file_path: str) -> bool:
+        """Whether the parse cache holds a file's current references."""
+        if self.cache is None:
+            return False
+        stat = self.fs.index.stats.get(file_path)
+        return stat is not None and self.cache.is_fresh(file_path, stat)
+
+    def _cached_refs(self, file_path: str) -> Optional[List[Reference]]:
+        """Return a file's references from the parse cache, if it is enabled."""
+        if self.cache is None:
+            return None
+        stat = self.fs.index.stats.get(file_path)
+        if stat is None:
+            return None
+        return self.cache.get(file_path, stat)
+
+    def _store_refs(self, file_path: str, refs: List[Reference]) -> None:
+        """Store freshly parsed references in the parse cache."""
+        if self.cache is not None:
+            stat = self.fs.index.stats.get(file_path)
+            if stat is not None:
+                self.cache.put(file_path, stat, refs)
+
+    def _parse_content(self, file_path: str, content: str) -> List[Reference]:
+        """Parse a file's content, storing the result in the parse cache."""
+        start = time.perf_counter()
+        refs = list(self.parser.parse_references(file_path, content)) if content else []
+        self.pipeline_stats.parse.add(1, time.perf_counter() - start)
+        self._store_refs(file_path, refs)
+        return refs
+
+    def _read_file(self, file_path: str) -> str:
+        """Read a file for parsing, or "" if it can't contain any reference."""
+        return self.fs.read_file(file_path, self.parser.MARKERS)
+
+    def _parse_uncached(self, file_path: str) -> List[Reference]:
+        """Read and parse a file, storing the result in the parse cache."""
+        start = time.perf_counter()
+        content = self._read_file(file_path)
+        self.pipeline_stats.read.add(1, time.perf_counter() - start, len(content))
+        return self._parse_content(file_path, content)
+
+    def _read_files(self, paths: List[str]) -> Iterator[Tuple[str, str]]:
+        """Read files in order, prefetching them in reader threads.
+
+        At most a few files per reader are read ahead of the parser, so
+        memory stays bounded however far the readers could get ahead.
+        """
+        stats = self.pipeline_stats
+        if self.readers <= 0 or len(paths) < 2:
+            for path in paths:
+                start = time.perf_counter()
+                content = self._read_file(path)
+                stats.read.add(1, time.perf_counter() - start, len(content))
+                yield path, content
+            return
+
+        results = prefetch(
+            timed(self._read_file), paths, self.readers, depth=4 * self.readers
+        )
+        while True:
+            start = time.perf_counter()
+            item = next(results, None)
+            stats.read_wait += time.perf_counter() - start
+            if item is None:
+                return
+            path, (content, seconds) = item
+            stats.read.add(1, seconds, len(content))
+            yield path, content
+
+    def _parse_file(self, file_path: str) -> List[Reference]:
+        """Read and parse a file, going through the parse cache when enabled."""
+        refs = self._cached_refs(file_path)
+        return refs if refs is not None else self._parse_uncached(file_path)
+
+    def _parse_files(self, paths: List[str]) -> Iterator[Tuple[str, List[Reference]]]:
+        """Read and parse files, in order, fanning out to worker processes.
+
+        Cache hits are served by the main process, loaded from the cache
+        as they are yielded. The remaining files are parsed in worker
+        processes when there are enough of them to pay for the pool startup;
+        the workers return compact reference records and everything else
+        (resolution, bookkeeping) stays in the main process.
+        """
+        cached = set()
+        misses = []
+        for path in paths:
+            if self._is_cached(path):
+                cached.add(path)
+            else:
+                misses.append(path)
+
+        if self.jobs <= 1 or len(misses) < PARALLEL_MIN_FILES:
+            contents = self._read_files(misses)
+            for path in paths:
+                if path in cached:
+                    refs = self._parse_file(path)
+                else:
+                    _, content = next(contents)
+                    refs = self._parse_content(path, content)
+                yield path, refs
+            return
+
+        chunk_size = max(1, min(256, len(misses) // (self.jobs * 4)))
+        chunks = [misses[i : i + chunk_size] for i in range(0, len(misses), chunk_size)]
+        if self.fs.debug:
+            print(
+                f"Parsing {len(misses)} files in {len(chunks)} batches "
+                f"with {self.jobs} processes"
+            )
+        # Imported here, since multiprocessing is slow to import and most runs
+        # don't need it
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=self.jobs,
+            initializer=_init_worker,
+            initargs=(self.fs.root_dir, self.rev),
+        ) as executor:
+            # Batches are returned in submission order, which keeps the output
+            # deterministic
+            parsed = (
+                (path, [Reference.from_record(path, record) for record in records])
+                for chunk, batch in zip(chunks, self._collect_batches(executor, chunks))
+                for path, records in zip(chunk, batch)
+            )
+            for path in paths:
+                if path in cached:
+                    refs = self._parse_file(path)
+                else:
+                    parsed_path, refs = next(parsed)
+                    assert parsed_path == path
+                    self._store_refs(path, refs)
+                yield path, refs
+
+    def _collect_batches(
+        self, executor: "ProcessPoolExecutor", chunks: List[List[str]]
+    ) -> Iterator[List[List[ReferenceRecord]]]:
+        """Run parse batches in the pool, merging the workers' statistics.
+
+        Unlike ``executor.map``, which submits every batch up front and keeps
+        the results of all finished ones until they are consumed, only a
+        window of ``PENDING_BATCHES_PER_JOB`` batches per process is in
+        flight, refilled as each batch is consumed.
+        """
+        stats = self.pipeline_stats
+        window = self.jobs * PENDING_BATCHES_PER_JOB
+        pending: Deque[Future[Tuple[List[List[ReferenceRecord]], PipelineStats]]] = (
+            deque(executor.submit(_parse_batch, chunk) for chunk in chunks[:window])
+        )
+        remaining = iter(chunks[window:])
+        while pending:
+            batch, batch_stats = pending.popleft().result()
+            chunk = next(remaining, None)
+            if chunk is not None:
+                pending.append(executor.submit(_parse_batch, chunk))
+            stats.read.add(
+                batch_stats.read.items, batch_stats.read.seconds, batch_stats.read.bytes
+            )
+            stats.parse.add(batch_stats.parse.items, batch_stats.parse.seconds)
+            yield batch
+
+    def _check_files(
+        self, paths: List[str], sink: Optional[ResultSink] = None
+    ) -> Iterator[str]:
+        """Parse, resolve and record the references of files.
+
+        Yields each file once it is checked, after passing its invalid
+        references to ``sink``, if given.
+        """
+        stats = self.pipeline_stats
+        for file_path, refs in self._parse_files(paths):
+            start = time.perf_counter()
+            self._check_refs(file_path, refs, sink)
+            stats.resolve.add(len(refs), time.perf_counter() - start)
+            yield file_path
 
-            # Try with .md extension first (only for non-image files)
-            if not any(
-                ref.target.lower().endswith(ext)
-                for ext in {".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp"}
-            ):
-                md_path = path + ".md"
-                if self.fs.file_exists(md_path):
-                    resolved = self.fs.normalize_path(md_path)
-                    self._resolution_cache[cache_key] = resolved
-                    return resolved
-
-            # Try finding any file with the same basename
-            basename = os.path.basename(path)
-            matches = self.fs.find_by_basename(basename)
-            if matches:
-                # Use the first match (they're sorted)
-                self._resolution_cache[cache_key] = matches[0]
-                return matches[0]
-
-        return None
+    def _target_key(self, target: str) -> str:
+        """Return the key of the files a reference target can resolve to.
+
+        Every resolution step looks for a file named after the last path
+        segment of the target (with or without an added extension), so a
+        file can only change how a target resolves if its name or its name
+        without extension equals this key.
+        """
+        return normalize_path(target).rsplit("/", 1)[-1]
+
+    def _file_keys(self, path: str) -> Set[str]:
+        """Return the target keys a file can satisfy."""
+        name = path.rsplit("/", 1)[-1]
+        return {name, os.path.splitext(name)[0]}
+
+    def _counts_as_image_use(self, ref: Reference) -> bool:
+        """Whether a reference to an image counts as using it."""
+        return not self.strict_image_refs or ref.is_embed
+
+    def _use_image(self, image: str, delta: int) -> None:
+        """Adjust the reference count of an image."""
+        count = self._image_usage.get(image, 0) + delta
+        if count > 0:
+            self._image_usage[image] = count
+            self._unused_images.discard(image)
+        else:
+            self._image_usage.pop(image, None)
+            if self._index is not None and image in self._index.paths:
+                self._unused_images.add(image)
+
+    def _drop_file(self, file_path: str) -> None:
+        """Remove everything a file contributes to the result."""
+        refs = self.file_refs.pop(file_path, None)
+        if refs is None:
+            return
+        resolved = self._resolved.pop(file_path)
+        for ref, path in zip(refs, resolved):
+            key = self._target_key(ref.target)
+            dependents = self._dependents.get(key)
+            if dependents is not None:
+                dependents.discard(file_path)
+                if not dependents:
+                    del self._dependents[key]
+            if path is not None and self.fs.is_image_file(path):
+                if self._counts_as_image_use(ref):
+                    self._use_image(path, -1)
+        self.graph.set_links(file_path, ())
+
+    def _set_file(
+        self, file_path: str, refs: List[Reference], resolved: List[Optional[str]]
+    ) -> None:
+        """Replace what a file contributes to the result."""
+        self._drop_file(file_path)
+        if not self.low_memory:
+            # Keep what incremental checks need to update the file later
+            self.file_refs[file_path] = refs
+            self._resolved[file_path] = resolved
+            for ref in refs:
+                key = self._target_key(ref.target)
+                self._dependents.setdefault(key, set()).add(file_path)
+        links = set()
+        for ref, path in zip(refs, resolved):
+            if path is None:
+                continue
+            if self.fs.is_image_file(path):
+                # Track image usage based on reference type and strict mode
+                if self._counts_as_image_use(ref):
+                    self._use_image(path, 1)
+            else:
+                links.add(path)
+        self.graph.set_links(file_path, links)
 
     def check_file(self, file_path: str) -> CheckResult:
-        """Check references in a single file."""
+        """Check references in a single file.
+
+        What the file contributes to the result replaces that of an earlier
+        check. In low-memory mode it can't be replaced, since it isn't kept,
+        so only the invalid references of the file are found and nothing is
+        recorded.
+        """
         result = CheckResult()
 
         # If file should be ignored, return empty result
         if self.fs.should_ignore(file_path):
             return result
 
-        # Read file content
+        refs = self._parse_file(file_path)
+        if self.low_memory:
+            resolved = self.resolver.resolve_many(
+                file_path, [ref.target for ref in refs]
+            )
+            self._send_invalid(file_path, refs, resolved, result)
+        else:
+            self._check_refs(file_path, refs, result)
+        return result
+
+    def _check_refs(
+        self, file_path: str, refs: List[Reference], sink: Optional[ResultSink] = None
+    ) -> None:
+        """Resolve and record the parsed references of a file.
+
+        Invalid references are also passed to ``sink``, if given.
+        """
+        resolved = self.resolver.resolve_many(file_path, [ref.target for ref in refs])
+        self._set_file(file_path, refs, resolved)
+        if sink is not None:
+            self._send_invalid(file_path, refs, resolved, sink)
+
+    def _send_invalid(
+        self,
+        file_path: str,
+        refs: List[Reference],
+        resolved: List[Optional[str]],
+        sink: ResultSink,
+    ) -> None:
+        """Pass the invalid references of a file, with their lines, to a sink."""
+        invalid = [ref for ref, path in zip(refs, resolved) if path is None]
+        self._load_lines(file_path, invalid)
+        for ref in invalid:
+            sink.add_invalid_ref(ref)
+
+    def _load_lines(self, file_path: str, refs: List[Reference]) -> None:
+        """Fill in the line content of references about to be reported.
+
+        Lines are not kept for parsed references, so the file is read again
+        the first time one of its references is reported.
+        """
+        missing = [ref for ref in refs if ref.line_content is None]
+        if not missing:
+            return
         content = self.fs.read_file(file_path)
-        if not content:
-            return result
+        lines = content.split("\n") if any(ref.offset < 0 for ref in missing) else []
+        for ref in missing:
+            if ref.offset >= 0:
+                ref.line_content = self.parser.line_at(content, ref.offset)
+            elif ref.line_number <= len(lines):
+                ref.line_content = lines[ref.line_number - 1]
 
-        # Parse references
-        refs = list(self.parser.parse_references(file_path, content))
-        self.file_refs[file_path] = set(refs)
+    def _collect_result(self, sink: ResultSink) -> None:
+        """Pass the findings of the last check to a sink."""
+        if self._index is None:
+            return
+        for file_path in self._index.markdown_files:
+            refs = self.file_refs.get(file_path)
+            if refs:
+                self._send_invalid(file_path, refs, self._resolved[file_path], sink)
+        self._collect_global(sink)
 
-        # Check each reference
-        for ref in refs:
-            # Check if target path should be ignored
-            target_path = os.path.normpath(
-                os.path.join(os.path.dirname(file_path), ref.target)
-            )
-            if self.fs.should_ignore(target_path):
-                result.add_invalid_ref(ref)
+    def _collect_global(self, sink: ResultSink) -> None:
+        """Pass the findings that depend on the whole vault to a sink."""
+        for image in self._unused_images:
+            sink.add_unused_image(image)
+        start = time.perf_counter()
+        links = self.graph.unidirectional_links()
+        self.pipeline_stats.graph += time.perf_counter() - start
+        for source, target in links:
+            sink.add_unidirectional_link(source, target)
+
+    def _result(self) -> CheckResult:
+        """Build the result of the last check."""
+        result = CheckResult()
+        self._collect_result(result)
+        return result
+
+    def _check_all(self, sink: Optional[ResultSink] = None) -> Iterator[str]:
+        """Check every file of a fresh index of the vault.
+
+        Yields each Markdown file once it is checked, after passing its
+        invalid references to ``sink``, if given. They are final as soon as
+        the file is checked, since the index is complete by then.
+        """
+        self._reset()
+
+        # Walk the vault once; everything below reads from the index
+        start = time.perf_counter()
+        index = self.fs.refresh_index()
+        self.pipeline_stats.walk = time.perf_counter() - start
+        self._phase_done("walk")
+
+        # Check all Markdown files
+        yield from self._check_files(index.markdown_files, sink)
+        self._phase_done("read/parse/resolve")
+
+        # Find unused images
+        start = time.perf_counter()
+        self._index = index
+        self._unused_images = {
+            path
+            for path in index.attachments
+            if self.fs.is_image_file(path) and path not in self._image_usage
+        }
+        self.pipeline_stats.image_scan = time.perf_counter() - start
+        self._phase_done("image-scan")
+
+    def _apply_changes(self, index: VaultIndex, changes: VaultChanges) -> None:
+        """Update the recorded state for the changes between two indexes."""
+        self._index = index
+
+        # References whose resolution may change because a file with a
+        # matching name appeared or disappeared
+        keys: Set[str] = set()
+        for path in changes.added + changes.removed:
+            keys.update(self._file_keys(path))
+        affected: Set[str] = set()
+        for key in keys:
+            affected.update(self._dependents.get(key, ()))
+
+        for path in changes.removed:
+            self._drop_file(path)
+            self._unused_images.discard(path)
+        for path in changes.added:
+            if self.fs.is_image_file(path) and path not in self._image_usage:
+                self._unused_images.add(path)
+
+        # Parse new and changed files again
+        reparsed = set(changes.modified)
+        reparsed.update(p for p in changes.added if self.fs.is_markdown_file(p))
+        for _ in self._check_files([p for p in index.markdown_files if p in reparsed]):
+            pass
+
+        # Resolve the affected references of other files again
+        for file_path in affected - reparsed:
+            refs = self.file_refs.get(file_path)
+            if refs is None:
                 continue
+            old_resolved = self._resolved[file_path]
+            resolved = [
+                (
+                    self._resolve_reference(ref)
+                    if self._target_key(ref.target) in keys
+                    else path
+                )
+                for ref, path in zip(refs, old_resolved)
+            ]
+            if resolved != old_resolved:
+                self._set_file(file_path, refs, resolved)
 
-            # Try to resolve the reference
-            resolved_path = self._resolve_reference(ref)
-            if not resolved_path:
-                # Reference is invalid
-                result.add_invalid_ref(ref)
-            elif self.fs.is_image_file(resolved_path):
-                # Track image usage based on reference type and strict mode
-                if not self.strict_image_refs or ref.is_embed:
-                    self.image_refs.add(resolved_path)
+        if self.fs.debug:
+            print(
+                f"Incremental check: {len(changes.added)} added, "
+                f"{len(changes.removed)} removed, {len(changes.modified)} modified, "
+                f"{len(affected)} files re-resolved"
+            )
 
-        return result
+    def poll_changes(self) -> Tuple[VaultIndex, VaultChanges]:
+        """Walk the vault again and diff it against the last checked index.
+
+        Returns the fresh index together with the changes, which can then be
+        passed to ``apply_changes``. Must be called after a directory check.
+        """
+        if self._index is None:
+            raise RuntimeError("check_directory() must be called before polling")
+        # Polling starts a new measurement, which the update then adds to
+        self.pipeline_stats = PipelineStats()
+        start = time.perf_counter()
+        index = self.fs.refresh_index()
+        self.pipeline_stats.walk = time.perf_counter() - start
+        self._phase_done("walk")
+        return index, index.diff(self._index)
 
-    def _build_ref_map(self) -> None:
-        """Build a map of files to their referenced files."""
-        self._ref_map.clear()
-        for source_file, refs in self.file_refs.items():
-            referenced_files = set()
+    def apply_changes(self, index: VaultIndex, changes: VaultChanges) -> CheckResult:
+        """Update the last check for the given changes and return the new result."""
+        self._update(index, changes)
+        return self._result()
+
+    def _update(self, index: VaultIndex, changes: VaultChanges) -> None:
+        """Update the last check for the given changes."""
+        if self.low_memory:
+            raise RuntimeError(
+                "Incremental checks are not supported in low-memory mode"
+            )
+        if changes:
+            self._apply_changes(index, changes)
+        else:
+            self._index = index
+        self._phase_done("update")
+
+    def recheck(self) -> CheckResult:
+        """Re-check only what changed since the last check of the directory.
+
+        Falls back to a full check when the directory has not been checked
+        yet.
+        """
+        self._recheck()
+        return self._result()
+
+    def _recheck(self) -> None:
+        """Re-check what changed, or everything if nothing was checked yet."""
+        if self.low_memory:
+            raise RuntimeError(
+                "Incremental checks are not supported in low-memory mode"
+            )
+        if self._index is None:
+            for _ in self._check_all():
+                pass
+        else:
+            self._update(*self.poll_changes())
+
+    def stats(self) -> CheckStats:
+        """Collect the statistics of the last check, for profiling.
+
+        The counters are kept during every check; only the histogram of
+        resolution steps is computed here, by resolving every reference
+        again, so this takes about as long as the resolve phase. It is left
+        empty in low-memory mode, where the references are not kept.
+        """
+        resolver = self.resolver
+        stats = CheckStats(pipeline=self.pipeline_stats)
+        if self.low_memory:
+            if self._index is not None:
+                stats.files = len(self._index.markdown_files)
+            stats.refs = self.pipeline_stats.resolve.items
+        else:
+            stats.files = len(self.file_refs)
+            stats.refs = sum(len(refs) for refs in self.file_refs.values())
+        if self.cache is not None:
+            stats.caches["parse"] = CacheStats(self.cache.hits, self.cache.misses)
+        stats.caches["resolution"] = CacheStats(resolver.hits, resolver.misses)
+        stats.caches["target"] = CacheStats(
+            resolver.target_hits, resolver.target_misses
+        )
+
+        if self.low_memory:
+            return stats
+        steps: Dict[Tuple[str, str], str] = {}
+        histogram = dict.fromkeys(RESOLUTION_STEPS, 0)
+        for file_path, refs in self.file_refs.items():
+            source_dir = os.path.dirname(file_path)
             for ref in refs:
-                resolved_path = self._resolve_reference(ref)
-                if resolved_path and not self.fs.is_image_file(resolved_path):
-                    referenced_files.add(resolved_path)
-            self._ref_map[source_file] = referenced_files
+                key = (source_dir, ref.target)
+                step = steps.get(key)
+                if step is None:
+                    step = steps[key] = resolver.explain(source_dir, ref.target)
+                histogram[step] += 1
+        stats.resolution_steps = histogram
+        return stats
+
+    def structures(self) -> Dict[str, Tuple[int, Any]]:
+        """The structures that grow with the vault, for memory reports.
+
+        Returns:
+            Map of name to (number of entries, structure)
+        """
+        resolver = self.resolver
+        structures: Dict[str, Tuple[int, Any]] = {
+            "file_refs": (
+                sum(len(refs) for refs in self.file_refs.values()),
+                self.file_refs,
+            ),
+            "resolved": (len(self._resolved), self._resolved),
+            "graph": (len(self.graph), self.graph),
+            "dependents": (len(self._dependents), self._dependents),
+            "image usage": (len(self._image_usage), self._image_usage),
+            "index": (len(self.fs.index.paths), self.fs.index),
+            "resolution cache": (
+                len(resolver.resolution_cache),
+                resolver.resolution_cache,
+            ),
+            "target cache": (len(resolver.target_cache), resolver.target_cache),
+        }
+        if self.cache is not None:
+            structures["parse cache"] = (len(self.cache), self.cache)
+        return structures
 
-    def check_directory(self) -> CheckResult:
-        """Check all Markdown files in the directory."""
+    def _state_key(self) -> Tuple[Any, ...]:
+        """Key that a saved state must match to be reused."""
+        return (
+            STATE_VERSION,
+            MarkdownParser.VERSION,
+            self.fs.root_dir,
+            self.strict_image_refs,
+            tuple(self.fs.ignore_patterns),
+        )
+
+    def _load_state(self) -> None:
+        """Restore the state saved by a previous incremental run.
+
+        Only the references, their resolutions and the index are saved; the
+        link graph, dependents and image usage are rebuilt from them, which
+        needs no file access.
+        """
+        if self.cache is None:
+            return
+        state = load_state(os.path.dirname(self.cache.path), self._state_key())
+        if state is None:
+            return
+        self._reset()
+        try:
+            saved_index = state["index"]
+            index = VaultIndex(
+                markdown_files=list(saved_index["markdown_files"]),
+                attachments=list(saved_index["attachments"]),
+                basenames={k: list(v) for k, v in saved_index["basenames"].items()},
+                stats={k: (v[0], v[1]) for k, v in saved_index["stats"].items()},
+            )
+            index.paths = set(index.markdown_files)
+            index.paths.update(index.attachments)
+            self._index = index
+            for file_path, (records, resolved) in state["files"].items():
+                refs = [
+                    Reference.from_record(file_path, tuple(record))
+                    for record in records
+                ]
+                self._set_file(file_path, refs, list(resolved))
+        except Exception as e:
+            print(f"Warning: Ignoring invalid incremental state: {e}")
+            self._reset()
+            return
+        self._unused_images = {
+            path
+            for path in index.attachments
+            if self.fs.is_image_file(path) and path not in self._image_usage
+        }
+
+    def _save_state(self) -> None:
+        """Save the state for the next incremental run."""
+        if self.cache is None or self._index is None:
+            return
+        index = self._index
+        state = {
+            "files": {
+                file_path: (
+                    [ref.to_record() for ref in refs],
+                    self._resolved[file_path],
+                )
+                for file_path, refs in self.file_refs.items()
+            },
+            "index": {
+                "markdown_files": index.markdown_files,
+                "attachments": index.attachments,
+                "basenames": index.basenames,
+                "stats": index.stats,
+            },
+        }
+        save_state(os.path.dirname(self.cache.path), self._state_key(), state)
+
+    def check_directory(self, incremental: bool = False) -> CheckResult:
+        """Check all Markdown files in the directory.
+
+        Args:
+            incremental: Only re-check what changed since the previous check,
+                        which is kept in memory and, when the parse cache is
+                        enabled, saved in the cache directory between runs.
+        """
         result = CheckResult()
-        self.file_refs.clear()
-        self.image_refs.clear()
-        self._resolution_cache.clear()
-        self._ref_map.clear()
+        self.check_into(result, incremental=incremental)
+        return result
 
-        # Find all Markdown files
-        for file_path in self.fs.find_files(pattern="*.md"):
-            file_result = self.check_file(file_path)
-            result = result.merge(file_result)
+    def check_into(self, sink: ResultSink, incremental: bool = False) -> None:
+        """Check all Markdown files in the directory, passing findings to a sink.
 
-        # Build reference map for faster unidirectional link checking
-        self._build_ref_map()
+        Unlike ``check_directory``, the findings don't have to be held in
+        memory together if the sink doesn't keep them.
 
-        # Find unused images
-        image_patterns = ("*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp")
-        all_images = set(self.fs.find_files(pattern=image_patterns))
-        unused_images = all_images - self.image_refs
-        for image in unused_images:
-            result.add_unused_image(image)
-
-        # Check for unidirectional links between markdown files
-        for source_file, referenced_files in self._ref_map.items():
-            for target_file in referenced_files:
-                if target_file.endswith(".md"):
-                    # Check for back references
-                    source_base = os.path.splitext(source_file)[0]
-                    target_refs = self._ref_map.get(target_file, set())
-                    if (
-                        source_file not in target_refs
-                        and source_base not in target_refs
-                    ):
-                        result.add_unidirectional_link(source_file, target_file)
+        Args:
+            sink: Receiver of the findings
+            incremental: See ``check_directory``
+        """
+        for finding in self.iter_check(incremental=incremental):
+            finding.send(sink)
+
+    def iter_check(self, incremental: bool = False) -> Iterator[Finding]:
+        """Check all Markdown files in the directory, yielding findings early.
+
+        In a full check, the invalid references of each file are yielded as
+        soon as the file is checked; unused images and unidirectional links
+        depend on the whole vault and come at the end. An incremental check
+        only knows the final state once every change is applied, so it
+        yields all findings then.
 
+        Args:
+            incremental: See ``check_directory``
+        """
+        findings = FindingQueue()
+        if incremental and self.low_memory:
+            raise RuntimeError(
+                "Incremental checks are not supported in low-memory mode"
+            )
+        if incremental:
+            if self._index is None:
+                self._load_state()
+            self._recheck()
+            self._collect_result(findings)
+            self._phase_done("collect")
+            yield from findings.drain()
+            self._save_state()
+        else:
+            for _ in self._check_all(findings):
+                yield from findings.drain()
+            self._collect_global(findings)
+            self._phase_done("graph")
+            yield from findings.drain()
+        self.save_cache()
+
+    def check_changed(
+        self, rev: Optional[str] = None, staged: bool = False
+    ) -> CheckResult:
+        """Check only the Markdown files touched by a git change.
+
+        See ``iter_check_changed``.
+        """
+        result = CheckResult()
+        for finding in self.iter_check_changed(rev, staged):
+            finding.send(result)
         return result
+
+    def iter_check_changed(
+        self, rev: Optional[str] = None, staged: bool = False
+    ) -> Iterator[Finding]:
+        """Check only the Markdown files touched by a git change.
+
+        The vault is listed from the git index instead of walked, and only
+        the changed Markdown files are parsed, along with the notes that may
+        link to a removed or renamed file: those that mention its name, as
+        found by ``git grep``. References are still resolved against the
+        whole vault. Unused images and unidirectional links depend on every
+        note, so only invalid references are yielded.
+
+        Args:
+            rev: Check the changes of the working tree since this revision
+            staged: Check the changes staged for commit, since ``rev`` or,
+                   if it is None, since HEAD
+        """
+        if self.rev is not None:
+            raise RuntimeError(
+                "Changed files are checked in the working tree, not at a revision"
+            )
+        # Imported here, since most runs don't need git
+        from . import git
+
+        self._reset()
+        root_dir = self.fs.root_dir
+        start = time.perf_counter()
+        index = self.fs.index_listing(git.list_files(root_dir))
+        changes = git.changed_files(root_dir, rev, staged)
+        self.pipeline_stats.walk = time.perf_counter() - start
+        self._phase_done("walk")
+
+        # Imported here, since it slows down start-up and is rarely needed
+        from urllib.parse import quote
+
+        paths = set(changes.added + changes.modified)
+        # Every target that resolved to a removed file ends with its name,
+        # with or without the extension. Standard links may percent-encode
+        # it, either fully or only its spaces.
+        removed_names: Set[str] = set()
+        for path in changes.removed:
+            name = os.path.splitext(path.rsplit("/", 1)[-1])[0]
+            removed_names.update((name, quote(name), name.replace(" ", "%20")))
+        paths.update(git.grep_markdown(root_dir, removed_names))
+        if self.fs.debug:
+            print(
+                f"Changed files: {len(changes.added)} added, "
+                f"{len(changes.removed)} removed, {len(changes.modified)} modified, "
+                f"{len(paths)} to check"
+            )
+
+        findings = FindingQueue()
+        markdown_files = [path for path in index.markdown_files if path in paths]
+        for _ in self._check_files(markdown_files, findings):
+            yield from findings.drain()
+        self._phase_done("read/parse/resolve")
+
+    def diff_revisions(self, base: str, head: str) -> Tuple[CheckResult, CheckResult]:
+        """Compare the findings of two git revisions of the vault.
+
+        The vault is checked at ``base``, then updated to ``head`` like an
+        incremental check: files are compared by blob id, so only the blobs
+        that differ are parsed, and only the references whose resolution
+        may have changed are resolved again. Ignore patterns are those of
+        the checker, whatever the revisions contain.
+
+        Returns:
+            The findings introduced by ``head``, and those it fixes
+        """
+        if self.low_memory:
+            raise RuntimeError("Revisions can't be compared in low-memory mode")
+        self._use_revision(base)
+        old = self.check_directory()
+        self._use_revision(head)
+        new = self.apply_changes(*self.poll_changes())
+        self.save_cache()
+        return new.diff(old)
+
+    def _use_revision(self, rev: str) -> None:
+        """Read the vault from another git revision from now on."""
+        self.rev = rev
+        self.fs.storage = open_storage(self.fs.root_dir, rev)
+
+    def save_cache(self) -> None:
+        """Write new parse cache entries to disk."""
+        if self.cache is not None and self._index is not None:
+            self.cache.save(self._index.markdown_files)
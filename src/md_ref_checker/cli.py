@@ -1,15 +1,27 @@
 """Command line interface for the Markdown reference checker."""
 
+import json
 import os
 import sys
-from importlib.metadata import version
-from typing import List
+import time
+from contextlib import nullcontext, redirect_stdout
+from typing import TYPE_CHECKING, Iterator, List, Optional
 
 import click
 
-from .checker import ReferenceChecker
+from .cache import DEFAULT_CACHE_DIR
+from .models import (
+    CheckResult,
+    Finding,
+    InvalidReference,
+    UnidirectionalLink,
+    UnusedImage,
+)
+from .output import WRITERS, FindingWriter, TextWriter, diff_records
 
-__version__ = version("md-ref-checker")
+if TYPE_CHECKING:
+    from .checker import ReferenceChecker
+    from .memory import MemoryTracker
 
 
 def print_error(msg: str, no_color: bool = False) -> None:
@@ -41,15 +53,233 @@ def print_debug(msg: str) -> None:
     click.secho(f"[DEBUG] {msg}", fg="blue")
 
 
-@click.command()
-@click.version_option(__version__, prog_name="md-ref-checker")
+def print_version(ctx: click.Context, param: click.Parameter, value: bool) -> None:
+    """Print the version and exit, looking it up only when asked for."""
+    if not value or ctx.resilient_parsing:
+        return
+    from importlib.metadata import version
+
+    click.echo(f"md-ref-checker, version {version('md-ref-checker')}")
+    ctx.exit()
+
+
+def print_changes(
+    new: CheckResult, fixed: CheckResult, verbosity: int, no_color: bool
+) -> None:
+    """Print the findings that appeared and those that were fixed."""
+    for ref in new.invalid_refs:
+        print_error(
+            f"+ {ref.source_file}:{ref.line_number}:{ref.column}  "
+            f"无效引用 '{ref.target}'",
+            no_color,
+        )
+    for ref in fixed.invalid_refs:
+        print_success(f"- {ref.source_file}  已修复  无效引用 '{ref.target}'", no_color)
+    for image in sorted(new.unused_images):
+        print_warning(f"+ 未被引用的图片: {image}", no_color)
+    for image in sorted(fixed.unused_images):
+        print_success(f"- 图片已被引用: {image}", no_color)
+    if verbosity >= 1:
+        for source, target in new.unidirectional_links:
+            print(f"+ 单向链接: {source} -> {target}")
+        for source, target in fixed.unidirectional_links:
+            print(f"- 单向链接: {source} -> {target}")
+
+
+def run_watch(
+    checker: "ReferenceChecker",
+    interval: float,
+    incremental: bool,
+    verbosity: int,
+    no_color: bool,
+) -> None:
+    """Check the directory, then report new and fixed findings on every change."""
+    from .watch import VaultWatcher, WatchEvent
+
+    watcher = VaultWatcher(checker, interval=interval)
+    result = watcher.start(incremental=incremental)
+    writer = TextWriter(sys.stderr, color=not no_color)
+    for ref in result.invalid_refs:
+        writer.add_invalid_ref(ref)
+    writer.close()
+    print(
+        f"\n监视中: {len(result.invalid_refs)} 个无效引用, "
+        f"{len(result.unused_images)} 个未被引用的图片 (按 Ctrl+C 退出)"
+    )
+
+    def on_change(event: WatchEvent) -> None:
+        changes = event.changes
+        print(
+            f"\n[{time.strftime('%H:%M:%S')}] 检测到变化: "
+            f"{len(changes.added)} 个新增, {len(changes.removed)} 个删除, "
+            f"{len(changes.modified)} 个修改"
+        )
+        print_changes(event.new, event.fixed, verbosity, no_color)
+        print(
+            f"  共 {len(event.result.invalid_refs)} 个无效引用, "
+            f"{len(event.result.unused_images)} 个未被引用的图片"
+        )
+
+    try:
+        watcher.run(on_change)
+    except KeyboardInterrupt:
+        print("\n已停止监视")
+
+
+def run_check(
+    checker: "ReferenceChecker",
+    writer: FindingWriter,
+    directory: str,
+    verbosity: int,
+    no_color: bool,
+    debug: bool,
+    findings: Iterator[Finding],
+    delete_unused_images: bool,
+    profile: bool,
+    memory_report: bool,
+) -> int:
+    """Run a check, writing its findings as they arrive.
+
+    Returns:
+        The number of invalid references
+    """
+    if debug:
+        print_debug("执行目录检查...")
+    machine = not isinstance(writer, TextWriter)
+    tracker: Optional[MemoryTracker] = None
+    if memory_report:
+        from . import memory
+
+        tracker = memory.MemoryTracker()
+        checker.phase_hook = tracker.phase_done
+        tracker.start()
+    start = time.perf_counter()
+    # 发现在检查到时立即输出，只保留之后还要列出或删除的
+    keep_links = not machine and verbosity >= 1
+    result = CheckResult()
+    for finding in findings:
+        if debug and isinstance(finding, InvalidReference):
+            ref = finding.ref
+            print_debug(f"发现无效引用: {ref.target} in {ref.source_file}")
+        finding.send(writer)
+        if isinstance(finding, UnusedImage) or (
+            keep_links and isinstance(finding, UnidirectionalLink)
+        ):
+            finding.send(result)
+    writer.close()
+    error_count = writer.invalid_refs
+    if debug:
+        for line in checker.pipeline_stats.report():
+            print_debug(f"流水线 {line}")
+    if profile:
+        elapsed = time.perf_counter() - start
+        print("\n性能分析:")
+        for line in checker.stats().report():
+            print(f"  {line}")
+        print(f"  total: {elapsed:.3f}s")
+    if tracker is not None:
+        tracker.stop()
+        tracker.measure(checker.structures())
+        print("\n内存报告:")
+        for line in tracker.report():
+            print(f"  {line}")
+
+    if not machine:
+        print_text_summary(checker, result, error_count, verbosity, no_color, debug)
+
+    # 删除未使用的图片（如果指定了-r选项）
+    if delete_unused_images and result.unused_images:
+        if debug:
+            print_debug("开始删除未使用的图片...")
+        print_success("\n删除未使用的图片文件:", no_color)
+        for image in sorted(result.unused_images):
+            try:
+                os.remove(os.path.join(directory, image))
+                print(f"  {image}")
+            except Exception as e:
+                print_error(f"Error deleting {image}: {e}", no_color)
+        print_success(
+            f"\n✓ 已删除 {len(result.unused_images)} 个未引用的图片文件", no_color
+        )
+
+    if not machine and not (
+        error_count or writer.unused_images or writer.unidirectional_links
+    ):
+        if debug:
+            print_debug("检查完成，未发现问题")
+        print_success("\n✓ 所有引用都是有效的", no_color)
+    return error_count
+
+
+def print_text_summary(
+    checker: "ReferenceChecker",
+    result: CheckResult,
+    error_count: int,
+    verbosity: int,
+    no_color: bool,
+    debug: bool,
+) -> None:
+    """Print the totals and the findings that are listed after the check."""
+    # 显示无效引用总数
+    if error_count:
+        print_error(f"\n✖ 发现 {error_count} 个无效引用", no_color)
+
+    # 显示未被引用的图片
+    if result.unused_images:
+        if error_count:
+            print()  # 添加空行分隔
+        if debug:
+            print_debug(f"发现 {len(result.unused_images)} 个未使用的图片")
+        print_warning("未被引用的图片文件:", no_color)
+        for image in sorted(result.unused_images):
+            print(f"  {image}")
+        print_warning(
+            f"\n⚠ 发现 {len(result.unused_images)} 个未被引用的图片文件", no_color
+        )
+
+    # 显示单向链接（如果verbosity >= 1）
+    if verbosity >= 1 and result.unidirectional_links:
+        if debug:
+            print_debug(f"发现 {len(result.unidirectional_links)} 个单向链接")
+        print("\n单向链接:")
+        for source, target in result.unidirectional_links:
+            print(f"  {source} -> {target}")
+
+    # 显示引用统计（如果verbosity >= 2）
+    if verbosity >= 2:
+        if debug:
+            print_debug("生成引用统计...")
+        print("\n引用统计:")
+        for file, stats in sorted(checker.file_refs.items()):
+            outgoing_count = len(stats)
+            incoming_count = checker.graph.incoming_count(file)
+            if incoming_count > 0 or outgoing_count > 0:
+                print(f"\n  {file}:")
+                print(f"  - 被引用次数: {incoming_count}")
+                print(f"  - 引用其他文件数: {outgoing_count}")
+                if outgoing_count > 0:
+                    print("  - 引用其他文件:")
+                    for ref in sorted(stats, key=lambda r: r.target):
+                        if not ref.is_embed:
+                            print(f"    * {ref.target}")
+
+
+@click.group(invoke_without_command=True)
+@click.option(
+    "--version",
+    is_flag=True,
+    expose_value=False,
+    is_eager=True,
+    callback=print_version,
+    help="Show the version and exit.",
+)
 @click.option(
     "-d",
     "--dir",
     "directory",
-    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    type=click.Path(exists=True, file_okay=True, dir_okay=True),
     default=".",
-    help="要检查的目录路径 (默认为当前目录)",
+    help="要检查的目录路径，或 zip、tar（可压缩）压缩包 (默认为当前目录)",
 )
 @click.option(
     "-v", "--verbosity", type=click.IntRange(0, 2), default=0, help="输出详细程度 (0-2)"
@@ -65,7 +295,92 @@ def print_debug(msg: str) -> None:
 @click.option(
     "--strict-image-refs",
     is_flag=True,
-    help="严格图片引用模式（只将 ![[]] 和 ![] 视为图片引用）",
+    help="严格图片引用模式（只将 ![[]]、![] 和 <img> 视为图片引用）",
+)
+@click.option("--no-cache", is_flag=True, help="不使用解析缓存，重新解析所有文件")
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, dir_okay=True),
+    default=None,
+    help=(
+        f"解析缓存目录 (默认为 <目录>/{DEFAULT_CACHE_DIR}，压缩包则在其所在目录；"
+        "使用 --changed-since、--staged、--rev 时默认不使用缓存)"
+    ),
+)
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="增量检查：只重新检查上次运行以来有变化的部分（状态保存在缓存目录中）",
+)
+@click.option("-w", "--watch", is_flag=True, help="监视模式：文件变化时自动重新检查")
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0.1),
+    default=1.0,
+    show_default=True,
+    help="监视模式下检查文件变化的间隔（秒）",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=0),
+    default=1,
+    show_default=True,
+    help="并行解析文件的进程数（0 表示使用所有 CPU；压缩的 tar 包总是单进程解析）",
+)
+@click.option(
+    "--readers",
+    type=click.IntRange(min=0),
+    default=4,
+    show_default=True,
+    help="预读文件的线程数（0 表示不预读）",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="显示各阶段耗时、处理量、缓存命中率和引用解析方式统计",
+)
+@click.option(
+    "--memory-report",
+    is_flag=True,
+    help="用 tracemalloc 跟踪内存，显示各阶段的内存峰值、主要分配位置和内部缓存大小（会显著变慢）",
+)
+@click.option(
+    "--low-memory",
+    is_flag=True,
+    help="低内存模式：检查完一个文件后即丢弃其引用，缓存大小有上限，内存占用不随仓库增大而增长（不能与 --incremental、--watch 同时使用）",
+)
+@click.option(
+    "-f",
+    "--format",
+    "output_format",
+    type=click.Choice(list(WRITERS)),
+    default="text",
+    show_default=True,
+    help="输出格式：text 供人阅读；json、jsonl、sarif 输出所有发现（包括单向链接）到标准输出，其他信息输出到标准错误",
+)
+@click.option(
+    "--max-errors",
+    type=click.IntRange(min=0),
+    default=None,
+    help="最多输出这么多个无效引用，其余只计入总数",
+)
+@click.option(
+    "--changed-since",
+    metavar="REV",
+    default=None,
+    help="只检查自 git 版本 REV 以来有变化的 Markdown 文件，以及可能链接到被删除或重命名文件的笔记",
+)
+@click.option(
+    "--rev",
+    metavar="REV",
+    default=None,
+    help="检查 git 版本 REV 中的文件：直接从仓库对象读取，不需要检出，也不读取工作区",
+)
+@click.option(
+    "--staged",
+    is_flag=True,
+    help="只检查 git 暂存区中有变化的 Markdown 文件（适合 pre-commit），以及可能链接到被删除或重命名文件的笔记",
 )
 def main(
     directory: str,
@@ -75,6 +390,21 @@ def main(
     delete_unused_images: bool,
     debug: bool,
     strict_image_refs: bool,
+    no_cache: bool,
+    cache_dir: Optional[str],
+    incremental: bool,
+    watch: bool,
+    interval: float,
+    jobs: int,
+    readers: int,
+    profile: bool,
+    memory_report: bool,
+    low_memory: bool,
+    output_format: str,
+    max_errors: Optional[int],
+    changed_since: Optional[str],
+    rev: Optional[str],
+    staged: bool,
 ) -> None:
     """Markdown 引用检查工具。
 
@@ -86,6 +416,8 @@ def main(
        - 嵌入引用 ![[文件名]] 或 ![[文件名|显示文本]] - 嵌入并渲染文件内容
        - 标题引用 [[文件名#标题]] 或 [[文件名#标题1#标题2|显示文本]]
        - 标准图片引用 ![图片说明](图片路径)
+       - 标准链接 [显示文本](文件路径) 和 HTML 图片 <img src="图片路径">
+       - 引用式链接 [显示文本][标识]，按文件中的 [标识]: 路径 定义解析
        - 检查单向引用：A引用了B，但B没有引用A
        - 生成引用统计信息
 
@@ -96,16 +428,76 @@ def main(
        - 图片文件统一存放在根目录的 assets/ 文件夹下
 
     注意：对于没有扩展名的引用，默认添加 .md 扩展名。
+
+    不带子命令时检查目录；子命令 diff 比较两个 git 版本的检查结果。
     """
+    ctx = click.get_current_context()
+    if ctx.invoked_subcommand is not None:
+        # 子命令有自己的选项，写在子命令之前的选项不会生效
+        given = [
+            param.get_error_hint(ctx)
+            for param in ctx.command.params
+            if ctx.params.get(param.name) not in (None, False, (), param.default)
+        ]
+        if given:
+            command = ctx.invoked_subcommand
+            raise click.UsageError(
+                f"子命令 {command} 之前的选项不会生效：{', '.join(given)}"
+                f"（{command} 的选项须写在 {command} 之后）"
+            )
+        return
+    if low_memory and (incremental or watch):
+        raise click.UsageError("--low-memory 不能与 --incremental 或 --watch 同时使用")
+    if (changed_since is not None or staged) and (incremental or watch):
+        raise click.UsageError(
+            "--changed-since 和 --staged 不能与 --incremental 或 --watch 同时使用"
+        )
+    if rev is not None and (
+        watch or changed_since is not None or staged or delete_unused_images
+    ):
+        raise click.UsageError(
+            "--rev 不能与 --watch、--changed-since、--staged 或 -r 同时使用"
+        )
+    if rev is not None and incremental and cache_dir is None:
+        raise click.UsageError("--rev 与 --incremental 同时使用时须指定 --cache-dir")
+    if os.path.isfile(directory) and (
+        watch or changed_since is not None or staged or rev is not None
+    ):
+        raise click.UsageError(
+            "检查压缩包时不能使用 --watch、--changed-since、--staged 或 --rev"
+        )
+    if os.path.isfile(directory) and delete_unused_images:
+        raise click.UsageError("不能从压缩包中删除图片 (-r)")
+    if watch and output_format != "text":
+        raise click.UsageError("--watch 只支持 text 输出格式")
+    machine = output_format != "text"
+
     try:
         if debug:
             print_debug("开始检查...")
 
         # 创建检查器
+        # git 相关的检查多在钩子和 CI 中运行，只有指定了 --cache-dir 才使用
+        # 缓存，不在工作区中留下未跟踪的缓存目录
+        git_mode = changed_since is not None or staged or rev is not None
+        if not no_cache and cache_dir is None and not git_mode:
+            # 压缩包的缓存放在其所在目录，同一仓库的不同快照可共用
+            vault_dir = directory
+            if os.path.isfile(directory):
+                vault_dir = os.path.dirname(os.path.abspath(directory))
+            cache_dir = os.path.join(vault_dir, DEFAULT_CACHE_DIR)
+        # 到这里才导入，--help 和用法错误不需要加载检查器、解析器和缓存
+        from .checker import ReferenceChecker
+
         checker = ReferenceChecker(
             directory,
             debug=debug,
             strict_image_refs=strict_image_refs,
+            cache_dir=None if no_cache else cache_dir,
+            jobs=jobs,
+            readers=readers,
+            low_memory=low_memory,
+            rev=rev,
         )
 
         # 添加额外的忽略模式
@@ -114,94 +506,150 @@ def main(
                 print_debug(f"添加忽略模式: {ignore}")
             checker.fs.ignore_patterns.extend(ignore)
 
-        # 执行检查
-        if debug:
-            print_debug("执行目录检查...")
-        result = checker.check_directory()
-
-        # 显示无效引用
-        if result.invalid_refs:
-            error_count = len(result.invalid_refs)
-            for ref in result.invalid_refs:
-                if debug:
-                    print_debug(f"发现无效引用: {ref.target} in {ref.source_file}")
-                print_error(
-                    f"{ref.source_file}:{ref.line_number}:{ref.column}  error  无效引用 '{ref.target}'",
-                    no_color,
-                )
-                print(f"  {ref.line_content}")
-                print_error(f"  {' ' * (ref.column-1)}^", no_color)
-            print_error(f"\n✖ 发现 {error_count} 个无效引用", no_color)
-
-        # 显示未被引用的图片
-        if result.unused_images:
-            if result.invalid_refs:
-                print()  # 添加空行分隔
-            if debug:
-                print_debug(f"发现 {len(result.unused_images)} 个未使用的图片")
-            print_warning("未被引用的图片文件:", no_color)
-            for image in sorted(result.unused_images):
-                print(f"  {image}")
-            print_warning(
-                f"\n⚠ 发现 {len(result.unused_images)} 个未被引用的图片文件", no_color
-            )
-
-        # 显示单向链接（如果verbosity >= 1）
-        if verbosity >= 1 and result.unidirectional_links:
-            if debug:
-                print_debug(f"发现 {len(result.unidirectional_links)} 个单向链接")
-            print("\n单向链接:")
-            for source, target in result.unidirectional_links:
-                print(f"  {source} -> {target}")
+        # 监视模式
+        if watch:
+            run_watch(checker, interval, incremental, verbosity, no_color)
+            return
 
-        # 显示引用统计（如果verbosity >= 2）
-        if verbosity >= 2:
-            if debug:
-                print_debug("生成引用统计...")
-            print("\n引用统计:")
-            for file, stats in sorted(checker.file_refs.items()):
-                outgoing_count = len(stats)
-                incoming_count = sum(
-                    1
-                    for refs in checker.file_refs.values()
-                    for ref in refs
-                    if not ref.is_embed and ref.target == file
-                )
-                if incoming_count > 0 or outgoing_count > 0:
-                    print(f"\n  {file}:")
-                    print(f"  - 被引用次数: {incoming_count}")
-                    print(f"  - 引用其他文件数: {outgoing_count}")
-                    if outgoing_count > 0:
-                        print("  - 引用其他文件:")
-                        for ref in sorted(stats, key=lambda r: r.target):
-                            if not ref.is_embed:
-                                print(f"    * {ref.target}")
-
-        # 删除未使用的图片（如果指定了-r选项）
-        if delete_unused_images and result.unused_images:
-            if debug:
-                print_debug("开始删除未使用的图片...")
-            print_success("\n删除未使用的图片文件:", no_color)
-            for image in sorted(result.unused_images):
-                try:
-                    os.remove(os.path.join(directory, image))
-                    print(f"  {image}")
-                except Exception as e:
-                    print_error(f"Error deleting {image}: {e}", no_color)
-            print_success(
-                f"\n✓ 已删除 {len(result.unused_images)} 个未引用的图片文件", no_color
+        # 执行检查
+        if changed_since is not None or staged:
+            findings = checker.iter_check_changed(changed_since, staged)
+        else:
+            findings = checker.iter_check(incremental=incremental)
+        writer = WRITERS[output_format](
+            sys.stdout if machine else sys.stderr, max_errors, color=not no_color
+        )
+        # 机器可读格式独占标准输出，其他信息都写到标准错误
+        with redirect_stdout(sys.stderr) if machine else nullcontext():
+            error_count = run_check(
+                checker,
+                writer,
+                directory,
+                verbosity,
+                no_color,
+                debug,
+                findings,
+                delete_unused_images,
+                profile,
+                memory_report,
             )
 
         # 如果有错误，返回非零状态码
-        if result.invalid_refs:
+        if error_count:
             if debug:
                 print_debug("检查完成，发现错误")
             sys.exit(1)
-        elif not result.unused_images and not result.unidirectional_links:
-            if debug:
-                print_debug("检查完成，未发现问题")
-            print_success("\n✓ 所有引用都是有效的", no_color)
+    except Exception as e:
+        print_error(f"Error: {e}", no_color)
+        if debug:
+            import traceback
 
+            print_debug("错误详情:")
+            print_debug(traceback.format_exc())
+        sys.exit(1)
+
+
+@main.command("diff")
+@click.argument("base")
+@click.argument("head")
+@click.option(
+    "-d",
+    "--dir",
+    "directory",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+    default=".",
+    help="要检查的目录路径 (默认为当前目录)，须在 git 仓库中",
+)
+@click.option(
+    "-v", "--verbosity", type=click.IntRange(0, 2), default=0, help="输出详细程度 (0-2)"
+)
+@click.option("-n", "--no-color", is_flag=True, help="禁用彩色输出")
+@click.option(
+    "-i", "--ignore", multiple=True, help="添加要忽略的文件模式（可多次使用）"
+)
+@click.option(
+    "--strict-image-refs",
+    is_flag=True,
+    help="严格图片引用模式（只将 ![[]]、![] 和 <img> 视为图片引用）",
+)
+@click.option("--no-cache", is_flag=True, help="不使用解析缓存，重新解析所有文件")
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False, dir_okay=True),
+    default=None,
+    help="解析缓存目录 (默认不使用缓存)",
+)
+@click.option(
+    "-f",
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "json", "jsonl"]),
+    default="text",
+    show_default=True,
+    help="输出格式：json、jsonl 中每个发现带有 change 字段（added 或 removed）",
+)
+@click.option("-D", "--debug", is_flag=True, help="显示调试信息")
+def diff(
+    base: str,
+    head: str,
+    directory: str,
+    verbosity: int,
+    no_color: bool,
+    ignore: List[str],
+    strict_image_refs: bool,
+    no_cache: bool,
+    cache_dir: Optional[str],
+    output_format: str,
+    debug: bool,
+) -> None:
+    """比较两个 git 版本 BASE 和 HEAD 的检查结果。
+
+    显示 HEAD 新增和修复的无效引用、未被引用的图片和单向链接。只解析两个版本间
+    内容不同的文件，不需要检出。HEAD 新增了无效引用时返回非零状态码。
+    """
+    try:
+        from .checker import ReferenceChecker
+
+        # 与 --rev 一样，只有指定了 --cache-dir 才使用缓存
+        checker = ReferenceChecker(
+            directory,
+            debug=debug,
+            strict_image_refs=strict_image_refs,
+            cache_dir=None if no_cache else cache_dir,
+        )
+        checker.fs.ignore_patterns.extend(ignore)
+        added, removed = checker.diff_revisions(base, head)
+
+        if output_format == "text":
+            print_changes(added, removed, verbosity, no_color)
+            print(
+                f"\n{base}..{head}: 新增 {len(added.invalid_refs)} 个、"
+                f"修复 {len(removed.invalid_refs)} 个无效引用, "
+                f"新增 {len(added.unused_images)} 个、"
+                f"减少 {len(removed.unused_images)} 个未被引用的图片"
+            )
+        else:
+            summary = {
+                change: {
+                    "invalid_refs": len(result.invalid_refs),
+                    "unused_images": len(result.unused_images),
+                    "unidirectional_links": len(result.unidirectional_links),
+                }
+                for change, result in (("added", added), ("removed", removed))
+            }
+            records = diff_records(added, removed)
+            if output_format == "jsonl":
+                for record in records:
+                    click.echo(json.dumps(record, ensure_ascii=False))
+                click.echo(json.dumps({"type": "summary", **summary}))
+            else:
+                document = {
+                    "base": base,
+                    "head": head,
+                    "findings": list(records),
+                    "summary": summary,
+                }
+                click.echo(json.dumps(document, ensure_ascii=False, indent=2))
     except Exception as e:
         print_error(f"Error: {e}", no_color)
         if debug:
@@ -211,6 +659,9 @@ def main(
             print_debug(traceback.format_exc())
         sys.exit(1)
 
+    if added.invalid_refs:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,220 @@
+"""Queries of the git repository containing a vault, and reading a vault
+from a git revision.
+
+Every command runs in the vault root, and every path is relative to it, so
+a vault can be any directory of a repository.
+"""
+
+import subprocess
+import threading
+import weakref
+from typing import IO, Iterable, Iterator, List, Optional
+
+from .models import VaultChanges
+from .storage import ListedEntry, ListedStorage
+
+
+def run_git(root_dir: str, *args: str, ok_codes: Iterable[int] = (0,)) -> bytes:
+    """Run a git command in a directory and return its output.
+
+    Raises:
+        RuntimeError: If git is missing or the command fails
+    """
+    try:
+        proc = subprocess.run(
+            ["git", *args], cwd=root_dir, capture_output=True, check=False
+        )
+    except OSError as e:
+        raise RuntimeError(f"Cannot run git: {e}") from e
+    if proc.returncode not in ok_codes:
+        message = proc.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"git {args[0]} failed: {message}")
+    return proc.stdout
+
+
+def _split(output: bytes) -> List[str]:
+    """Split the NUL-separated output of a ``-z`` command."""
+    return [item for item in output.decode("utf-8").split("\0") if item]
+
+
+def list_files(root_dir: str) -> List[str]:
+    """List the files of the working tree, from the index rather than a walk.
+
+    Tracked files that were deleted from the working tree are left out, and
+    untracked files not ignored by git are included.
+    """
+    listed = _split(
+        run_git(
+            root_dir, "ls-files", "-z", "--cached", "--others", "--exclude-standard"
+        )
+    )
+    deleted = set(_split(run_git(root_dir, "ls-files", "-z", "--deleted")))
+    return [path for path in listed if path not in deleted] if deleted else listed
+
+
+def changed_files(
+    root_dir: str, rev: Optional[str] = None, staged: bool = False
+) -> VaultChanges:
+    """Find the files changed since a revision, or staged for commit.
+
+    Renamed files count as removed under their old path and added under
+    their new one.
+
+    Args:
+        root_dir: Directory of the vault, inside a git working tree
+        rev: Compare the working tree, including untracked files, with this
+             revision
+        staged: Compare the index with ``rev``, or with HEAD if no revision
+                is given
+    """
+    args = ["diff", "--name-status", "-z", "-M", "--relative"]
+    if staged:
+        args.append("--cached")
+    if rev is not None:
+        args.append(rev)
+    fields = _split(run_git(root_dir, *args, "--"))
+
+    changes = VaultChanges()
+    i = 0
+    while i < len(fields):
+        status = fields[i][0]
+        if status in "RC":
+            old, new = fields[i + 1], fields[i + 2]
+            if status == "R":
+                changes.removed.append(old)
+            changes.added.append(new)
+            i += 3
+            continue
+        path = fields[i + 1]
+        if status == "D":
+            changes.removed.append(path)
+        elif status == "A":
+            changes.added.append(path)
+        else:
+            changes.modified.append(path)
+        i += 2
+    if not staged:
+        changes.added.extend(
+            _split(
+                run_git(root_dir, "ls-files", "-z", "--others", "--exclude-standard")
+            )
+        )
+    return changes
+
+
+def grep_markdown(root_dir: str, words: Iterable[str]) -> List[str]:
+    """List the Markdown files that contain any of the given words.
+
+    Tracked and untracked files of the working tree are searched.
+    """
+    args = ["grep", "-l", "-z", "-F", "--untracked"]
+    for word in words:
+        args.extend(["-e", word])
+    if "-e" not in args:
+        return []
+    # Exit code 1 means that nothing matched
+    return _split(run_git(root_dir, *args, "--", ":(icase)*.md", ok_codes=(0, 1)))
+
+
+class TreeEntry(ListedEntry):
+    """Entry of a git tree.
+
+    The blob id stands in for the modification time, so the parse cache
+    recognizes unchanged contents across revisions.
+    """
+
+    __slots__ = ("oid",)
+
+    def __init__(self, path: str, kind: str, oid: str, size: int) -> None:
+        """Initialize from a line of ``git ls-tree``."""
+        super().__init__(path, kind, size, int(oid[:15], 16))
+        self.oid = oid
+
+
+class GitStorage(ListedStorage):
+    """Files of a git revision, read from the object database.
+
+    The tree is listed once with ``git ls-tree``, and file contents are
+    streamed through a single ``git cat-file --batch`` process, so no
+    working tree is needed. Reads are serialized, so the storage can be
+    shared by reader threads.
+    """
+
+    def __init__(self, root_dir: str, rev: str) -> None:
+        """Initialize with the vault root, inside a git repository, and a revision.
+
+        Raises:
+            RuntimeError: If the revision is not a commit of the repository
+        """
+        self.root_dir = root_dir
+        # Resolve the revision once, so that all reads see the same commit
+        self.commit = (
+            run_git(root_dir, "rev-parse", "--verify", f"{rev}^{{commit}}")
+            .decode()
+            .strip()
+        )
+        super().__init__(self.commit)
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen[bytes]] = None
+
+    def _list(self) -> Iterator[TreeEntry]:
+        """List the tree of the revision."""
+        output = run_git(self.root_dir, "ls-tree", "-r", "-t", "-l", "-z", self.commit)
+        for item in output.decode("utf-8").split("\0"):
+            if not item:
+                continue
+            # "<mode> <type> <oid> <size>\t<path>", with size "-" for trees
+            meta, path = item.split("\t", 1)
+            mode, kind, oid, size = meta.split()
+            # Skip submodules, and the trees containing the vault, which are
+            # listed as "./" and "../" when it is a subdirectory
+            if kind == "commit" or path.endswith("/"):
+                continue
+            if kind == "tree":
+                kind = "dir"
+            else:
+                kind = "symlink" if mode == "120000" else "file"
+            yield TreeEntry(path, kind, oid, 0 if size == "-" else int(size))
+
+    def _read_entry(self, entry: ListedEntry) -> bytes:
+        """Read a blob of the revision."""
+        assert isinstance(entry, TreeEntry)
+        return self.read_blob(entry.oid)
+
+    def read_blob(self, oid: str) -> bytes:
+        """Read an object's contents through the ``cat-file`` process."""
+        with self._lock:
+            if self._process is None:
+                self._process = subprocess.Popen(
+                    ["git", "cat-file", "--batch"],
+                    cwd=self.root_dir,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                )
+                weakref.finalize(self, _stop_process, self._process)
+            stdin, stdout = self._process.stdin, self._process.stdout
+            assert stdin is not None and stdout is not None
+            stdin.write(f"{oid}\n".encode())
+            stdin.flush()
+            # "<oid> <type> <size>", or "<oid> missing"
+            header = stdout.readline().split()
+            if len(header) != 3:
+                raise OSError(f"Cannot read git object {oid}")
+            data = _read_exactly(stdout, int(header[2]))
+            stdout.read(1)  # Newline after the contents
+            return data
+
+
+def _read_exactly(stream: IO[bytes], size: int) -> bytes:
+    """Read exactly ``size`` bytes from a pipe."""
+    data = stream.read(size)
+    if len(data) != size:
+        raise OSError("git cat-file exited early")
+    return data
+
+
+def _stop_process(process: "subprocess.Popen[bytes]") -> None:
+    """Let a ``cat-file`` process finish by closing its input."""
+    if process.stdin is not None:
+        process.stdin.close()
+    process.wait()
@@ -0,0 +1,208 @@
+"""Link graph of a vault."""
+
+import os
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class LinkGraph:
+    """Links between the files of a vault, kept in both directions.
+
+    Paths are interned to integer ids when first seen, so the adjacency
+    sets hold small ints and each path's derived properties (whether it is
+    a note, its path without extension) are computed once rather than per
+    link. Unidirectional links are maintained as links change, so incoming
+    counts, backlinks and unidirectional links are all plain lookups.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty graph."""
+        self._ids: Dict[str, int] = {}
+        self._paths: List[str] = []
+        self._notes: List[bool] = []  # Whether each path is a Markdown note
+        self._stems: List[int] = []  # Id of each path without its extension
+        self._links: Dict[int, Set[int]] = {}
+        self._backlinks: Dict[int, Set[int]] = {}  # Reverse of _links
+        self._unidirectional: Set[Tuple[int, int]] = set()
+
+    def __len__(self) -> int:
+        """Number of interned paths, counting each path without its extension."""
+        return len(self._paths)
+
+    def _id(self, path: str) -> int:
+        """Return the id of a path, interning it if needed."""
+        file_id = self._ids.get(path)
+        if file_id is None:
+            file_id = self._ids[path] = len(self._paths)
+            self._paths.append(path)
+            self._notes.append(path.endswith(".md"))
+            self._stems.append(file_id)
+            stem = os.path.splitext(path)[0]
+            if stem != path:
+                self._stems[file_id] = self._id(stem)
+        return file_id
+
+    def _update_pair(self, source: int, target: int) -> None:
+        """Re-evaluate whether source -> target is a unidirectional link."""
+        if target in self._links.get(source, ()) and self._notes[target]:
+            # Check for back references
+            back = self._links.get(target, ())
+            if source not in back and self._stems[source] not in back:
+                self._unidirectional.add((source, target))
+                return
+        self._unidirectional.discard((source, target))
+
+    def set_links(self, source: str, targets: Iterable[str]) -> None:
+        """Replace the files a file links to."""
+        source_id = self._id(source)
+        new = {self._id(target) for target in targets}
+        old = self._links.get(source_id, set())
+        if new == old:
+            return
+        for target_id in old - new:
+            backlinks = self._backlinks[target_id]
+            backlinks.discard(source_id)
+            if not backlinks:
+                del self._backlinks[target_id]
+        for target_id in new - old:
+            self._backlinks.setdefault(target_id, set()).add(source_id)
+        if new:
+            self._links[source_id] = new
+        else:
+            self._links.pop(source_id, None)
+
+        for target_id in old | new:
+            self._update_pair(source_id, target_id)
+        for other_id in self._backlinks.get(source_id, ()):
+            self._update_pair(other_id, source_id)
+
+    def links(self, path: str) -> List[str]:
+        """Files that a file links to, sorted."""
+        file_id = self._ids.get(path)
+        if file_id is None:
+            return []
+        return sorted(self._paths[i] for i in self._links.get(file_id, ()))
+
+    def backlinks(self, path: str) -> List[str]:
+        """Files that link to a file, sorted."""
+        file_id = self._ids.get(path)
+        if file_id is None:
+            return []
+        return sorted(self._paths[i] for i in self._backlinks.get(file_id, ()))
+
+    def incoming_count(self, path: str) -> int:
+        """Number of files that link to a file."""
+        file_id = self._ids.get(path)
+        if file_id is None:
+            return 0
+        return len(self._backlinks.get(file_id, ()))
+
+    def unidirectional_links(self) -> List[Tuple[str, str]]:
+        """Links whose target note does not link back, sorted."""
+        paths = self._paths
+        return sorted((paths[s], paths[t]) for s, t in self._unidirectional)
+
+
+class CompactLinkGraph:
+    """Links between the files of a vault, stored as flat arrays of ids.
+
+    A memory-bound alternative to ``LinkGraph`` for very large vaults: each
+    link costs a few bytes instead of set entries in both directions. The
+    links of a file can only be set once, and unidirectional links are
+    found in one pass at the end rather than maintained as links change.
+    ``backlinks`` scans every link.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty graph."""
+        self._ids: Dict[str, int] = {}
+        self._paths: List[str] = []
+        self._notes = bytearray()  # Whether each path is a Markdown note
+        self._stems = array("i")  # Id of each path without its extension
+        self._incoming = array("i")  # Number of files linking to each path
+        # The targets of each source are a sorted run of _targets, from
+        # _starts[source] to _ends[source]
+        self._targets = array("i")
+        self._starts = array("q")
+        self._ends = array("q")
+
+    def __len__(self) -> int:
+        """Number of interned paths, counting each path without its extension."""
+        return len(self._paths)
+
+    def _id(self, path: str) -> int:
+        """Return the id of a path, interning it if needed."""
+        file_id = self._ids.get(path)
+        if file_id is None:
+            file_id = self._ids[path] = len(self._paths)
+            self._paths.append(path)
+            self._notes.append(path.endswith(".md"))
+            self._stems.append(file_id)
+            self._incoming.append(0)
+            self._starts.append(0)
+            self._ends.append(0)
+            stem = os.path.splitext(path)[0]
+            if stem != path:
+                self._stems[file_id] = self._id(stem)
+        return file_id
+
+    def set_links(self, source: str, targets: Iterable[str]) -> None:
+        """Set the files a file links to, which must not have been set before."""
+        source_id = self._id(source)
+        if self._ends[source_id] > self._starts[source_id]:
+            raise ValueError(f"Links of {source} are already set")
+        new = sorted({self._id(target) for target in targets})
+        self._starts[source_id] = len(self._targets)
+        self._targets.extend(new)
+        self._ends[source_id] = len(self._targets)
+        for target_id in new:
+            self._incoming[target_id] += 1
+
+    def _has_link(self, source_id: int, target_id: int) -> bool:
+        """Whether one file links to another, by id."""
+        end = self._ends[source_id]
+        pos = bisect_left(self._targets, target_id, self._starts[source_id], end)
+        return pos < end and self._targets[pos] == target_id
+
+    def links(self, path: str) -> List[str]:
+        """Files that a file links to, sorted."""
+        file_id = self._ids.get(path)
+        if file_id is None:
+            return []
+        targets = self._targets[self._starts[file_id] : self._ends[file_id]]
+        return sorted(self._paths[i] for i in targets)
+
+    def backlinks(self, path: str) -> List[str]:
+        """Files that link to a file, sorted."""
+        file_id = self._ids.get(path)
+        if file_id is None:
+            return []
+        return sorted(
+            self._paths[source_id]
+            for source_id in range(len(self._paths))
+            if self._has_link(source_id, file_id)
+        )
+
+    def incoming_count(self, path: str) -> int:
+        """Number of files that link to a file."""
+        file_id = self._ids.get(path)
+        return 0 if file_id is None else self._incoming[file_id]
+
+    def unidirectional_links(self) -> List[Tuple[str, str]]:
+        """Links whose target note does not link back, sorted."""
+        paths, notes, stems = self._paths, self._notes, self._stems
+        targets, has_link = self._targets, self._has_link
+        links = []
+        for source_id in range(len(paths)):
+            stem_id = stems[source_id]
+            for pos in range(self._starts[source_id], self._ends[source_id]):
+                target_id = targets[pos]
+                if (
+                    notes[target_id]
+                    and not has_link(target_id, source_id)
+                    and not has_link(target_id, stem_id)
+                ):
+                    links.append((paths[source_id], paths[target_id]))
+        links.sort()
+        return links
@@ -0,0 +1,197 @@
+"""Memory instrumentation, as reported by ``--memory-report``."""
+
+import sys
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from types import FunctionType, ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+# Objects that are shared with the rest of the program rather than owned by
+# a structure, so their size is never attributed to it
+_OPAQUE_TYPES = (type, ModuleType, FunctionType)
+_ATOMIC_TYPES = (str, bytes, int, float, bool, type(None))
+
+# Allocations made by the instrumentation itself
+_OWN_FILES = (tracemalloc.__file__, __file__)
+
+
+def approximate_size(obj: Any) -> int:
+    """Return the size of an object and everything it refers to, in bytes.
+
+    Containers, instance dicts and slots are followed; each object is
+    counted once. Strings shared with other structures (like interned
+    paths) are counted here too, so sizes of different structures can
+    overlap.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _OPAQUE_TYPES):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, _ATOMIC_TYPES):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+        else:
+            attributes = getattr(item, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in getattr(type(item), "__slots__", ()):
+                value = getattr(item, slot, None)
+                if value is not None:
+                    stack.append(value)
+    return total
+
+
+@dataclass
+class PhaseMemory:
+    """Memory use during one phase of a check.
+
+    Attributes:
+        name: Name of the phase
+        current: Traced memory at the end of the phase, in bytes
+        peak: Highest traced memory during the phase, in bytes
+        growth: Change of traced memory over the phase, in bytes
+        top: The source lines that allocated the most memory during the
+             phase, as (location, bytes) pairs
+    """
+
+    name: str
+    current: int
+    peak: int
+    growth: int
+    top: List[Tuple[str, int]] = field(default_factory=list)
+
+
+@dataclass
+class StructureSize:
+    """Size of one of the checker's internal structures.
+
+    Attributes:
+        name: Name of the structure
+        entries: Number of entries it holds
+        size: Approximate size in bytes, see ``approximate_size``
+    """
+
+    name: str
+    entries: int
+    size: int
+
+
+class MemoryTracker:
+    """Takes tracemalloc snapshots around the phases of a check.
+
+    Pass ``phase_done`` as the checker's ``phase_hook`` and run the check
+    between ``start`` and ``stop``. Tracing slows the check down severalfold,
+    so this is only meant for investigating memory use.
+    """
+
+    def __init__(self, top: int = 5) -> None:
+        """Initialize with the number of allocation sites to keep per phase."""
+        self.top = top
+        self.phases: List[PhaseMemory] = []
+        self.structures: List[StructureSize] = []
+        # Traced memory per source line at the end of the previous phase
+        self._sizes: Optional[Dict[str, int]] = None
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """Start tracing allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self.phases.clear()
+        self._sizes = self._take_snapshot()
+        self._reset_peak()
+
+    def stop(self) -> None:
+        """Stop tracing allocations, if ``start`` started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._sizes = None
+
+    def phase_done(self, name: str) -> None:
+        """Record the memory use of the phase that just ended."""
+        if self._sizes is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        sizes = self._take_snapshot()
+        old_sizes = self._sizes
+        diff = {
+            location: size - old_sizes.get(location, 0)
+            for location, size in sizes.items()
+        }
+        for location, size in old_sizes.items():
+            if location not in sizes:
+                diff[location] = -size
+        top = sorted(diff.items(), key=lambda item: item[1], reverse=True)
+        self.phases.append(
+            PhaseMemory(
+                name,
+                current,
+                peak,
+                sum(diff.values()),
+                [(location, size) for location, size in top[: self.top] if size > 0],
+            )
+        )
+        self._sizes = sizes
+        self._reset_peak()
+
+    def measure(self, structures: Dict[str, Tuple[int, Any]]) -> None:
+        """Record the entry count and size of each of the given structures."""
+        self.structures = [
+            StructureSize(name, entries, approximate_size(obj))
+            for name, (entries, obj) in structures.items()
+        ]
+
+    @property
+    def peak(self) -> int:
+        """Highest traced memory over all phases, in bytes."""
+        return max((phase.peak for phase in self.phases), default=0)
+
+    def report(self) -> List[str]:
+        """Describe the memory use, one line per item."""
+        lines = [f"peak: {self.peak / 1e6:.1f} MB"]
+        for phase in self.phases:
+            lines.append(
+                f"phase {phase.name}: peak {phase.peak / 1e6:.1f} MB, "
+                f"{phase.growth / 1e6:+.1f} MB, now {phase.current / 1e6:.1f} MB"
+            )
+            for location, size in phase.top:
+                lines.append(f"    {size / 1e6:+.1f} MB {location}")
+        for structure in self.structures:
+            lines.append(
+                f"structure {structure.name}: {structure.entries} entries, "
+                f"~{structure.size / 1e6:.1f} MB"
+            )
+        return lines
+
+    @staticmethod
+    def _take_snapshot() -> Dict[str, int]:
+        """Take a snapshot and return the traced memory per source line.
+
+        Only the totals are kept, since a snapshot takes about as much
+        memory as the allocations it describes. Lines of tracemalloc and of
+        this module are left out.
+        """
+        return {
+            str(stat.traceback[0]): stat.size
+            for stat in tracemalloc.take_snapshot().statistics("lineno")
+            if stat.traceback[0].filename not in _OWN_FILES
+        }
+
+    @staticmethod
+    def _reset_peak() -> None:
+        """Start measuring a new peak, where Python supports it (3.9+)."""
+        reset_peak = getattr(tracemalloc, "reset_peak", None)
+        if reset_peak is not None:
+            reset_peak()
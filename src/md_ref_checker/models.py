@@ -1,58 +1,117 @@
 """Data models for the Markdown reference checker."""
 
+import os
+import sys
+from collections import Counter, deque
 from dataclasses import dataclass, field
-from typing import List, Set, Tuple
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+# Compact form of a Reference without its source file:
+# (target, line_number, column, offset, is_embed)
+ReferenceRecord = Tuple[str, int, int, int, bool]
 
 
-@dataclass(frozen=True)
 class Reference:
     """Represents a reference in a Markdown file.
 
+    References are kept for every file of the vault for the whole run, so
+    they are slotted, share interned path strings, and don't hold the text
+    of their line: ``line_content`` is only filled in for references that
+    are reported (see ``ReferenceChecker``).
+
     Attributes:
         source_file: The file containing the reference
         target: The referenced file or resource
         line_number: Line number where the reference appears
         column: Column number where the reference starts
-        line_content: The full line content containing the reference
+        line_content: The full line content containing the reference, or None
+                     if it has not been loaded
         is_embed: Whether this is an embed reference (![[...]]) that embeds the target's
                 content into the current document, rather than just a link reference ([[...]])
                 that creates a clickable link
+        offset: Offset of the reference in the file's content, or -1 if unknown
     """
 
-    source_file: str
-    target: str
-    line_number: int
-    column: int
-    line_content: str
-    is_embed: bool
+    __slots__ = (
+        "source_file",
+        "target",
+        "line_number",
+        "column",
+        "line_content",
+        "is_embed",
+        "offset",
+    )
+
+    def __init__(
+        self,
+        source_file: str,
+        target: str,
+        line_number: int,
+        column: int,
+        line_content: Optional[str] = None,
+        is_embed: bool = False,
+        offset: int = -1,
+    ) -> None:
+        """Initialize a reference."""
+        self.source_file = sys.intern(source_file)
+        self.target = sys.intern(target)
+        self.line_number = line_number
+        self.column = column
+        self.line_content = line_content
+        self.is_embed = is_embed
+        self.offset = offset
 
     def __str__(self) -> str:
         """Return a string representation of the reference."""
         return f"{self.source_file}:{self.line_number}:{self.column} -> {self.target}"
 
+    def __repr__(self) -> str:
+        return (
+            f"Reference(source_file={self.source_file!r}, target={self.target!r}, "
+            f"line_number={self.line_number}, column={self.column}, "
+            f"is_embed={self.is_embed})"
+        )
+
+    def to_record(self) -> ReferenceRecord:
+        """Return the compact form of the reference, e.g. for pickling."""
+        return (self.target, self.line_number, self.column, self.offset, self.is_embed)
+
+    @classmethod
+    def from_record(cls, source_file: str, record: ReferenceRecord) -> "Reference":
+        """Rebuild a reference from its compact form."""
+        target, line_number, column, offset, is_embed = record
+        return cls(source_file, target, line_number, column, None, is_embed, offset)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Pickle without the line text, like the parse cache does
+        return (
+            Reference,
+            (
+                self.source_file,
+                self.target,
+                self.line_number,
+                self.column,
+                None,
+                self.is_embed,
+                self.offset,
+            ),
+        )
+
     def __eq__(self, other: object) -> bool:
+        # A reference is identified by where it is; the line text is only a
+        # display aid and may not be loaded
         if not isinstance(other, Reference):
             return NotImplemented
         return (
             self.source_file == other.source_file
-            and self.target == other.target
             and self.line_number == other.line_number
             and self.column == other.column
-            and self.line_content == other.line_content
+            and self.target == other.target
             and self.is_embed == other.is_embed
         )
 
     def __hash__(self) -> int:
-        return hash(
-            (
-                self.source_file,
-                self.target,
-                self.line_number,
-                self.column,
-                self.line_content,
-                self.is_embed,
-            )
-        )
+        return hash((self.source_file, self.line_number, self.column))
 
 
 @dataclass
@@ -72,7 +131,160 @@ class FileStats:
 
 
 @dataclass
-class CheckResult:
+class VaultIndex:
+    """Listing of every non-ignored file under a vault root.
+
+    Built by a single walk of the directory tree, so that listing, existence
+    and basename lookups never have to touch the file system again.
+
+    Attributes:
+        markdown_files: Markdown files in walk order
+        attachments: All other files in walk order
+        basenames: Map of file name without extension to the matching paths
+        paths: Set of all indexed paths, for existence checks
+        stats: (mtime_ns, size) of each markdown file, taken during the walk
+    """
+
+    markdown_files: List[str] = field(default_factory=list)
+    attachments: List[str] = field(default_factory=list)
+    basenames: Dict[str, List[str]] = field(default_factory=dict)
+    paths: Set[str] = field(default_factory=set)
+    stats: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+    def add_file(
+        self,
+        rel_path: str,
+        name: str,
+        is_markdown: bool,
+        stat: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """Add a file to the index."""
+        if is_markdown:
+            self.markdown_files.append(rel_path)
+            if stat is not None:
+                self.stats[rel_path] = stat
+        else:
+            self.attachments.append(rel_path)
+        self.basenames.setdefault(os.path.splitext(name)[0], []).append(rel_path)
+        self.paths.add(rel_path)
+
+    def diff(self, old: "VaultIndex") -> "VaultChanges":
+        """Compare with an older index of the same vault."""
+        changes = VaultChanges()
+        for path in self.markdown_files + self.attachments:
+            if path not in old.paths:
+                changes.added.append(path)
+        for path in old.markdown_files + old.attachments:
+            if path not in self.paths:
+                changes.removed.append(path)
+        for path in self.markdown_files:
+            stat = old.stats.get(path)
+            if stat is not None and stat != self.stats.get(path):
+                changes.modified.append(path)
+        return changes
+
+
+@dataclass
+class VaultChanges:
+    """Differences between two indexes of a vault.
+
+    Attributes:
+        added: Files that appeared, in walk order
+        removed: Files that disappeared
+        modified: Markdown files whose mtime or size changed
+    """
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        """Whether anything changed."""
+        return bool(self.added or self.removed or self.modified)
+
+
+class ResultSink:
+    """Receiver of the findings of a check.
+
+    ``CheckResult`` collects every finding; other sinks can handle findings
+    as they arrive (print them, count them, write them out) instead of
+    holding them all. The methods of this base class discard them.
+    """
+
+    def add_invalid_ref(self, ref: Reference) -> None:
+        """Add an invalid reference."""
+
+    def add_unused_image(self, image_path: str) -> None:
+        """Add an unused image."""
+
+    def add_unidirectional_link(self, source: str, target: str) -> None:
+        """Add a unidirectional link."""
+
+
+@dataclass(frozen=True)
+class InvalidReference:
+    """Finding: a reference whose target does not exist."""
+
+    ref: Reference
+
+    def send(self, sink: ResultSink) -> None:
+        """Pass the finding on to a sink."""
+        sink.add_invalid_ref(self.ref)
+
+
+@dataclass(frozen=True)
+class UnusedImage:
+    """Finding: an image that no file references."""
+
+    path: str
+
+    def send(self, sink: ResultSink) -> None:
+        """Pass the finding on to a sink."""
+        sink.add_unused_image(self.path)
+
+
+@dataclass(frozen=True)
+class UnidirectionalLink:
+    """Finding: a file links to a note that does not link back."""
+
+    source: str
+    target: str
+
+    def send(self, sink: ResultSink) -> None:
+        """Pass the finding on to a sink."""
+        sink.add_unidirectional_link(self.source, self.target)
+
+
+Finding = Union[InvalidReference, UnusedImage, UnidirectionalLink]
+
+
+class FindingQueue(ResultSink):
+    """Sink that queues findings as typed objects until they are drained."""
+
+    def __init__(self) -> None:
+        """Initialize an empty queue."""
+        self._findings: Deque[Finding] = deque()
+
+    def add_invalid_ref(self, ref: Reference) -> None:
+        """Add an invalid reference."""
+        self._findings.append(InvalidReference(ref))
+
+    def add_unused_image(self, image_path: str) -> None:
+        """Add an unused image."""
+        self._findings.append(UnusedImage(image_path))
+
+    def add_unidirectional_link(self, source: str, target: str) -> None:
+        """Add a unidirectional link."""
+        self._findings.append(UnidirectionalLink(source, target))
+
+    def drain(self) -> Iterator[Finding]:
+        """Remove and yield the queued findings, oldest first."""
+        while self._findings:
+            yield self._findings.popleft()
+
+
+@dataclass
+class CheckResult(ResultSink):
     """Results of checking references in a directory."""
 
     invalid_refs: List[Reference] = field(default_factory=list)
@@ -91,13 +303,67 @@ class CheckResult:
         """Add a unidirectional link."""
         self.unidirectional_links.append((source, target))
 
+    def update(self, other: "CheckResult") -> None:
+        """Add the findings of another CheckResult to this one, in place."""
+        self.invalid_refs.extend(other.invalid_refs)
+        self.unused_images.update(other.unused_images)
+        self.unidirectional_links.extend(other.unidirectional_links)
+
+    def send(self, sink: ResultSink) -> None:
+        """Pass every finding of this result on to a sink."""
+        for ref in self.invalid_refs:
+            sink.add_invalid_ref(ref)
+        for image_path in self.unused_images:
+            sink.add_unused_image(image_path)
+        for source, target in self.unidirectional_links:
+            sink.add_unidirectional_link(source, target)
+
     def merge(self, other: "CheckResult") -> "CheckResult":
-        """Merge another CheckResult into this one."""
+        """Merge another CheckResult into a new one.
+
+        This copies both results; use ``update`` to accumulate many results.
+        """
         result = CheckResult()
-        result.invalid_refs.extend(self.invalid_refs)
-        result.invalid_refs.extend(other.invalid_refs)
-        result.unused_images.update(self.unused_images)
-        result.unused_images.update(other.unused_images)
-        result.unidirectional_links.extend(self.unidirectional_links)
-        result.unidirectional_links.extend(other.unidirectional_links)
+        result.update(self)
+        result.update(other)
         return result
+
+    def diff(self, old: "CheckResult") -> Tuple["CheckResult", "CheckResult"]:
+        """Compare with an older result.
+
+        Returns the findings only present in this result, and those only
+        present in the older one. Invalid references are compared by source
+        file, target and type, so a reference that merely moved to another
+        line is neither new nor fixed.
+        """
+
+        def key(ref: Reference) -> Tuple[str, str, bool]:
+            return (ref.source_file, ref.target, ref.is_embed)
+
+        def only_in(refs: List[Reference], other: List[Reference]) -> List[Reference]:
+            surplus = Counter(map(key, refs))
+            surplus.subtract(map(key, other))
+            kept = []
+            for ref in refs:
+                if surplus[key(ref)] > 0:
+                    surplus[key(ref)] -= 1
+                    kept.append(ref)
+            return kept
+
+        new_links = set(self.unidirectional_links)
+        old_links = set(old.unidirectional_links)
+        added = CheckResult(
+            invalid_refs=only_in(self.invalid_refs, old.invalid_refs),
+            unused_images=self.unused_images - old.unused_images,
+            unidirectional_links=[
+                link for link in self.unidirectional_links if link not in old_links
+            ],
+        )
+        removed = CheckResult(
+            invalid_refs=only_in(old.invalid_refs, self.invalid_refs),
+            unused_images=old.unused_images - self.unused_images,
+            unidirectional_links=[
+                link for link in old.unidirectional_links if link not in new_links
+            ],
+        )
+        return added, removed
@@ -0,0 +1,325 @@
+"""Writers of check findings in the formats of ``--format``."""
+
+import itertools
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+import click
+
+from .models import CheckResult, Reference, ResultSink
+
+# SARIF rules, by finding type: (rule id, level, description)
+_SARIF_RULES = {
+    "invalid_reference": ("invalid-reference", "error", "引用的文件不存在"),
+    "unused_image": ("unused-image", "warning", "图片未被任何文件引用"),
+    "unidirectional_link": ("unidirectional-link", "note", "被链接的笔记没有链接回来"),
+}
+
+
+class FindingWriter(ResultSink):
+    """Sink that writes findings to a stream as they arrive.
+
+    Output is collected in a buffer and written out in large chunks: when
+    the buffer is full, when it has been held for ``FLUSH_INTERVAL``
+    seconds, and at ``close``. Nothing else is kept, so memory doesn't grow
+    with the number of findings. Subclasses define the format.
+
+    Attributes:
+        invalid_refs: Number of invalid references received
+        unused_images: Number of unused images received
+        unidirectional_links: Number of unidirectional links received
+    """
+
+    # Size of the buffer, in characters
+    BUFFER_SIZE = 1 << 16
+
+    # Longest time output is held back, in seconds
+    FLUSH_INTERVAL = 0.1
+
+    def __init__(
+        self, stream: TextIO, max_errors: Optional[int] = None, color: bool = True
+    ) -> None:
+        """Initialize the writer.
+
+        Args:
+            stream: Stream to write to
+            max_errors: Write at most this many invalid references; the rest
+                       are only counted. None (default) writes them all.
+            color: Whether to color the output, if the format and the stream
+                  support it
+        """
+        self.stream = stream
+        self.max_errors = max_errors
+        self.color = color
+        self.invalid_refs = 0
+        self.unused_images = 0
+        self.unidirectional_links = 0
+        self._buffer: List[str] = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self.write_start()
+
+    @property
+    def truncated(self) -> int:
+        """Number of invalid references that were counted but not written."""
+        if self.max_errors is None:
+            return 0
+        return max(0, self.invalid_refs - self.max_errors)
+
+    def summary(self) -> Dict[str, int]:
+        """Counts of the findings received."""
+        return {
+            "invalid_refs": self.invalid_refs,
+            "unused_images": self.unused_images,
+            "unidirectional_links": self.unidirectional_links,
+            "omitted_invalid_refs": self.truncated,
+        }
+
+    def write(self, text: str) -> None:
+        """Add text to the output."""
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if (
+            self._buffered >= self.BUFFER_SIZE
+            or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write out the buffered output."""
+        if self._buffer:
+            # click.echo strips the colors if the stream is not a terminal
+            click.echo("".join(self._buffer), file=self.stream, nl=False)
+            self._buffer.clear()
+            self._buffered = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Finish the output and write it out."""
+        self.write_end()
+        self.flush()
+
+    def add_invalid_ref(self, ref: Reference) -> None:
+        """Add an invalid reference."""
+        self.invalid_refs += 1
+        if self.max_errors is None or self.invalid_refs <= self.max_errors:
+            self.write_invalid_ref(ref)
+
+    def add_unused_image(self, image_path: str) -> None:
+        """Add an unused image."""
+        self.unused_images += 1
+        self.write_unused_image(image_path)
+
+    def add_unidirectional_link(self, source: str, target: str) -> None:
+        """Add a unidirectional link."""
+        self.unidirectional_links += 1
+        self.write_unidirectional_link(source, target)
+
+    def write_start(self) -> None:
+        """Write what comes before the findings."""
+
+    def write_invalid_ref(self, ref: Reference) -> None:
+        """Write an invalid reference."""
+
+    def write_unused_image(self, image_path: str) -> None:
+        """Write an unused image."""
+
+    def write_unidirectional_link(self, source: str, target: str) -> None:
+        """Write a unidirectional link."""
+
+    def write_end(self) -> None:
+        """Write what comes after the findings."""
+
+
+class TextWriter(FindingWriter):
+    """Human readable output of invalid references, with their lines.
+
+    Unused images and unidirectional links are only counted: the command
+    line prints them sorted, after the check.
+    """
+
+    def write_invalid_ref(self, ref: Reference) -> None:
+        """Write an invalid reference with its line and a marker under it."""
+        header = f"{ref.source_file}:{ref.line_number}:{ref.column}  error  无效引用 '{ref.target}'"
+        marker = f"  {' ' * (ref.column - 1)}^"
+        if self.color:
+            header = click.style(header, fg="red")
+            marker = click.style(marker, fg="red")
+        self.write(f"{header}\n  {ref.line_content}\n{marker}\n")
+
+    def write_end(self) -> None:
+        """Say how many invalid references were left out."""
+        if self.truncated:
+            self.write(
+                f"... 另有 {self.truncated} 个无效引用未显示 "
+                f"(--max-errors {self.max_errors})\n"
+            )
+
+
+def _invalid_ref_record(ref: Reference) -> Dict[str, Any]:
+    """JSON form of an invalid reference."""
+    return {
+        "type": "invalid_reference",
+        "file": ref.source_file,
+        "line": ref.line_number,
+        "column": ref.column,
+        "target": ref.target,
+        "embed": ref.is_embed,
+        "text": ref.line_content,
+    }
+
+
+def _unused_image_record(image_path: str) -> Dict[str, Any]:
+    """JSON form of an unused image."""
+    return {"type": "unused_image", "file": image_path}
+
+
+def _unidirectional_link_record(source: str, target: str) -> Dict[str, Any]:
+    """JSON form of a unidirectional link."""
+    return {"type": "unidirectional_link", "source": source, "target": target}
+
+
+def diff_records(added: CheckResult, removed: CheckResult) -> Iterator[Dict[str, Any]]:
+    """JSON form of the findings introduced and fixed by a change.
+
+    Each finding has the fields of the ``jsonl`` format, and a ``change``
+    field: "added" or "removed".
+    """
+    for change, result in (("added", added), ("removed", removed)):
+        records = itertools.chain(
+            map(_invalid_ref_record, result.invalid_refs),
+            map(_unused_image_record, sorted(result.unused_images)),
+            itertools.starmap(_unidirectional_link_record, result.unidirectional_links),
+        )
+        for record in records:
+            yield {"change": change, **record}
+
+
+class JsonLinesWriter(FindingWriter):
+    """One JSON object per line for each finding, then one for the summary."""
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        self.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def write_invalid_ref(self, ref: Reference) -> None:
+        """Write an invalid reference."""
+        self._write_record(_invalid_ref_record(ref))
+
+    def write_unused_image(self, image_path: str) -> None:
+        """Write an unused image."""
+        self._write_record(_unused_image_record(image_path))
+
+    def write_unidirectional_link(self, source: str, target: str) -> None:
+        """Write a unidirectional link."""
+        self._write_record(_unidirectional_link_record(source, target))
+
+    def write_end(self) -> None:
+        """Write the summary."""
+        self._write_record({"type": "summary", **self.summary()})
+
+
+class JsonWriter(JsonLinesWriter):
+    """A single JSON document: ``{"findings": [...], "summary": {...}}``.
+
+    The findings are the objects of the ``jsonl`` format.
+    """
+
+    def write_start(self) -> None:
+        """Open the list of findings."""
+        self._first = True
+        self.write('{"findings": [')
+
+    def _write_record(self, record: Dict[str, Any]) -> None:
+        self.write(
+            ("\n" if self._first else ",\n") + json.dumps(record, ensure_ascii=False)
+        )
+        self._first = False
+
+    def write_end(self) -> None:
+        """Close the list of findings and write the summary."""
+        self.write(f'\n], "summary": {json.dumps(self.summary())}}}\n')
+
+
+class SarifWriter(FindingWriter):
+    """SARIF 2.1.0 log, for code scanning tools."""
+
+    def write_start(self) -> None:
+        """Write the log up to the list of results."""
+        self._first = True
+        driver = {
+            "name": "md-ref-checker",
+            "informationUri": "https://github.com/chess99/md-ref-checker",
+            "rules": [
+                {
+                    "id": rule_id,
+                    "shortDescription": {"text": description},
+                    "defaultConfiguration": {"level": level},
+                }
+                for rule_id, level, description in _SARIF_RULES.values()
+            ],
+        }
+        header = json.dumps(
+            {
+                "version": "2.1.0",
+                "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            },
+            ensure_ascii=False,
+        )
+        tool = json.dumps({"driver": driver}, ensure_ascii=False)
+        self.write(f'{header[:-1]}, "runs": [{{"tool": {tool}, "results": [')
+
+    def _write_result(
+        self,
+        finding_type: str,
+        message: str,
+        uri: str,
+        region: Optional[Dict[str, int]] = None,
+    ) -> None:
+        rule_id, level, _ = _SARIF_RULES[finding_type]
+        location: Dict[str, Any] = {"artifactLocation": {"uri": uri}}
+        if region is not None:
+            location["region"] = region
+        result = {
+            "ruleId": rule_id,
+            "level": level,
+            "message": {"text": message},
+            "locations": [{"physicalLocation": location}],
+        }
+        self.write(
+            ("\n" if self._first else ",\n") + json.dumps(result, ensure_ascii=False)
+        )
+        self._first = False
+
+    def write_invalid_ref(self, ref: Reference) -> None:
+        """Write an invalid reference."""
+        self._write_result(
+            "invalid_reference",
+            f"无效引用 '{ref.target}'",
+            ref.source_file,
+            {"startLine": ref.line_number, "startColumn": ref.column},
+        )
+
+    def write_unused_image(self, image_path: str) -> None:
+        """Write an unused image."""
+        self._write_result("unused_image", "未被引用的图片", image_path)
+
+    def write_unidirectional_link(self, source: str, target: str) -> None:
+        """Write a unidirectional link."""
+        self._write_result(
+            "unidirectional_link", f"单向链接: {source} -> {target}", source
+        )
+
+    def write_end(self) -> None:
+        """Close the results, with the summary as a property of the run."""
+        summary = json.dumps({"summary": self.summary()})
+        self.write(f'\n], "properties": {summary}}}]}}\n')
+
+
+# Writer of each output format
+WRITERS = {
+    "text": TextWriter,
+    "json": JsonWriter,
+    "jsonl": JsonLinesWriter,
+    "sarif": SarifWriter,
+}
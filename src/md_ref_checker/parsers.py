@@ -1,81 +1,360 @@
 """Markdown parser implementation."""
 
 import re
-from typing import Iterator
+from typing import AbstractSet, Dict, Iterator, List, Optional, Set, Tuple
 
 from .models import Reference
 
+# Definition of a reference-style link: target (None for a URL), line number,
+# column and offset
+_Definition = Tuple[Optional[str], int, int, int]
+# Use of a reference-style link: label key, line number, column, offset, is_embed
+_Usage = Tuple[str, int, int, int, bool]
+
+# Parts of the scan patterns. Link text may hold one level of nested brackets
+_LINK_TEXT = r"[^][`\n]*(?:\[[^][`\n]*\][^][`\n]*)*"
+_DESTINATION = r"[^)`\n]+"
+_IMG_SRC = (
+    r"<(?i:img)(?:[ \t][^>`\n]*?)?[ \t](?i:src)[ \t]*=[ \t]*"
+    r"(?P<src>\"[^\"`\n]+\"|'[^'`\n]+'|[^ \t\"'>`\n]+)"
+)
+
 
 class MarkdownParser:
     """Parser for Markdown files."""
 
-    def __init__(self) -> None:
-        """Initialize the parser."""
-        # Wiki-style references: [[file]] or ![[file]]
-        self.wiki_ref_pattern = re.compile(r"(!?\[\[([^]|]+)(?:\|[^]]+)?\]\])")
-        # Standard Markdown image references: ![alt](file)
-        self.md_img_pattern = re.compile(r"!\[([^]]*)\]\(([^)]+)\)")
+    # Bump whenever the references produced for a given input change, so that
+    # cached parse results from older versions are discarded.
+    VERSION = 6
+
+    # Byte sequences found in every reference. Files containing none of them
+    # have no references, so they don't need to be decoded or scanned. A
+    # reference-style link needs a definition, which contains "]:". Tag names
+    # are case-insensitive, so an img tag is only known to start with "<i" or
+    # "<I".
+    MARKERS = (b"[[", b"](", b"]:", b"<i", b"<I")
+
+    # Everything the scanner stops at, in one alternation. Each branch starts
+    # with one of a few literal characters so the regex engine can skip ahead
+    # quickly. No branch can match a newline, so matches never span lines, and
+    # references can't contain a backtick, so they never swallow the start of
+    # inline code.
+    SCAN_PATTERN = re.compile(
+        # Inline code: up to the closing backtick, or the end of the line
+        r"`[^`\n]*`?"
+        # Wiki-style links: [[file]] or [[file|alias]]
+        r"|\[\[(?P<link>[^]|`\n]+)(?:\|[^]`\n]+)?\]\]"
+        # Wiki-style embeds: ![[file]] or ![[file|alias]], and standard images
+        # ![alt](file), whose alt text may hold one level of nested brackets
+        r"|!(?:\[\[(?P<embed>[^]|`\n]+)(?:\|[^]`\n]+)?\]\]"
+        rf"|\[(?P<alt>{_LINK_TEXT})\]\((?P<image>{_DESTINATION})\))"
+        # Standard links [text](file), reference-style links [text][id], [id][]
+        # and [id], and definitions [id]: file. The "!" of a reference-style
+        # image is checked for outside the regex, since an optional first
+        # character would keep the engine from skipping ahead.
+        rf"|\[(?P<text>{_LINK_TEXT})\]"
+        rf"(?:\((?P<url>{_DESTINATION})\)"
+        r"|\[(?P<label>[^][`\n]*)\]"
+        r"|:[ \t]*(?P<definition><[^>`\n]*>|[^ \t`\n]+))?"
+        # HTML images: <img src="file">
+        rf"|{_IMG_SRC}"
+    )
+
+    # The scanner of files without definitions, where reference-style links
+    # point nowhere. Most brackets in prose are not links, so a bracket must
+    # be followed by a destination to match at all.
+    INLINE_SCAN_PATTERN = re.compile(
+        r"`[^`\n]*`?"
+        r"|\[\[(?P<link>[^]|`\n]+)(?:\|[^]`\n]+)?\]\]"
+        r"|!(?:\[\[(?P<embed>[^]|`\n]+)(?:\|[^]`\n]+)?\]\]"
+        rf"|\[(?P<alt>{_LINK_TEXT})\]\((?P<image>{_DESTINATION})\))"
+        rf"|\[(?P<text>{_LINK_TEXT})\]\((?P<url>{_DESTINATION})\)"
+        rf"|{_IMG_SRC}"
+    )
+
+    # Start of a line that may hold a definition, if it contains "]:" too.
+    # Footnotes are not definitions.
+    DEFINITION_PATTERN = re.compile(r" {0,3}\[(?!\^)")
+
+    # A URL scheme, such as "https:" or "mailto:", or a network path
+    URL_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9+.-]+:|//")
+
+    # Title after a link destination: (file "title") or (file 'title')
+    TITLE_PATTERN = re.compile(r"""[ \t]+(?:"[^"]*"|'[^']*')$""")
 
     def parse_references(self, source_file: str, content: str) -> Iterator[Reference]:
         """Parse references from Markdown content.
 
+        The content is scanned as a single buffer: fenced code blocks are
+        skipped by jumping past their closing fence, inline code spans are
+        matched and skipped, and line numbers are only counted between the
+        references found.
+
+        Reference-style links are resolved through the definitions of the
+        file, which may come after the links, so the references of a file
+        with definitions are collected before being returned. A definition
+        that no link uses is a reference itself, so that its target counts
+        as used and is checked.
+
         Args:
             source_file: The file being parsed
             content: The Markdown content to parse
 
         Returns:
-            Iterator of Reference objects
+            Iterator of Reference objects, in the order they appear
+        """
+        labels = self._defined_labels(content)
+        if not labels:
+            # Without definitions, reference-style links point nowhere
+            return self._scan(source_file, content, None, None, labels)
+        return self._resolve(source_file, content, labels)
+
+    def _resolve(
+        self, source_file: str, content: str, labels: AbstractSet[str]
+    ) -> Iterator[Reference]:
+        """Parse references, resolving reference-style links.
+
+        Args:
+            source_file: The file being parsed
+            content: The Markdown content to parse
+            labels: Keys of the labels the content may define
         """
-        # Track code block state
-        in_code_block = False
-        lines = content.split("\n")
-
-        for line_num, line in enumerate(lines, start=1):
-            # Check for code block markers
-            if line.strip().startswith("```"):
-                in_code_block = not in_code_block
+        definitions: Dict[str, _Definition] = {}
+        usages: List[_Usage] = []
+        refs = list(self._scan(source_file, content, definitions, usages, labels))
+        if not definitions:
+            return iter(refs)
+
+        used = set()
+        for key, line_num, column, offset, is_embed in usages:
+            definition = definitions.get(key)
+            if definition is None:
                 continue
+            used.add(key)
+            if definition[0] is not None:
+                refs.append(
+                    Reference(
+                        source_file,
+                        definition[0],
+                        line_num,
+                        column,
+                        None,
+                        is_embed,
+                        offset,
+                    )
+                )
+        for key, (target, line_num, column, offset) in definitions.items():
+            if key not in used and target is not None:
+                refs.append(
+                    Reference(
+                        source_file, target, line_num, column, None, False, offset
+                    )
+                )
+        refs.sort(key=lambda ref: ref.offset)
+        return iter(refs)
+
+    def _scan(
+        self,
+        source_file: str,
+        content: str,
+        definitions: Optional[Dict[str, _Definition]],
+        usages: Optional[List[_Usage]],
+        labels: AbstractSet[str],
+    ) -> Iterator[Reference]:
+        """Scan the content once for references.
+
+        Args:
+            source_file: The file being parsed
+            content: The Markdown content to parse
+            definitions: Filled with the definitions of reference-style links
+                         by label key, or None to skip them
+            usages: Filled with the reference-style links, or None to skip them
+            labels: Keys of the labels the content may define. Other labels
+                    are brackets that are not links, and are skipped early.
+        """
+        pattern = self.INLINE_SCAN_PATTERN if usages is None else self.SCAN_PATTERN
+        search = pattern.search
+        destination = self._destination
+        label_key = self._label_key
+        pos = 0
+        fence = self._find_fence(content, 0)
+        line_num = 1
+        line_start = 0  # Offset of the first character of line ``line_num``
+        counted = 0  # Offset up to which newlines have been counted
 
-            # Skip code blocks
-            if in_code_block:
+        while True:
+            match = search(content, pos, len(content) if fence < 0 else fence)
+            if match is None:
+                if fence < 0:
+                    return
+                # Skip the fenced block, up to and including its closing line
+                pos = content.find("\n", fence)
+                closing = self._find_fence(content, pos + 1) if pos >= 0 else -1
+                pos = content.find("\n", closing) if closing >= 0 else -1
+                if pos < 0:
+                    return
+                fence = self._find_fence(content, pos + 1)
                 continue
 
-            # Skip inline code
-            parts = line.split("`")
-            clean_line = ""
-            for i, part in enumerate(parts):
-                if i % 2 == 0:  # Outside inline code
-                    clean_line += part
-                else:  # Inside inline code
-                    clean_line += " " * len(part)  # Preserve length
-
-            # Find wiki-style references
-            for match in self.wiki_ref_pattern.finditer(clean_line):
-                full_match, target = match.groups()
-                # Check if it's an embed reference
-                is_embed = full_match.startswith("!")
+            pos = match.end()
+            kind = match.lastgroup
+            if kind is None:
+                # Inline code
+                continue
+            start = match.start()
+            key: Optional[str] = None
+            definition: Optional[str] = None
+            target: Optional[str]
+            if kind == "link":
                 # Remove any heading reference
-                target = target.split("#")[0]
-                yield Reference(
-                    source_file=source_file,
-                    target=target,
-                    line_number=line_num,
-                    column=match.start() + 1,
-                    line_content=line,
-                    is_embed=is_embed,
-                )
+                target, is_embed = match[kind].split("#")[0], False
+            elif kind == "embed":
+                target, is_embed = match[kind].split("#")[0], True
+            elif kind == "image":
+                alt = match["alt"]
+                if "[" in alt or "<" in alt:
+                    # Scan the alt text too, like the text of a link
+                    pos = match.start("alt")
+                target, is_embed = destination(match[kind]), True
+            elif kind == "src":
+                # HTML images are always embedded
+                target, is_embed = destination(match[kind].strip("\"'")), True
+            else:
+                text = match["text"]
+                if "[" in text or "<" in text:
+                    # Scan the text too, for an image inside a link
+                    pos = match.start("text")
+                elif kind == "label" and "<" in match[kind]:
+                    pos = match.start(kind)
+                # Reference-style images are always embedded
+                is_embed = start > 0 and content[start - 1] == "!"
+                if is_embed:
+                    start -= 1
+                if kind == "url":
+                    target = destination(match[kind])
+                else:
+                    target = None
+                    if kind == "definition" and not (
+                        is_embed
+                        or text.startswith("^")  # A footnote
+                        or not text.strip()
+                        or not self._starts_line(content, start)
+                    ):
+                        key, definition = label_key(text), match[kind]
+                    else:
+                        if kind == "definition" and pos > match.end("text"):
+                            # Only the brackets are a link, scan what follows
+                            pos = match.end("text") + 1
+                        key = label_key(match["label"] or text)
+                        if key not in labels:
+                            # Brackets that are not a link, like a task
+                            continue
+
+            if target is None and key is None:
+                # An external link, or a link to a heading of the same file
+                continue
 
-            # Find standard Markdown image references
-            for match in self.md_img_pattern.finditer(clean_line):
-                # Skip external URLs
-                target = match.group(2)
-                if target.startswith(("http://", "https://")):
-                    continue
+            newlines = content.count("\n", counted, start)
+            if newlines:
+                line_num += newlines
+                line_start = content.rfind("\n", counted, start) + 1
+            counted = start
+            column = start - line_start + 1
+            if target is not None:
                 yield Reference(
-                    source_file=source_file,
-                    target=target,
-                    line_number=line_num,
-                    column=match.start() + 1,
-                    line_content=line,
-                    is_embed=True,  # Standard Markdown images are always embedded
+                    source_file, target, line_num, column, None, is_embed, start
                 )
+            elif definition is None:
+                assert usages is not None and key is not None
+                usages.append((key, line_num, column, start, is_embed))
+            else:
+                assert definitions is not None and key is not None
+                definitions.setdefault(
+                    key, (destination(definition), line_num, column, start)
+                )
+
+    @classmethod
+    def _destination(cls, destination: str) -> Optional[str]:
+        """Path of a standard link destination.
+
+        Returns:
+            The path without any heading or title and with percent-encoding
+            decoded, or None for a URL or a heading of the same file
+        """
+        # Most destinations are plain paths, which skip every step but one
+        if destination[0] == "<":
+            # A destination with spaces: <my file.md>
+            destination = destination[1:].split(">", 1)[0]
+        elif destination[-1] in "\"'":
+            destination = cls.TITLE_PATTERN.sub("", destination)
+        if (":" in destination or "//" in destination) and cls.URL_PATTERN.match(
+            destination
+        ):
+            return None
+        if "#" in destination:
+            destination = destination.split("#")[0]
+        destination = destination.strip()
+        if "%" in destination:
+            # Imported here, since it slows down start-up and is rarely needed
+            from urllib.parse import unquote
+
+            destination = unquote(destination)
+        return destination or None
+
+    @classmethod
+    def _defined_labels(cls, content: str) -> Set[str]:
+        """Find the keys of the labels the content may define.
+
+        Only the lines containing "]:" are looked at, which are few. Every
+        label in front of a "]:" on a line that starts like a definition is
+        included, so the definitions found by the scan are a subset.
+        """
+        labels = set()
+        pos = content.find("]:")
+        while pos >= 0:
+            line_start = content.rfind("\n", 0, pos) + 1
+            match = cls.DEFINITION_PATTERN.match(content, line_start, pos)
+            if match:
+                labels.add(cls._label_key(content[match.end() : pos]))
+            pos = content.find("]:", pos + 2)
+        return labels
+
+    @staticmethod
+    def _label_key(label: str) -> str:
+        """Normalize a link label: labels match case- and space-insensitively."""
+        return " ".join(label.split()).casefold()
+
+    @staticmethod
+    def _starts_line(content: str, offset: int) -> bool:
+        """Check if only up to three spaces come before an offset on its line."""
+        line_start = content.rfind("\n", 0, offset) + 1
+        return offset - line_start <= 3 and not content[line_start:offset].strip(" ")
+
+    @staticmethod
+    def line_at(content: str, offset: int) -> str:
+        """Return the line of the content containing the given offset."""
+        line_start = content.rfind("\n", 0, offset) + 1
+        line_end = content.find("\n", offset)
+        return content[line_start : line_end if line_end >= 0 else None]
+
+    @staticmethod
+    def _find_fence(content: str, pos: int) -> int:
+        """Find the next line opening or closing a fenced code block.
+
+        Args:
+            content: The Markdown content
+            pos: Offset of the line to start searching from
+
+        Returns:
+            Offset of the start of the fence line, or -1 if there is none
+        """
+        while True:
+            marker = content.find("```", pos)
+            if marker < 0:
+                return -1
+            line_start = content.rfind("\n", pos, marker) + 1 or pos
+            if not content[line_start:marker].strip():
+                return line_start
+            pos = content.find("\n", marker) + 1
+            if not pos:
+                return -1
@@ -0,0 +1,127 @@
+"""Staged read/parse/resolve pipeline helpers."""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class StageStats:
+    """Work done by one pipeline stage.
+
+    Attributes:
+        items: Number of items the stage processed
+        seconds: Time the stage spent working on them
+        bytes: Number of bytes processed, where that applies
+    """
+
+    items: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+
+    def add(self, items: int, seconds: float, nbytes: int = 0) -> None:
+        """Record processed items."""
+        self.items += items
+        self.seconds += seconds
+        self.bytes += nbytes
+
+    def throughput(self) -> float:
+        """Items processed per second of stage time."""
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class PipelineStats:
+    """Per-stage statistics of a check.
+
+    Attributes:
+        read: Files read by the reader threads (time summed over threads)
+        parse: Files parsed
+        resolve: References resolved and recorded
+        read_wait: Time the main thread spent waiting for reads to finish
+        walk: Time spent listing the vault
+        image_scan: Time spent finding unused images
+        graph: Time spent finding unidirectional links
+    """
+
+    read: StageStats = field(default_factory=StageStats)
+    parse: StageStats = field(default_factory=StageStats)
+    resolve: StageStats = field(default_factory=StageStats)
+    read_wait: float = 0.0
+    walk: float = 0.0
+    image_scan: float = 0.0
+    graph: float = 0.0
+
+    def bottleneck(self) -> str:
+        """Name of the stage that took the most time."""
+        stages = {"read": self.read, "parse": self.parse, "resolve": self.resolve}
+        return max(stages, key=lambda name: stages[name].seconds)
+
+    def report(self) -> List[str]:
+        """Describe each stage's throughput, one line per stage."""
+        return [
+            f"read: {self.read.items} files, {self.read.bytes / 1e6:.1f} MB "
+            f"in {self.read.seconds:.3f}s ({self.read.throughput():.0f} files/s), "
+            f"waited {self.read_wait:.3f}s",
+            f"parse: {self.parse.items} files in {self.parse.seconds:.3f}s "
+            f"({self.parse.throughput():.0f} files/s)",
+            f"resolve: {self.resolve.items} refs in {self.resolve.seconds:.3f}s "
+            f"({self.resolve.throughput():.0f} refs/s)",
+            f"bottleneck: {self.bottleneck()}",
+        ]
+
+
+def prefetch(
+    func: Callable[[T], R], items: Iterable[T], workers: int, depth: int
+) -> Iterator[Tuple[T, R]]:
+    """Apply ``func`` to items in a thread pool, yielding results in order.
+
+    At most ``depth`` calls are queued or running ahead of the consumer; a
+    new one is only submitted when the consumer takes a result, so a slow
+    consumer holds the producers back instead of letting results pile up.
+    """
+    # Imported here, since concurrent.futures is slow to import and runs
+    # served from the parse cache don't read any file
+    from concurrent.futures import ThreadPoolExecutor
+
+    it = iter(items)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[Tuple[T, Future[R]]] = deque()
+        for item in it:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= depth:
+                break
+        while pending:
+            item, future = pending.popleft()
+            result = future.result()
+            for next_item in it:
+                pending.append((next_item, executor.submit(func, next_item)))
+                break
+            yield item, result
+
+
+def timed(func: Callable[[T], R]) -> Callable[[T], Tuple[R, float]]:
+    """Wrap a function to also return how long each call took."""
+
+    def wrapper(item: T) -> Tuple[R, float]:
+        start = time.perf_counter()
+        result = func(item)
+        return result, time.perf_counter() - start
+
+    return wrapper
@@ -0,0 +1,219 @@
+"""Resolution of reference targets to files of the vault."""
+
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from .models import VaultIndex
+from .utils import IMAGE_EXTENSIONS, IgnoreMatcher, normalize_path
+
+_IMAGE_SUFFIXES = tuple(IMAGE_EXTENSIONS)
+
+# Names of the resolution steps reported by ``Resolver.explain``, in order
+RESOLUTION_STEPS = (
+    "exact",
+    "source-relative",
+    "basename",
+    "assets",
+    "basename search",
+    "unresolved",
+    "ignored",
+)
+
+
+class LRUCache(OrderedDict):
+    """Dict holding at most ``maxsize`` entries, least recently used first out."""
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialize an empty cache."""
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key: Any) -> Any:
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the value of a key, or ``default`` if it isn't cached."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class Resolver:
+    """Resolves reference targets against an index of the vault.
+
+    Built once per index: lookups only consult the index's path set and
+    basename map, never the file system. Only one resolution step depends
+    on the directory of the referencing file, so the other steps are done
+    once per distinct target, and the result once per distinct (source
+    directory, target) pair, however many notes contain it.
+
+    Resolution order for both links ([[...]]) and embeds (![[...]]):
+    1. Try exact path with extension
+    2. Try adding .md extension if no extension (for non-image files)
+    3. Try in assets directory (for image files)
+    4. Try finding any file with the same basename in the same directory
+    5. Try finding any file with the same basename in any directory
+    """
+
+    def __init__(
+        self,
+        index: VaultIndex,
+        ignore_matcher: IgnoreMatcher,
+        cache_size: Optional[int] = None,
+    ) -> None:
+        """Initialize with the index to resolve against and the ignore rules.
+
+        Args:
+            index: The index of the vault
+            ignore_matcher: Matcher of the paths to treat as missing
+            cache_size: Maximum number of entries of each cache, evicting the
+                       least recently used ones. None (default) caches every
+                       target and (directory, target) pair seen.
+        """
+        self.index = index
+        self.ignore_matcher = ignore_matcher
+        self._paths: Set[str] = index.paths
+        self._basenames: Dict[str, List[str]] = index.basenames
+        # Target -> (resolution as written, fallback resolution, may omit .md)
+        self._targets: Dict[str, Tuple[Optional[str], Optional[str], bool]] = (
+            {} if cache_size is None else LRUCache(cache_size)
+        )
+        self._cache: Dict[Tuple[str, str], Optional[str]] = (
+            {} if cache_size is None else LRUCache(cache_size)
+        )
+        # Counters for profiling. Lookups are counted per call of ``resolve``
+        # and per batch of ``resolve_many``, to keep cache hits cheap.
+        self.lookups = 0
+        self.misses = 0
+        self.target_hits = 0
+        self.target_misses = 0
+
+    def resolve(self, source_file: str, target: str) -> Optional[str]:
+        """Resolve a reference target to the path of the file it refers to.
+
+        Returns None if the target does not exist, or lies in an ignored
+        path.
+        """
+        self.lookups += 1
+        return self.resolve_in(os.path.dirname(source_file), target)
+
+    def resolve_many(self, source_file: str, targets: List[str]) -> List[Optional[str]]:
+        """Resolve the targets of several references of the same file."""
+        self.lookups += len(targets)
+        resolve = self.resolve_in
+        source_dir = os.path.dirname(source_file)
+        return [resolve(source_dir, target) for target in targets]
+
+    @property
+    def resolution_cache(self) -> Mapping[Tuple[str, str], Optional[str]]:
+        """Cached resolutions, by (source directory, target)."""
+        return self._cache
+
+    @property
+    def target_cache(self) -> Mapping[str, Tuple[Optional[str], Optional[str], bool]]:
+        """Cached resolution steps that don't depend on the source, by target."""
+        return self._targets
+
+    @property
+    def hits(self) -> int:
+        """Number of lookups answered from the cache."""
+        return self.lookups - self.misses
+
+    def resolve_in(self, source_dir: str, target: str) -> Optional[str]:
+        """Resolve a target referenced from a file in ``source_dir``.
+
+        Unlike ``resolve`` and ``resolve_many``, this does not count the
+        lookup.
+        """
+        key = (source_dir, target)
+        try:
+            return self._cache[key]
+        except KeyError:
+            self.misses += 1
+
+        relative = os.path.normpath(os.path.join(source_dir, target))
+        if self.ignore_matcher.match(normalize_path(relative)):
+            resolved = None
+        else:
+            target_info = self._targets.get(target)
+            if target_info is None:
+                self.target_misses += 1
+                target_info = self._targets[target] = self._resolve_target(target)
+            else:
+                self.target_hits += 1
+            as_written, fallback, try_md = target_info
+            resolved = (
+                as_written
+                # Path relative to source file (normalized)
+                or self._lookup(relative, try_md)
+                or fallback
+            )
+        self._cache[key] = resolved
+        return resolved
+
+    def explain(self, source_dir: str, target: str) -> str:
+        """Return which resolution step resolves a target, for profiling.
+
+        This repeats the resolution without the caches, so it is much slower
+        than ``resolve_in``. The result is one of ``RESOLUTION_STEPS``.
+        """
+        relative = os.path.normpath(os.path.join(source_dir, target))
+        if self.ignore_matcher.match(normalize_path(relative)):
+            return "ignored"
+        try_md = not target.lower().endswith(_IMAGE_SUFFIXES)
+        basename = os.path.basename(target)
+        candidates = [
+            ("exact", target),
+            ("source-relative", relative),
+            ("basename", basename),
+        ]
+        if os.path.splitext(target)[1].lower() in IMAGE_EXTENSIONS:
+            candidates.append(("assets", os.path.join("assets", basename)))
+        for step, path in candidates:
+            resolved = self._lookup(path, try_md)
+            if resolved is not None:
+                path = normalize_path(path)
+                return step if resolved in (path, path + ".md") else "basename search"
+        return "unresolved"
+
+    def _resolve_target(self, target: str) -> Tuple[Optional[str], Optional[str], bool]:
+        """Do the resolution steps that don't depend on the referencing file."""
+        # Only non-image targets may omit the .md extension
+        try_md = not target.lower().endswith(_IMAGE_SUFFIXES)
+        # Original path (keep as is)
+        as_written = self._lookup(target, try_md)
+        # Try in root directory
+        basename = os.path.basename(target)
+        fallback = self._lookup(basename, try_md)
+        # For image files, also try in assets directory
+        if fallback is None and os.path.splitext(target)[1].lower() in IMAGE_EXTENSIONS:
+            fallback = self._lookup(os.path.join("assets", basename), try_md)
+        return as_written, fallback, try_md
+
+    def _lookup(self, path: str, try_md: bool) -> Optional[str]:
+        """Look up one candidate path."""
+        if not path:
+            return None
+        path = normalize_path(path)
+
+        # If path has extension, try it directly
+        if os.path.splitext(path)[1]:
+            return path if path in self._paths else None
+
+        # Try with .md extension first
+        if try_md and path + ".md" in self._paths:
+            return path + ".md"
+
+        # Try finding any file with the same basename (they're sorted)
+        matches = self._basenames.get(os.path.basename(path))
+        return matches[0] if matches else None
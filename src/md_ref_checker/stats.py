@@ -0,0 +1,69 @@
+"""Statistics of a check, as reported by ``--profile``."""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from .pipeline import PipelineStats
+
+
+@dataclass
+class CacheStats:
+    """Hit and miss counts of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+
+    def hit_rate(self) -> float:
+        """Fraction of lookups that were hits."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class CheckStats:
+    """Where the time of a check went, and how well its caches worked.
+
+    Attributes:
+        pipeline: Per-stage statistics of the check
+        files: Number of Markdown files checked
+        refs: Number of references in them
+        caches: Hit and miss counts of each cache, by name
+        resolution_steps: Number of references resolved by each resolution
+                         step, see ``Resolver.explain``
+    """
+
+    pipeline: PipelineStats = field(default_factory=PipelineStats)
+    files: int = 0
+    refs: int = 0
+    caches: Dict[str, CacheStats] = field(default_factory=dict)
+    resolution_steps: Dict[str, int] = field(default_factory=dict)
+
+    def phases(self) -> Dict[str, float]:
+        """Time spent in each phase of the check, in seconds."""
+        pipeline = self.pipeline
+        return {
+            "walk": pipeline.walk,
+            "read": pipeline.read.seconds,
+            "parse": pipeline.parse.seconds,
+            "resolve": pipeline.resolve.seconds,
+            "image-scan": pipeline.image_scan,
+            "graph": pipeline.graph,
+        }
+
+    def report(self) -> List[str]:
+        """Describe the statistics, one line per item."""
+        pipeline = self.pipeline
+        lines = [
+            f"files: {self.files} checked, {pipeline.read.items} read "
+            f"({pipeline.read.bytes / 1e6:.1f} MB), {self.refs} references"
+        ]
+        for phase, seconds in self.phases().items():
+            lines.append(f"phase {phase}: {seconds:.3f}s")
+        for name, cache in self.caches.items():
+            lines.append(
+                f"cache {name}: {cache.hits} hits, {cache.misses} misses "
+                f"({cache.hit_rate():.0%})"
+            )
+        for step, count in self.resolution_steps.items():
+            lines.append(f"resolution step {step}: {count}")
+        return lines
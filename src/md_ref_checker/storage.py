@@ -0,0 +1,216 @@
+"""Storage backends holding the files of a vault.
+
+``FileSystem`` walks, reads and checks files through a backend, so a vault
+can be checked where it is stored: in a directory, in the objects of a git
+revision, or in a zip or tar archive.
+"""
+
+import mmap
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+
+def decode(data: Union[bytes, mmap.mmap], markers: Sequence[bytes] = ()) -> str:
+    """Decode file data as UTF-8, unless it contains none of the markers."""
+    if markers and not any(data.find(marker) >= 0 for marker in markers):
+        return ""
+    text = str(data, "utf-8")
+    if "\r" in text:
+        # Translate newlines the way reading in text mode does
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+class Storage:
+    """Read-only access to the files of a vault.
+
+    Paths are relative to the vault root and use forward slashes. Directory
+    entries are ``os.DirEntry`` objects, or objects with the same methods.
+    """
+
+    # Whether parse worker processes can open the storage again and read
+    # files cheaply. If not, files are parsed in the main process.
+    parallel = True
+
+    def scandir(self, rel_dir: str) -> List[os.DirEntry]:
+        """List the entries of a directory ("" for the root), in any order.
+
+        Raises:
+            OSError: If the directory can't be listed
+        """
+        raise NotImplementedError
+
+    def is_dir(self, rel_path: str) -> bool:
+        """Check if a path is a directory."""
+        raise NotImplementedError
+
+    def exists(self, rel_path: str) -> bool:
+        """Check if a path exists."""
+        raise NotImplementedError
+
+    def read(self, rel_path: str, markers: Sequence[bytes] = ()) -> str:
+        """Read a file's contents, see ``FileSystem.read_file``.
+
+        Raises:
+            OSError: If the file can't be read
+        """
+        raise NotImplementedError
+
+
+class LocalStorage(Storage):
+    """Files of a directory of the local file system."""
+
+    # Files at least this large are memory-mapped instead of read into memory
+    MMAP_THRESHOLD = 1 << 20
+
+    def __init__(self, root_dir: str) -> None:
+        """Initialize with the absolute path of the vault root."""
+        self.root_dir = root_dir
+
+    def _abs_path(self, rel_path: str) -> str:
+        return os.path.join(self.root_dir, rel_path) if rel_path else self.root_dir
+
+    def scandir(self, rel_dir: str) -> List[os.DirEntry]:
+        """List the entries of a directory."""
+        with os.scandir(self._abs_path(rel_dir)) as it:
+            return list(it)
+
+    def is_dir(self, rel_path: str) -> bool:
+        """Check if a path is a directory."""
+        return os.path.isdir(self._abs_path(rel_path))
+
+    def exists(self, rel_path: str) -> bool:
+        """Check if a path exists."""
+        return os.path.exists(self._abs_path(rel_path))
+
+    def read(self, rel_path: str, markers: Sequence[bytes] = ()) -> str:
+        """Read a file's contents, memory-mapping large files."""
+        with open(self._abs_path(rel_path), "rb") as f:
+            if os.fstat(f.fileno()).st_size >= self.MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return decode(data, markers)
+            return decode(f.read(), markers)
+
+
+class ListedEntry:
+    """Entry of a file listing, with the methods of ``os.DirEntry``.
+
+    Its ``stat()`` is the entry itself, holding only ``st_mtime_ns`` and
+    ``st_size``.
+    """
+
+    __slots__ = ("name", "path", "st_size", "st_mtime_ns", "_kind")
+
+    def __init__(self, path: str, kind: str, size: int, mtime_ns: int) -> None:
+        """Initialize with a path, and a kind: "dir", "file" or "symlink"."""
+        self.path = path
+        self.name = path.rsplit("/", 1)[-1]
+        self.st_size = size
+        self.st_mtime_ns = mtime_ns
+        self._kind = kind
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._kind == "dir"
+
+    def is_file(self, follow_symlinks: bool = True) -> bool:
+        return self._kind != "dir"
+
+    def is_symlink(self) -> bool:
+        return self._kind == "symlink"
+
+    def stat(self, follow_symlinks: bool = True) -> "ListedEntry":
+        return self
+
+
+class ListedStorage(Storage):
+    """Files known from a listing of the whole vault, read once on first use.
+
+    Subclasses list the files with ``_list`` and read them with ``_read_entry``.
+    Directories missing from the listing are implied by the paths below them.
+    """
+
+    def __init__(self, location: str) -> None:
+        """Initialize with a description of where the files are, for errors."""
+        self.location = location
+        self._dirs: Optional[Dict[str, List[os.DirEntry]]] = None
+        self._entries: Dict[str, ListedEntry] = {}
+
+    def _list(self) -> Iterable[ListedEntry]:
+        """List every file and directory, in any order."""
+        raise NotImplementedError
+
+    def _read_entry(self, entry: ListedEntry) -> bytes:
+        """Read the contents of a listed file."""
+        raise NotImplementedError
+
+    def _tree(self) -> Dict[str, List[os.DirEntry]]:
+        """Entries of each directory, listed on first use."""
+        if self._dirs is None:
+            self._dirs = {"": []}
+            for entry in self._list():
+                self._add(entry)
+        return self._dirs
+
+    def _add(self, entry: ListedEntry) -> None:
+        """Add an entry, and the directories containing it if they are new."""
+        assert self._dirs is not None
+        parent = entry.path.rsplit("/", 1)[0] if "/" in entry.path else ""
+        if entry.path in self._entries:
+            return
+        if parent not in self._dirs:
+            if parent in self._entries:
+                return  # Below a file, in a malformed listing
+            self._add(ListedEntry(parent, "dir", 0, 0))
+        self._entries[entry.path] = entry
+        if entry.is_dir():
+            self._dirs[entry.path] = []
+        self._dirs[parent].append(entry)  # type: ignore[arg-type]
+
+    def scandir(self, rel_dir: str) -> List[os.DirEntry]:
+        """List the entries of a directory."""
+        entries = self._tree().get(rel_dir)
+        if entries is None:
+            raise FileNotFoundError(f"{rel_dir} is not a directory in {self.location}")
+        return entries
+
+    def is_dir(self, rel_path: str) -> bool:
+        """Check if a path is a directory."""
+        return rel_path.strip("/") in self._tree()
+
+    def exists(self, rel_path: str) -> bool:
+        """Check if a path exists."""
+        self._tree()
+        return rel_path in self._entries
+
+    def read(self, rel_path: str, markers: Sequence[bytes] = ()) -> str:
+        """Read a file's contents."""
+        self._tree()
+        entry = self._entries.get(rel_path)
+        if entry is None or entry.is_dir():
+            raise FileNotFoundError(f"{rel_path} is not a file in {self.location}")
+        return decode(self._read_entry(entry), markers)
+
+
+def open_storage(root_dir: str, rev: Optional[str] = None) -> Storage:
+    """Open the storage of a vault.
+
+    Args:
+        root_dir: Directory of the vault, or path of a zip or tar archive
+                  holding it
+        rev: Read the vault from this git revision of the directory
+
+    Raises:
+        RuntimeError: If the archive or the revision can't be read
+    """
+    # The backends are imported here, since most runs use neither
+    if os.path.isfile(root_dir):
+        if rev is not None:
+            raise RuntimeError("An archive has no git revisions")
+        from .archive import open_archive
+
+        return open_archive(root_dir)
+    if rev is not None:
+        from .git import GitStorage
+
+        return GitStorage(root_dir, rev)
+    return LocalStorage(root_dir)
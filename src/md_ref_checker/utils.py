@@ -3,34 +3,166 @@
 import fnmatch
 import os
 import re
-from typing import Dict, Iterator, List, Tuple, Union
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from .models import VaultIndex
+from .storage import Storage, open_storage
+
+
+class IgnoreMatcher:
+    """Compiled form of a list of ignore patterns.
+
+    Patterns are classified once into four buckets, and the globs of each
+    bucket are merged into a single regex, so matching a path costs a fixed
+    number of lookups however many patterns there are:
+
+    - root-anchored patterns (``/build/``, ``/temp*``) match from the vault root
+    - directory and plain patterns (``draft/``, ``temp.md``) match a path or
+      anything below it
+    - single-segment globs (``*.tmp``) match any one segment of a path
+    - multi-segment globs (``draft/*``) match the whole path
+    """
+
+    def __init__(self, patterns: List[str]) -> None:
+        """Classify and compile the patterns."""
+        self.patterns = list(patterns)
+        self._prefixes: Set[str] = set()
+        root_globs: List[str] = []
+        segment_globs: List[str] = []
+        path_globs: List[str] = []
+
+        for pattern in self.patterns:
+            if not pattern:  # 跳过空模式
+                continue
+            if pattern.startswith("/"):
+                pattern = pattern[1:]
+                if pattern.endswith("/"):
+                    self._prefixes.add(pattern[:-1])
+                else:
+                    root_globs.append(pattern)
+            elif pattern.endswith("/"):
+                self._prefixes.add(pattern[:-1])
+            elif "*" in pattern:
+                if "/" in pattern:
+                    path_globs.append(pattern)
+                else:
+                    segment_globs.append(pattern)
+            else:
+                self._prefixes.add(pattern)
+
+        self._root_regex = self._combine(root_globs)
+        self._segment_regex = self._combine(segment_globs)
+        self._path_regex = self._combine(path_globs)
+        # Whole-path globs ending in "*" also match everything below any
+        # directory that "dir/" matches, which lets the walk prune it.
+        self._subtree_regex = self._combine(
+            [p for p in root_globs + path_globs if p.endswith("*")]
+        )
+        self._single: Dict[str, IgnoreMatcher] = {}
+
+    @staticmethod
+    def _combine(globs: List[str]) -> Optional["re.Pattern[str]"]:
+        """Merge glob patterns into one alternation regex."""
+        if not globs:
+            return None
+        return re.compile("|".join(f"(?:{fnmatch.translate(g)})" for g in globs))
+
+    def match(self, path: str) -> bool:
+        """Check if a normalized path matches any pattern."""
+        if self._prefixes:
+            if path in self._prefixes:
+                return True
+            pos = path.find("/")
+            while pos != -1:
+                if path[:pos] in self._prefixes:
+                    return True
+                pos = path.find("/", pos + 1)
+        if self._root_regex is not None and self._root_regex.match(path):
+            return True
+        if self._path_regex is not None and self._path_regex.match(path):
+            return True
+        if self._segment_regex is not None:
+            segment_match = self._segment_regex.match
+            return any(segment_match(part) for part in path.split("/"))
+        return False
+
+    def match_dir(self, path: str) -> bool:
+        """Check if everything below a normalized directory path is ignored."""
+        if self.match(path):
+            return True
+        return self._subtree_regex is not None and bool(
+            self._subtree_regex.match(path + "/")
+        )
+
+    def explain(self, path: str) -> Optional[str]:
+        """Return the first pattern matching a path, for debug output."""
+        for pattern in self.patterns:
+            if pattern not in self._single:
+                self._single[pattern] = IgnoreMatcher([pattern])
+            if self._single[pattern].match(path):
+                return pattern
+        return None
+
+
+# Extensions of the files treated as images
+IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp"})
+
+
+def normalize_path(path: str) -> str:
+    """Normalize a path to use forward slashes and no leading ./."""
+    # 统一使用正斜杠
+    if "\\" in path:
+        path = path.replace("\\", "/")
+    # 移除开头的 ./
+    if path.startswith("./"):
+        path = path[2:]
+    # 移除多余的斜杠
+    if "//" in path:
+        path = re.sub(r"/+", "/", path)
+    return path
+
+
+def _walk_order(path: str) -> List[Tuple[int, str]]:
+    """Sort key putting paths in the order ``FileSystem.refresh_index`` visits."""
+    # Files of a directory come before its subdirectories, each sorted by name
+    parts = path.split("/")
+    return [(1, part) for part in parts[:-1]] + [(0, parts[-1])]
 
 
 class FileSystem:
-    """File system operations handler."""
+    """File system operations handler.
+
+    Files are listed and read through a storage backend, the vault's
+    directory by default.
+    """
 
-    def __init__(self, root_dir: str, debug: bool = False) -> None:
-        """Initialize with root directory."""
+    def __init__(
+        self, root_dir: str, debug: bool = False, storage: Optional[Storage] = None
+    ) -> None:
+        """Initialize with root directory, and optionally where the files are stored."""
         self.root_dir = os.path.abspath(root_dir)
         self.debug = debug
+        self.storage = storage if storage is not None else open_storage(self.root_dir)
         self.ignore_patterns = self._load_ignore_patterns()
-        self._file_exists_cache: Dict[str, bool] = {}
-        self._dir_listing_cache: Dict[str, List[str]] = {}
-        self._pattern_match_cache: Dict[Tuple[str, str], bool] = {}
-        self._basename_cache: Dict[str, List[str]] = {}
-        self._compiled_patterns: Dict[str, re.Pattern] = (
-            {}
-        )  # Cache for compiled patterns
+        self._index: Optional[VaultIndex] = None
+        self._ignore_matcher: Optional[IgnoreMatcher] = None
+        self._index_matcher: Optional[IgnoreMatcher] = None  # Matcher used by the index
         if self.debug:
             print(f"Loaded ignore patterns: {self.ignore_patterns}")
 
     def _clear_caches(self) -> None:
         """Clear all caches."""
-        self._file_exists_cache.clear()
-        self._dir_listing_cache.clear()
-        self._pattern_match_cache.clear()
-        self._basename_cache.clear()
-        self._compiled_patterns.clear()
+        self._index = None
 
     def _clean_ignore_line(self, line: str) -> str:
         """Clean and validate an ignore pattern line."""
@@ -46,7 +178,7 @@ class FileSystem:
             line = line[2:]
 
         # 确保目录模式以/结尾
-        if not line.endswith("/*") and os.path.isdir(os.path.join(self.root_dir, line)):
+        if not line.endswith("/*") and self.storage.is_dir(line):
             line = line.rstrip("/") + "/"
 
         if self.debug:
@@ -65,35 +197,28 @@ class FileSystem:
             "Thumbs.db",
         ]
 
-        def read_ignore_file(file_path: str) -> None:
+        def read_ignore_file(file_name: str) -> None:
             """Read patterns from an ignore file."""
-            if os.path.exists(file_path):
+            if self.storage.exists(file_name):
                 try:
-                    with open(file_path, encoding="utf-8") as f:
-                        for line in f:
-                            pattern = self._clean_ignore_line(line)
-                            if pattern:
-                                patterns.append(pattern)
+                    for line in self.storage.read(file_name).splitlines():
+                        pattern = self._clean_ignore_line(line)
+                        if pattern:
+                            patterns.append(pattern)
                 except Exception as e:
-                    print(f"Warning: Error reading {os.path.basename(file_path)}: {e}")
+                    print(f"Warning: Error reading {file_name}: {e}")
 
         # 读取 .gitignore
-        read_ignore_file(os.path.join(self.root_dir, ".gitignore"))
+        read_ignore_file(".gitignore")
 
         # 读取 .mdignore
-        read_ignore_file(os.path.join(self.root_dir, ".mdignore"))
+        read_ignore_file(".mdignore")
 
         return patterns
 
     def normalize_path(self, path: str) -> str:
         """Normalize a path to use forward slashes and no leading ./."""
-        # 统一使用正斜杠
-        path = path.replace("\\", "/")
-        # 移除开头的 ./
-        path = re.sub(r"^\./", "", path)
-        # 移除多余的斜杠
-        path = re.sub(r"/+", "/", path)
-        return path
+        return normalize_path(path)
 
     def is_markdown_file(self, path: str) -> bool:
         """Check if a path points to a Markdown file."""
@@ -101,80 +226,15 @@ class FileSystem:
 
     def is_image_file(self, path: str) -> bool:
         """Check if a path points to an image file."""
-        ext = os.path.splitext(path.lower())[1]
-        return ext in {".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp"}
-
-    def _compile_pattern(self, pattern: str) -> re.Pattern:
-        """Convert a glob pattern to a regex pattern."""
-        if pattern in self._compiled_patterns:
-            return self._compiled_patterns[pattern]
-
-        # Convert glob pattern to regex pattern
-        regex = fnmatch.translate(pattern)
-        compiled = re.compile(regex)
-        self._compiled_patterns[pattern] = compiled
-        return compiled
-
-    def _match_pattern(self, path: str, pattern: str) -> bool:
-        """Match a path against a single pattern."""
-        cache_key = (path, pattern)
-        if cache_key in self._pattern_match_cache:
-            return self._pattern_match_cache[cache_key]
-
-        if self.debug:
-            print(f"Matching path '{path}' against pattern '{pattern}'")
-
-        # Handle root-relative patterns
-        if pattern.startswith("/"):
-            pattern = pattern[1:]
-            if pattern.endswith("/"):
-                pattern = pattern[:-1]
-                result = path == pattern or path.startswith(pattern + "/")
-            else:
-                compiled = self._compile_pattern(pattern)
-                result = bool(compiled.match(path))
-            if self.debug:
-                print(f"  Root pattern: {pattern} -> {result}")
-            self._pattern_match_cache[cache_key] = result
-            return result
-
-        # Handle directory patterns
-        if pattern.endswith("/"):
-            pattern = pattern[:-1]
-            result = path == pattern or path.startswith(pattern + "/")
-            if self.debug:
-                print(f"  Directory pattern: {pattern} -> {result}")
-            self._pattern_match_cache[cache_key] = result
-            return result
-
-        # Handle wildcard patterns
-        if "*" in pattern:
-            path_parts = path.split("/")
-            pattern_parts = pattern.split("/")
-
-            if len(pattern_parts) == 1:
-                # Single-level pattern matches any level
-                compiled = self._compile_pattern(pattern)
-                result = any(bool(compiled.match(part)) for part in path_parts)
-                if self.debug:
-                    print(f"  Single-level wildcard: {pattern} -> {result}")
-                self._pattern_match_cache[cache_key] = result
-                return result
-            else:
-                # Multi-level pattern needs exact match
-                compiled = self._compile_pattern(pattern)
-                result = bool(compiled.match(path))
-                if self.debug:
-                    print(f"  Multi-level wildcard: {pattern} -> {result}")
-                self._pattern_match_cache[cache_key] = result
-                return result
+        return os.path.splitext(path.lower())[1] in IMAGE_EXTENSIONS
 
-        # Exact match
-        result = path == pattern or path.startswith(pattern + "/")
-        if self.debug:
-            print(f"  Exact match: {pattern} -> {result}")
-        self._pattern_match_cache[cache_key] = result
-        return result
+    @property
+    def ignore_matcher(self) -> "IgnoreMatcher":
+        """Matcher compiled from the current ignore patterns."""
+        matcher = self._ignore_matcher
+        if matcher is None or matcher.patterns != self.ignore_patterns:
+            matcher = self._ignore_matcher = IgnoreMatcher(self.ignore_patterns)
+        return matcher
 
     def should_ignore(self, path: str) -> bool:
         """Check if a path should be ignored based on ignore patterns."""
@@ -182,100 +242,135 @@ class FileSystem:
         if self.debug:
             print(f"\nChecking if path should be ignored: {path}")
 
-        for pattern in self.ignore_patterns:
-            if not pattern:  # 跳过空模式
-                continue
-
-            if self._match_pattern(path, pattern):
-                if self.debug:
-                    print(f"  Ignoring path due to pattern: {pattern}")
-                return True
+        matcher = self.ignore_matcher
+        if matcher.match(path):
+            if self.debug:
+                print(f"  Ignoring path due to pattern: {matcher.explain(path)}")
+            return True
 
         if self.debug:
             print("  Path not ignored")
         return False
 
-    def file_exists(self, rel_path: str) -> bool:
-        """Check if a file exists."""
-        if rel_path in self._file_exists_cache:
-            return self._file_exists_cache[rel_path]
+    @property
+    def index(self) -> VaultIndex:
+        """The vault index, built on first use or when ignore patterns change."""
+        if self._index is None or self._index_matcher is not self.ignore_matcher:
+            return self.refresh_index()
+        return self._index
 
-        abs_path = os.path.join(self.root_dir, rel_path)
-        result = os.path.isfile(abs_path) and not self.should_ignore(rel_path)
-        self._file_exists_cache[rel_path] = result
-        return result
+    def refresh_index(self) -> VaultIndex:
+        """Walk the vault once and rebuild the index from scratch."""
+        self._clear_caches()
+        index = VaultIndex()
+        matcher = self.ignore_matcher
+
+        # Depth-first walk with sorted entries, files of a directory before
+        # its subdirectories, so the order is the same on every platform.
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            try:
+                entries = sorted(
+                    self.storage.scandir(rel_dir), key=lambda entry: entry.name
+                )
+            except OSError as e:
+                if self.debug:
+                    print(f"Error listing directory {rel_dir or '.'}: {e}")
+                continue
 
-    def _get_dir_listing(self, dir_path: str) -> List[str]:
-        """Get directory listing with caching."""
-        if dir_path in self._dir_listing_cache:
-            return self._dir_listing_cache[dir_path]
+            subdirs = []
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir():
+                    # Like os.walk, don't follow symlinked directories. Ignored
+                    # directories are pruned here instead of being descended
+                    # into and filtered file by file.
+                    if entry.is_symlink():
+                        continue
+                    if matcher.match_dir(rel_path):
+                        if self.debug:
+                            print(f"Pruning ignored directory: {rel_path}")
+                        continue
+                    subdirs.append(rel_path)
+                    continue
+                if not entry.is_file() or matcher.match(rel_path):
+                    continue
+                if not self.is_markdown_file(entry.name):
+                    index.add_file(rel_path, entry.name, False)
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                index.add_file(rel_path, entry.name, True, (st.st_mtime_ns, st.st_size))
+            pending.extend(reversed(subdirs))
 
-        try:
-            files = sorted(os.listdir(dir_path))
-            self._dir_listing_cache[dir_path] = files
-            return files
-        except OSError:
-            self._dir_listing_cache[dir_path] = []
-            return []
+        self._index = index
+        self._index_matcher = matcher
+        if self.debug:
+            print(
+                f"Indexed {len(index.markdown_files)} markdown files and "
+                f"{len(index.attachments)} attachments"
+            )
+        return index
 
-    def find_files(self, pattern: Union[str, Tuple[str, ...]] = "*") -> Iterator[str]:
-        """Find files matching the pattern(s), respecting ignore rules."""
-        patterns = (pattern,) if isinstance(pattern, str) else pattern
+    def index_listing(self, paths: Iterable[str]) -> VaultIndex:
+        """Rebuild the index from a listing of the vault instead of a walk.
+
+        Ignored paths are left out. Nothing is read from the file system, so
+        the index has no file stats and the parse cache is not used with it.
 
-        # Clear caches before starting a new search
+        Args:
+            paths: Paths of the vault's files, relative to the root directory
+        """
         self._clear_caches()
+        index = VaultIndex()
+        matcher = self.ignore_matcher
+        for rel_path in sorted(map(normalize_path, paths), key=_walk_order):
+            if not matcher.match(rel_path):
+                name = rel_path.rsplit("/", 1)[-1]
+                index.add_file(rel_path, name, self.is_markdown_file(name))
+        self._index = index
+        self._index_matcher = matcher
+        if self.debug:
+            print(
+                f"Indexed {len(index.markdown_files)} markdown files and "
+                f"{len(index.attachments)} attachments from a listing"
+            )
+        return index
 
-        for root, _, _ in os.walk(self.root_dir):
-            rel_root = os.path.relpath(root, self.root_dir)
-            if rel_root == ".":
-                rel_root = ""
+    def file_exists(self, rel_path: str) -> bool:
+        """Check if a file exists."""
+        return rel_path in self.index.paths
 
-            # Check if directory should be ignored
-            if self.should_ignore(rel_root):
-                continue
+    def find_files(self, pattern: Union[str, Tuple[str, ...]] = "*") -> Iterator[str]:
+        """Find files matching the pattern(s), respecting ignore rules."""
+        patterns = (pattern,) if isinstance(pattern, str) else pattern
+        index = self.index
 
-            # Use cached directory listing
-            for file in self._get_dir_listing(root):
-                rel_path = os.path.join(rel_root, file)
-                norm_path = self.normalize_path(rel_path)
+        for rel_path in index.markdown_files + index.attachments:
+            file = os.path.basename(rel_path)
+            if any(fnmatch.fnmatch(file, p) for p in patterns):
+                yield rel_path
 
-                # Check if file should be ignored
-                if self.should_ignore(norm_path):
-                    continue
+    def read_file(self, rel_path: str, markers: Sequence[bytes] = ()) -> str:
+        """Read a file's contents.
 
-                # Check if matches pattern
-                if any(fnmatch.fnmatch(file, p) for p in patterns):
-                    yield norm_path
+        Args:
+            rel_path: Path of the file relative to the root directory
+            markers: If given, the file is only decoded if its raw bytes
+                     contain at least one of them; otherwise "" is returned
 
-    def read_file(self, rel_path: str) -> str:
-        """Read a file's contents."""
-        abs_path = os.path.join(self.root_dir, rel_path)
+        Returns:
+            The file's contents, with newlines translated to "\\n"
+        """
         try:
-            with open(abs_path, encoding="utf-8") as f:
-                return f.read()
+            return self.storage.read(rel_path, markers)
         except Exception as e:
             print(f"Error reading file {rel_path}: {e}")
             return ""
 
-    def _build_basename_cache(self) -> None:
-        """Build cache of file basenames to their full paths."""
-        if self._basename_cache:
-            return
-
-        for root, _, _ in os.walk(self.root_dir):
-            rel_root = os.path.relpath(root, self.root_dir)
-            if rel_root == "." or self.should_ignore(rel_root):
-                continue
-
-            for file in self._get_dir_listing(root):
-                basename = os.path.splitext(file)[0]
-                rel_path = os.path.join(rel_root, file)
-                norm_path = self.normalize_path(rel_path)
-
-                if not self.should_ignore(norm_path):
-                    self._basename_cache.setdefault(basename, []).append(norm_path)
-
     def find_by_basename(self, basename: str) -> List[str]:
         """Find all files with a given basename."""
-        self._build_basename_cache()
-        return self._basename_cache.get(basename, [])
+        return self.index.basenames.get(basename, [])
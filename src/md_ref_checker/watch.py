@@ -0,0 +1,74 @@
+"""Watch mode: keep the vault state in memory and re-check on change."""
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .checker import ReferenceChecker
+from .models import CheckResult, VaultChanges
+
+
+@dataclass
+class WatchEvent:
+    """Outcome of re-checking the vault after a change.
+
+    Attributes:
+        changes: The files that changed since the previous check
+        result: The complete result after the change
+        new: Findings introduced by the change
+        fixed: Findings that the change resolved
+    """
+
+    changes: VaultChanges
+    result: CheckResult
+    new: CheckResult
+    fixed: CheckResult
+
+
+class VaultWatcher:
+    """Re-check a vault whenever its files change.
+
+    The checker's index, parsed references and resolutions are built once by
+    ``start``; every poll then re-walks the tree comparing mtimes and sizes,
+    and only re-checks what the changes affect.
+    """
+
+    def __init__(self, checker: ReferenceChecker, interval: float = 1.0) -> None:
+        """Initialize with a checker and the polling interval in seconds."""
+        self.checker = checker
+        self.interval = interval
+        self.result: Optional[CheckResult] = None
+
+    def start(self, incremental: bool = False) -> CheckResult:
+        """Run the initial check of the directory."""
+        self.result = self.checker.check_directory(incremental=incremental)
+        return self.result
+
+    def poll(self) -> Optional[WatchEvent]:
+        """Check the vault for changes once, returning None if nothing changed."""
+        if self.result is None:
+            raise RuntimeError("start() must be called before poll()")
+        index, changes = self.checker.poll_changes()
+        if not changes:
+            return None
+        result = self.checker.apply_changes(index, changes)
+        new, fixed = result.diff(self.result)
+        self.result = result
+        return WatchEvent(changes, result, new, fixed)
+
+    def run(
+        self,
+        on_change: Callable[[WatchEvent], None],
+        max_polls: Optional[int] = None,
+    ) -> None:
+        """Poll until interrupted (or ``max_polls`` times), reporting changes."""
+        polls = 0
+        try:
+            while max_polls is None or polls < max_polls:
+                time.sleep(self.interval)
+                polls += 1
+                event = self.poll()
+                if event is not None:
+                    on_change(event)
+        finally:
+            self.checker.save_cache()
@@ -0,0 +1,40 @@
+"""Fixtures shared by the test modules."""
+
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+
+class GitRepo:
+    """A git repository in the temporary directory of a test."""
+
+    def __init__(self, path: Path) -> None:
+        """Create the repository."""
+        self.path = path
+        self("init", "-q")
+
+    def __call__(self, *args: str) -> str:
+        """Run a git command in the repository and return its output."""
+        return subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+            + list(args),
+            cwd=self.path,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    def commit(self, message: str = "change") -> None:
+        """Commit every change of the working tree."""
+        self("add", "-A")
+        self("commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def git_repo(tmp_path: Path) -> GitRepo:
+    """Create a git repository in the temporary directory, if git is installed."""
+    if shutil.which("git") is None:
+        pytest.skip("needs git")
+    return GitRepo(tmp_path)
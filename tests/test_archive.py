@@ -0,0 +1,105 @@
+"""Test cases for archive module."""
+
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+from md_ref_checker.archive import TarStorage, ZipStorage, open_archive
+from md_ref_checker.checker import ReferenceChecker
+
+FILES = {
+    "vault/a.md": "[[b]] [[missing]]",
+    "vault/sub/b.md": "![[pic.png]]",
+    "vault/pic.png": "",
+    "vault/.mdignore": "drafts/\n",
+    "vault/drafts/c.md": "[[missing]]",
+}
+
+
+def make_zip(path: Path, files: Dict[str, str]) -> None:
+    """Write files to a zip archive, without directory entries."""
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+
+
+def make_tar(path: Path, files: Dict[str, str], compress: bool) -> None:
+    """Write files to a tar archive, with a directory entry and a symlink."""
+    with tarfile.open(path, "w:gz" if compress else "w:") as tf:
+        root = tarfile.TarInfo("vault")
+        root.type = tarfile.DIRTYPE
+        tf.addfile(root)
+        for name, content in files.items():
+            data = content.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+        link = tarfile.TarInfo("vault/link.md")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "a.md"
+        tf.addfile(link)
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar", "tar.gz"])
+def test_archive_storage(tmp_path: Path, kind: str) -> None:
+    """Test listing and reading the files of an archive below its top directory."""
+    path = tmp_path / f"vault.{kind}"
+    if kind == "zip":
+        make_zip(path, FILES)
+    else:
+        make_tar(path, FILES, compress=kind == "tar.gz")
+    storage = open_archive(str(path))
+    assert isinstance(storage, ZipStorage if kind == "zip" else TarStorage)
+    # Workers would decompress a compressed tar again
+    assert storage.parallel == (kind != "tar.gz")
+
+    assert sorted(entry.name for entry in storage.scandir("")) == [
+        ".mdignore",
+        "a.md",
+        "drafts",
+        "pic.png",
+        "sub",
+    ]
+    assert storage.is_dir("sub") and not storage.is_dir("a.md")
+    assert storage.exists("sub/b.md") and not storage.exists("link.md")
+    assert storage.read("a.md") == "[[b]] [[missing]]"
+    assert storage.read("sub/b.md", (b"[[",)) == "![[pic.png]]"
+    assert storage.read("pic.png") == ""
+    with pytest.raises(FileNotFoundError):
+        storage.read("missing.md")
+
+
+def test_archive_root(tmp_path: Path) -> None:
+    """Test keeping the archive root when there are files at the top level."""
+    path = tmp_path / "vault.zip"
+    make_zip(path, {"a.md": "", "notes/b.md": "", "../outside.md": ""})
+    storage = open_archive(str(path))
+    assert sorted(entry.name for entry in storage.scandir("")) == ["a.md", "notes"]
+
+    (tmp_path / "notes.txt").write_text("not an archive")
+    with pytest.raises(RuntimeError, match="not a zip or tar archive"):
+        open_archive(str(tmp_path / "notes.txt"))
+
+
+def test_check_archive(tmp_path: Path) -> None:
+    """Test checking an archive like the directory it holds."""
+    path = tmp_path / "vault.tar.gz"
+    make_tar(path, FILES, compress=True)
+    checker = ReferenceChecker(str(path), cache_dir=str(tmp_path / "cache"), jobs=4)
+    assert checker.jobs == 1
+    result = checker.check_directory()
+
+    assert [(ref.source_file, ref.target) for ref in result.invalid_refs] == [
+        ("a.md", "missing")
+    ]
+    assert not result.unused_images
+    checker.save_cache()
+
+    # Unchanged members are parsed once across snapshots
+    checker = ReferenceChecker(str(path), cache_dir=str(tmp_path / "cache"))
+    checker.check_directory()
+    assert checker.cache is not None and checker.cache.misses == 0
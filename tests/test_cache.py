@@ -0,0 +1,142 @@
+"""Test cases for cache module."""
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator
+
+import pytest
+
+from md_ref_checker.cache import ParseCache
+from md_ref_checker.checker import ReferenceChecker
+from md_ref_checker.models import Reference
+
+if TYPE_CHECKING:
+    from _pytest.monkeypatch import MonkeyPatch
+
+
+@pytest.fixture
+def temp_dir(tmp_path: Path) -> Path:
+    """Create a temporary directory for testing."""
+    return tmp_path
+
+
+def make_ref(target: str) -> Reference:
+    """Create a reference from source.md."""
+    return Reference(
+        source_file="source.md",
+        target=target,
+        line_number=1,
+        column=1,
+        line_content=f"[[{target}]]",
+        is_embed=False,
+    )
+
+
+def test_cache_round_trip(temp_dir: Path) -> None:
+    """Test that stored references are returned while the stat matches."""
+    cache_dir = str(temp_dir / "cache")
+    cache = ParseCache(cache_dir, parser_version=1)
+    cache.put("source.md", (100, 10), [make_ref("目标")])
+    cache.save()
+    cache.close()
+
+    cache = ParseCache(cache_dir, parser_version=1)
+    assert len(cache) == 1
+    assert cache.get("source.md", (100, 10)) == [make_ref("目标")]
+    assert cache.get("source.md", (200, 10)) is None
+    assert cache.get("other.md", (100, 10)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_parser_version(temp_dir: Path) -> None:
+    """Test that entries from another parser version are discarded."""
+    cache_dir = str(temp_dir / "cache")
+    cache = ParseCache(cache_dir, parser_version=1)
+    cache.put("source.md", (100, 10), [make_ref("doc")])
+    cache.save()
+    cache.close()
+
+    assert ParseCache(cache_dir, parser_version=2).get("source.md", (100, 10)) is None
+
+
+def test_lazy_cache(temp_dir: Path, monkeypatch: "MonkeyPatch") -> None:
+    """Test that a lazy cache loads references on demand and flushes in batches."""
+    cache_dir = str(temp_dir / "cache")
+    cache = ParseCache(cache_dir, parser_version=1)
+    cache.put("source.md", (100, 10), [make_ref("doc")])
+    cache.save()
+    cache.close()
+
+    monkeypatch.setattr(ParseCache, "FLUSH_SIZE", 2)
+    cache = ParseCache(cache_dir, parser_version=1, lazy=True)
+    assert cache.is_fresh("source.md", (100, 10))
+    assert not cache.is_fresh("source.md", (200, 10))
+    assert cache.get("source.md", (100, 10)) == [make_ref("doc")]
+    cache.put("a.md", (1, 1), [make_ref("a")])
+    assert cache.get("a.md", (1, 1)) is not None  # Not written yet
+    cache.put("b.md", (1, 1), [make_ref("b")])
+    assert not cache._dirty  # Flushed
+    assert [ref.target for ref in cache.get("b.md", (1, 1)) or []] == ["b"]
+    assert (cache.hits, cache.misses) == (3, 1)
+    cache.save(["a.md", "b.md"])
+    cache.close()
+
+    cache = ParseCache(cache_dir, parser_version=1)
+    assert cache.get("source.md", (100, 10)) is None
+    assert cache.get("b.md", (1, 1)) is not None
+
+
+def test_cache_drops_deleted_files(temp_dir: Path) -> None:
+    """Test that saving with a listing removes entries of deleted files."""
+    cache_dir = str(temp_dir / "cache")
+    cache = ParseCache(cache_dir, parser_version=1)
+    cache.put("source.md", (100, 10), [])
+    cache.put("deleted.md", (100, 10), [])
+    cache.save(["source.md"])
+    cache.close()
+
+    cache = ParseCache(cache_dir, parser_version=1)
+    assert cache.get("source.md", (100, 10)) == []
+    assert cache.get("deleted.md", (100, 10)) is None
+
+
+def test_warm_run_skips_parsing(temp_dir: Path, monkeypatch: "MonkeyPatch") -> None:
+    """Test that unchanged files are not parsed again on a warm run."""
+    (temp_dir / "doc1.md").write_text("[[doc2]] [[missing]]")
+    (temp_dir / "doc2.md").write_text("[[doc1]]")
+    cache_dir = str(temp_dir / ".md-ref-checker")
+
+    cold = ReferenceChecker(str(temp_dir), cache_dir=cache_dir).check_directory()
+
+    warm_checker = ReferenceChecker(str(temp_dir), cache_dir=cache_dir)
+
+    def fail(source_file: str, content: str) -> Iterator[Reference]:
+        raise AssertionError(f"{source_file} parsed again")
+
+    monkeypatch.setattr(warm_checker.parser, "parse_references", fail)
+    warm = warm_checker.check_directory()
+
+    assert warm == cold
+    assert [ref.target for ref in warm.invalid_refs] == ["missing"]
+    assert warm_checker.cache is not None
+    assert warm_checker.cache.hits == 2
+    # The cache directory is not part of the vault
+    assert not any(p.startswith(".md-ref-checker") for p in warm_checker.fs.index.paths)
+
+
+def test_changed_file_is_parsed_again(temp_dir: Path) -> None:
+    """Test that a file whose size or mtime changed is parsed again."""
+    doc = temp_dir / "doc.md"
+    doc.write_text("[[missing]]")
+    cache_dir = str(temp_dir / ".md-ref-checker")
+    ReferenceChecker(str(temp_dir), cache_dir=cache_dir).check_directory()
+
+    doc.write_text("[[other-missing]]")
+    stat = doc.stat()
+    os.utime(doc, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    checker = ReferenceChecker(str(temp_dir), cache_dir=cache_dir)
+    result = checker.check_directory()
+    assert [ref.target for ref in result.invalid_refs] == ["other-missing"]
+    assert checker.cache is not None
+    assert checker.cache.misses == 1
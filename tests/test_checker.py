@@ -2,11 +2,20 @@
 
 import os
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 
 import pytest
 
 from md_ref_checker.checker import ReferenceChecker
+from md_ref_checker.models import (
+    InvalidReference,
+    Reference,
+    ResultSink,
+    UnidirectionalLink,
+    UnusedImage,
+)
+
+from .conftest import GitRepo
 
 if TYPE_CHECKING:
     pass
@@ -48,6 +57,10 @@ And an invalid image ![[missing.png]]
     assert len(result.invalid_refs) == 2
     invalid_targets = {ref.target for ref in result.invalid_refs}
     assert invalid_targets == {"nonexistent", "missing.png"}
+    assert [ref.line_content for ref in result.invalid_refs] == [
+        "And an invalid one [[nonexistent]]",
+        "And an invalid image ![[missing.png]]",
+    ]
 
 
 def test_check_directory(checker: ReferenceChecker, temp_dir: Path) -> None:
@@ -353,6 +366,19 @@ def test_default_md_extension(checker: ReferenceChecker, temp_dir: Path) -> None
         assert resolved == "note.md"
 
 
+def test_mixed_case_img_tag_uses_image(
+    checker: ReferenceChecker, temp_dir: Path
+) -> None:
+    """Test that a file whose only reference is a mixed-case img tag is scanned."""
+    (temp_dir / "a.png").touch()
+    (temp_dir / "b.png").touch()
+    (temp_dir / "doc1.md").write_text('<Img src="a.png">')
+    (temp_dir / "doc2.md").write_text("<iMG SRC=b.png>")
+
+    result = checker.check_directory()
+    assert not result.unused_images
+
+
 def test_unused_images(checker: ReferenceChecker, temp_dir: Path) -> None:
     """Test detection of unused image files."""
     # Create test files
@@ -395,6 +421,34 @@ def test_unused_images(checker: ReferenceChecker, temp_dir: Path) -> None:
     }
 
 
+def test_standard_and_html_references(
+    checker: ReferenceChecker, temp_dir: Path
+) -> None:
+    """Test standard links, reference-style links and HTML images."""
+    (temp_dir / "assets").mkdir()
+    for name in ("linked.png", "defined.png", "html.png", "unused.png"):
+        (temp_dir / "assets" / name).touch()
+    (temp_dir / "other note.md").write_text("[back](doc.md)")
+    (temp_dir / "doc.md").write_text(
+        "[other](other%20note.md) [gone](gone.md) [pic](assets/linked.png)\n"
+        '![logo][logo] <img src="assets/html.png">\n'
+        "\n"
+        "[logo]: assets/defined.png\n"
+    )
+
+    result = checker.check_directory()
+    assert [ref.target for ref in result.invalid_refs] == ["gone.md"]
+    assert result.unused_images == {"assets/unused.png"}
+    assert not result.unidirectional_links
+
+    # Only images that are embedded count in strict mode
+    strict_checker = ReferenceChecker(str(temp_dir), strict_image_refs=True)
+    assert strict_checker.check_directory().unused_images == {
+        "assets/linked.png",
+        "assets/unused.png",
+    }
+
+
 def test_mixed_file_references(checker: ReferenceChecker, temp_dir: Path) -> None:
     """Test handling of mixed file types and reference styles."""
     # Create various file types
@@ -498,3 +552,457 @@ def test_image_reference_with_spaces(checker: ReferenceChecker, temp_dir: Path)
     result = checker.check_file("doc with spaces.md")
     assert not result.invalid_refs
     assert "assets/my image.png" in checker.image_refs
+
+
+def test_recheck_added_and_removed_files(
+    checker: ReferenceChecker, temp_dir: Path
+) -> None:
+    """Test that a recheck picks up files that appeared or disappeared."""
+    (temp_dir / "doc1.md").write_text("[[doc2]] ![[image.png]]")
+    (temp_dir / "doc2.md").write_text("[[doc1]]")
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub/doc3.md").write_text("[[doc2]]")
+
+    result = checker.check_directory()
+    assert [ref.target for ref in result.invalid_refs] == ["image.png"]
+    assert result.unidirectional_links == [("sub/doc3.md", "doc2.md")]
+
+    # A new image fixes the broken embed, a new note gets an unused image
+    (temp_dir / "image.png").touch()
+    (temp_dir / "unused.png").touch()
+    result = checker.recheck()
+    assert not result.invalid_refs
+    assert result.unused_images == {"unused.png"}
+
+    # Removing a note breaks the references to it
+    (temp_dir / "doc2.md").unlink()
+    result = checker.recheck()
+    assert sorted((r.source_file, r.target) for r in result.invalid_refs) == [
+        ("doc1.md", "doc2"),
+        ("sub/doc3.md", "doc2"),
+    ]
+    assert not result.unidirectional_links
+
+
+def test_recheck_modified_file(checker: ReferenceChecker, temp_dir: Path) -> None:
+    """Test that a recheck parses modified files again."""
+    (temp_dir / "doc1.md").write_text("[[doc2]]")
+    (temp_dir / "doc2.md").write_text("No back reference")
+    (temp_dir / "image.png").touch()
+
+    result = checker.check_directory()
+    assert result.unidirectional_links == [("doc1.md", "doc2.md")]
+    assert result.unused_images == {"image.png"}
+
+    (temp_dir / "doc2.md").write_text("[[doc1]] ![[image.png]] [[missing]]")
+    result = checker.recheck()
+    assert not result.unidirectional_links
+    assert not result.unused_images
+    assert [ref.target for ref in result.invalid_refs] == ["missing"]
+
+
+def test_recheck_only_touches_affected_files(
+    checker: ReferenceChecker, temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that adding a file only re-resolves references that could match it."""
+    (temp_dir / "doc1.md").write_text("[[new]]")
+    (temp_dir / "doc2.md").write_text("[[doc1]] [[other]]")
+    checker.check_directory()
+
+    resolved = []
+    real_resolve = checker._resolve_reference
+
+    def resolve(ref: Reference) -> Optional[str]:
+        resolved.append(ref.target)
+        return real_resolve(ref)
+
+    monkeypatch.setattr(checker, "_resolve_reference", resolve)
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub/new.md").touch()
+    result = checker.recheck()
+
+    assert resolved == ["new"]
+    assert [ref.target for ref in result.invalid_refs] == ["other"]
+
+
+def test_incremental_state_is_saved(temp_dir: Path) -> None:
+    """Test that incremental runs reuse the state saved by the previous run."""
+    (temp_dir / "doc1.md").write_text("[[doc2]]")
+    cache_dir = str(temp_dir / ".md-ref-checker")
+
+    first = ReferenceChecker(str(temp_dir), cache_dir=cache_dir)
+    result = first.check_directory(incremental=True)
+    assert [ref.target for ref in result.invalid_refs] == ["doc2"]
+
+    (temp_dir / "doc2.md").write_text("[[doc1]]")
+    second = ReferenceChecker(str(temp_dir), cache_dir=cache_dir)
+    second._load_state()
+    assert second.file_refs.keys() == {"doc1.md"}
+
+    result = second.check_directory(incremental=True)
+    assert not result.invalid_refs
+    assert not result.unidirectional_links
+    assert second.file_refs.keys() == {"doc1.md", "doc2.md"}
+
+
+def test_incremental_state_restores_structures(temp_dir: Path) -> None:
+    """Test that the saved state rebuilds the graph and image usage."""
+    (temp_dir / "doc1.md").write_text("[[doc2]] ![[used.png]]")
+    (temp_dir / "doc2.md").write_text("[[doc1]] [[doc3]]")
+    (temp_dir / "doc3.md").touch()
+    (temp_dir / "used.png").touch()
+    (temp_dir / "unused.png").touch()
+    cache_dir = str(temp_dir / ".md-ref-checker")
+
+    first = ReferenceChecker(str(temp_dir), cache_dir=cache_dir)
+    expected = first.check_directory(incremental=True)
+
+    second = ReferenceChecker(str(temp_dir), cache_dir=cache_dir)
+    second._load_state()
+    assert second.file_refs == first.file_refs
+    assert second._resolved == first._resolved
+    assert second._dependents == first._dependents
+    assert second._image_usage == first._image_usage
+    assert second._unused_images == {"unused.png"}
+    assert second._result() == expected
+
+
+def test_incremental_state_is_not_pickled(temp_dir: Path) -> None:
+    """Test that a state file planted in the vault can't run code."""
+    import pickle
+
+    class Exploit:
+        def __reduce__(self) -> Tuple[Any, ...]:
+            return (os.mkdir, (str(temp_dir / "pwned"),))
+
+    cache_dir = temp_dir / ".md-ref-checker"
+    cache_dir.mkdir()
+    for name in ("state.pickle", "state.json"):
+        (cache_dir / name).write_bytes(pickle.dumps(Exploit()))
+    (temp_dir / "doc.md").write_text("[[missing]]")
+
+    checker = ReferenceChecker(str(temp_dir), cache_dir=str(cache_dir))
+    result = checker.check_directory(incremental=True)
+
+    assert not (temp_dir / "pwned").exists()
+    assert [ref.target for ref in result.invalid_refs] == ["missing"]
+
+
+def test_parallel_parsing(temp_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that parsing in worker processes gives the same, ordered result."""
+    monkeypatch.setattr("md_ref_checker.checker.PARALLEL_MIN_FILES", 2)
+    for i in range(20):
+        (temp_dir / f"doc{i}.md").write_text(f"[[doc{i + 1}]] [[missing{i}]]")
+
+    serial = ReferenceChecker(str(temp_dir)).check_directory()
+    parallel_checker = ReferenceChecker(str(temp_dir), jobs=3)
+    parallel = parallel_checker.check_directory()
+
+    assert parallel == serial
+    assert len(parallel.invalid_refs) == 21
+    assert parallel_checker.file_refs.keys() == {f"doc{i}.md" for i in range(20)}
+
+
+def test_parallel_parsing_small_vault(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that small vaults are parsed without starting worker processes."""
+
+    def fail(*args: object, **kwargs: object) -> None:
+        raise AssertionError("process pool started")
+
+    monkeypatch.setattr("concurrent.futures.ProcessPoolExecutor", fail)
+    (temp_dir / "doc.md").write_text("[[missing]]")
+
+    result = ReferenceChecker(str(temp_dir), jobs=4).check_directory()
+    assert [ref.target for ref in result.invalid_refs] == ["missing"]
+
+
+def test_pipeline_stats(temp_dir: Path) -> None:
+    """Test that a check records the work of each pipeline stage."""
+    for i in range(5):
+        (temp_dir / f"doc{i}.md").write_text(f"[[doc{i + 1}]] [[missing{i}]]")
+
+    checker = ReferenceChecker(str(temp_dir), readers=2)
+    result = checker.check_directory()
+    stats = checker.pipeline_stats
+
+    assert stats.read.items == 5
+    assert stats.read.bytes == sum(
+        (temp_dir / f"doc{i}.md").stat().st_size for i in range(5)
+    )
+    assert stats.parse.items == 5
+    assert stats.resolve.items == 10
+    assert result == ReferenceChecker(str(temp_dir), readers=0).check_directory()
+
+
+def test_low_memory(temp_dir: Path) -> None:
+    """Test that low-memory mode finds the same problems without keeping refs."""
+    (temp_dir / "assets").mkdir()
+    (temp_dir / "assets" / "used.png").touch()
+    (temp_dir / "assets" / "unused.png").touch()
+    (temp_dir / "a.md").write_text("[[b]] [[missing]] ![[used.png]]")
+    (temp_dir / "b.md").write_text("[[c]]")
+    (temp_dir / "c.md").write_text("[[b]] [[a]]")
+
+    expected = ReferenceChecker(str(temp_dir)).check_directory()
+    checker = ReferenceChecker(
+        str(temp_dir), cache_dir=str(temp_dir / "cache"), low_memory=True
+    )
+    for _ in range(2):  # Cold and warm parse cache
+        result = checker.check_directory()
+        assert result.invalid_refs == expected.invalid_refs
+        assert result.invalid_refs[0].line_content == "[[b]] [[missing]] ![[used.png]]"
+        assert result.unused_images == {"assets/unused.png"}
+        assert result.unidirectional_links == expected.unidirectional_links
+        assert not checker.file_refs
+        assert checker.graph.incoming_count("b.md") == 2
+
+    with pytest.raises(RuntimeError):
+        checker.check_directory(incremental=True)
+    with pytest.raises(RuntimeError):
+        checker.recheck()
+
+
+def test_low_memory_check_file(temp_dir: Path) -> None:
+    """Test that checking a file in low-memory mode leaves the result alone."""
+    (temp_dir / "used.png").touch()
+    (temp_dir / "a.md").write_text("[[b]] [[missing]] ![[used.png]]")
+    (temp_dir / "b.md").write_text("[[a]]")
+    checker = ReferenceChecker(str(temp_dir), low_memory=True)
+    checker.check_directory()
+
+    for _ in range(2):
+        result = checker.check_file("a.md")
+        assert [ref.target for ref in result.invalid_refs] == ["missing"]
+        assert result.invalid_refs[0].line_content == "[[b]] [[missing]] ![[used.png]]"
+    assert checker.graph.incoming_count("b.md") == 1
+    assert checker._image_usage == {"used.png": 1}
+
+
+def test_low_memory_parallel(temp_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that worker processes only parse a bounded window of batches ahead."""
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+    monkeypatch.setattr("md_ref_checker.checker.PARALLEL_MIN_FILES", 2)
+    for i in range(80):
+        (temp_dir / f"doc{i}.md").write_text(f"[[doc{i + 1}]] [[missing{i}]]")
+
+    pending: List[Future] = []
+    windows = []
+    submit = ProcessPoolExecutor.submit
+
+    def bounded_submit(self: ProcessPoolExecutor, *args: Any) -> Future:
+        future = submit(self, *args)
+        result = future.result
+
+        def consume(timeout: Optional[float] = None) -> Any:
+            pending.remove(future)
+            return result(timeout)
+
+        future.result = consume  # type: ignore[method-assign]
+        pending.append(future)
+        windows.append(len(pending))
+        return future
+
+    monkeypatch.setattr(ProcessPoolExecutor, "submit", bounded_submit)
+    expected = ReferenceChecker(str(temp_dir)).check_directory()
+    result = ReferenceChecker(str(temp_dir), jobs=2, low_memory=True).check_directory()
+
+    assert result.invalid_refs == expected.invalid_refs
+    assert result.unidirectional_links == expected.unidirectional_links
+    # 80 files make 8 batches, of which at most 2 per process are pending
+    assert len(windows) == 8
+    assert max(windows) == 4
+    assert not pending
+
+
+def test_check_stats(temp_dir: Path) -> None:
+    """Test the profiling statistics of a check."""
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub" / "a.md").write_text("[[b.md]] [[b.md]] [[c]] [[missing]]")
+    (temp_dir / "sub" / "b.md").write_text("[[a.md]]")
+    (temp_dir / "c.md").write_text("")
+
+    checker = ReferenceChecker(str(temp_dir), cache_dir=str(temp_dir / "cache"))
+    checker.check_directory()
+    stats = checker.stats()
+
+    assert (stats.files, stats.refs) == (3, 5)
+    assert stats.caches["parse"].misses == 3
+    assert (stats.caches["resolution"].hits, stats.caches["resolution"].misses) == (
+        1,
+        4,
+    )
+    assert stats.resolution_steps["source-relative"] == 3
+    assert stats.resolution_steps["exact"] == 1
+    assert stats.resolution_steps["unresolved"] == 1
+    assert list(stats.phases()) == [
+        "walk",
+        "read",
+        "parse",
+        "resolve",
+        "image-scan",
+        "graph",
+    ]
+    assert stats.report()[0] == "files: 3 checked, 3 read (0.0 MB), 5 references"
+
+
+def test_line_content_loaded_for_reported_refs(temp_dir: Path) -> None:
+    """Test that only reported references get their line, also from the cache."""
+    (temp_dir / "doc.md").write_text("# Title\r\nsee [[doc]] and\r\n  [[missing]] here")
+    cache_dir = str(temp_dir / ".cache")
+
+    for _ in range(2):
+        checker = ReferenceChecker(str(temp_dir), cache_dir=cache_dir)
+        result = checker.check_directory()
+        checker.save_cache()
+        assert [ref.line_content for ref in result.invalid_refs] == [
+            "  [[missing]] here"
+        ]
+        assert checker.file_refs["doc.md"][0].line_content is None
+    assert checker.cache is not None and checker.cache.hits == 1
+
+
+def test_check_into_sink(temp_dir: Path) -> None:
+    """Test that findings can be streamed to a sink instead of a result."""
+
+    class Recorder(ResultSink):
+        def __init__(self) -> None:
+            self.events: List[str] = []
+
+        def add_invalid_ref(self, ref: Reference) -> None:
+            self.events.append(f"invalid {ref.target}: {ref.line_content}")
+
+        def add_unused_image(self, image_path: str) -> None:
+            self.events.append(f"unused {image_path}")
+
+        def add_unidirectional_link(self, source: str, target: str) -> None:
+            self.events.append(f"link {source} -> {target}")
+
+    (temp_dir / "a.md").write_text("[[b]]\n[[missing]]")
+    (temp_dir / "b.md").write_text("")
+    (temp_dir / "unused.png").touch()
+
+    checker = ReferenceChecker(str(temp_dir))
+    recorder = Recorder()
+    checker.check_into(recorder)
+    assert recorder.events == [
+        "invalid missing: [[missing]]",
+        "unused unused.png",
+        "link a.md -> b.md",
+    ]
+
+
+def test_iter_check_streams_findings(temp_dir: Path) -> None:
+    """Test that invalid references are yielded before later files are checked."""
+    (temp_dir / "a.md").write_text("[[b]] [[missing-a]]")
+    (temp_dir / "b.md").write_text("[[missing-b]]")
+    (temp_dir / "unused.png").touch()
+
+    checker = ReferenceChecker(str(temp_dir))
+    findings = checker.iter_check()
+    first = next(findings)
+    assert isinstance(first, InvalidReference)
+    assert first.ref.target == "missing-a"
+    assert first.ref.line_content == "[[b]] [[missing-a]]"
+    assert list(checker.file_refs) == ["a.md"]
+
+    rest = list(findings)
+    assert [type(finding) for finding in rest] == [
+        InvalidReference,
+        UnusedImage,
+        UnidirectionalLink,
+    ]
+    assert rest[1] == UnusedImage("unused.png")
+    assert rest[2] == UnidirectionalLink("a.md", "b.md")
+    assert list(checker.iter_check(incremental=True)) == [first] + rest
+
+
+def test_check_changed(temp_dir: Path, git_repo: GitRepo) -> None:
+    """Test checking only changed files and the notes linking to removed ones."""
+    (temp_dir / "a.md").write_text("[[b]] [[old-missing]]")
+    (temp_dir / "b.md").write_text("[[a]]")
+    (temp_dir / "c.md").write_text("[[a]] [[other-missing]]")
+    (temp_dir / "d.md").write_text("[[a]]")
+    git_repo.commit("initial")
+
+    git_repo("mv", "b.md", "b2.md")
+    (temp_dir / "d.md").write_text("[[a]] [[new-missing]]")
+
+    checker = ReferenceChecker(str(temp_dir))
+    result = checker.check_changed("HEAD")
+    # b2.md and d.md changed and a.md links to the old name; c.md is not checked
+    assert sorted((ref.source_file, ref.target) for ref in result.invalid_refs) == [
+        ("a.md", "b"),
+        ("a.md", "old-missing"),
+        ("d.md", "new-missing"),
+    ]
+    assert sorted(checker.file_refs) == ["a.md", "b2.md", "d.md"]
+    assert not result.unused_images and not result.unidirectional_links
+
+    # The change to d.md is not staged
+    checker.check_changed(staged=True)
+    assert sorted(checker.file_refs) == ["a.md", "b2.md"]
+
+
+def test_check_changed_encoded_link(temp_dir: Path, git_repo: GitRepo) -> None:
+    """Test that notes linking to a removed file by its encoded name are checked."""
+    (temp_dir / "my file.md").touch()
+    (temp_dir / "笔记 一.md").touch()
+    (temp_dir / "a.md").write_text("[x](my%20file.md)")
+    (temp_dir / "b.md").write_text("[y](%E7%AC%94%E8%AE%B0%20%E4%B8%80.md)")
+    (temp_dir / "c.md").write_text("[z](笔记%20一.md)")
+    git_repo.commit("initial")
+    (temp_dir / "my file.md").unlink()
+    (temp_dir / "笔记 一.md").unlink()
+
+    result = ReferenceChecker(str(temp_dir)).check_changed("HEAD")
+    assert sorted((ref.source_file, ref.target) for ref in result.invalid_refs) == [
+        ("a.md", "my file.md"),
+        ("b.md", "笔记 一.md"),
+        ("c.md", "笔记 一.md"),
+    ]
+
+
+def test_check_revision(temp_dir: Path, git_repo: GitRepo) -> None:
+    """Test checking a git revision without reading the working tree."""
+    (temp_dir / "a.md").write_text("[[b]] [[missing]]\n![](pic.png)")
+    (temp_dir / "b.md").write_text("[[a]]")
+    (temp_dir / "pic.png").touch()
+    git_repo.commit("initial")
+    (temp_dir / "a.md").write_text("[[other]]")
+    (temp_dir / "b.md").unlink()
+
+    checker = ReferenceChecker(str(temp_dir), rev="HEAD")
+    result = checker.check_directory()
+    assert [(ref.target, ref.line_content) for ref in result.invalid_refs] == [
+        ("missing", "[[b]] [[missing]]")
+    ]
+    assert not result.unused_images
+    assert not result.unidirectional_links
+    with pytest.raises(RuntimeError):
+        checker.check_changed("HEAD")
+
+
+def test_diff_revisions(temp_dir: Path, git_repo: GitRepo) -> None:
+    """Test comparing two revisions, parsing only the files that differ."""
+    (temp_dir / "a.md").write_text("[[b]] [[missing]]")
+    (temp_dir / "b.md").write_text("[[a]]")
+    (temp_dir / "c.md").write_text("[[a]]")
+    git_repo.commit()
+    (temp_dir / "a.md").write_text("[[c]] [[missing]] [[gone]]")
+    (temp_dir / "b.md").unlink()
+    (temp_dir / "pic.png").touch()
+    git_repo.commit()
+
+    checker = ReferenceChecker(str(temp_dir))
+    added, removed = checker.diff_revisions("HEAD~1", "HEAD")
+    assert [(ref.source_file, ref.target) for ref in added.invalid_refs] == [
+        ("a.md", "gone")
+    ]
+    assert added.unused_images == {"pic.png"}
+    assert not removed.invalid_refs
+    assert removed.unidirectional_links == [("c.md", "a.md")]
+    # Only a.md changed
+    assert checker.pipeline_stats.parse.items == 1
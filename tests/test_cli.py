@@ -1,5 +1,10 @@
 """Test cases for cli module."""
 
+import json
+import os
+import subprocess
+import sys
+import zipfile
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -7,8 +12,11 @@ import pytest
 
 from md_ref_checker.cli import main
 
+from .conftest import GitRepo
+
 if TYPE_CHECKING:
     from _pytest.capture import CaptureFixture
+    from _pytest.monkeypatch import MonkeyPatch
 
 
 @pytest.fixture
@@ -17,6 +25,69 @@ def temp_dir(tmp_path: Path) -> Path:
     return tmp_path
 
 
+def test_cli_startup_imports() -> None:
+    """Test that importing the CLI doesn't load what only a check needs."""
+    # Checked in a fresh interpreter, since other tests import everything
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, md_ref_checker.cli; print('\\n'.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = set(proc.stdout.split())
+
+    # The checker, parser and sqlite3 are only needed once the options are
+    # valid; the rest only for --version, parallel parsing, prefetching,
+    # incremental checks, --watch and --memory-report
+    for module in [
+        "md_ref_checker.checker",
+        "md_ref_checker.parsers",
+        "sqlite3",
+        "importlib.metadata",
+        "multiprocessing",
+        "concurrent.futures",
+        "pickle",
+        "md_ref_checker.watch",
+        "tracemalloc",
+    ]:
+        assert module not in modules, f"{module} imported at startup"
+
+
+def test_cli_import_time() -> None:
+    """Test that importing the CLI takes little time besides importing click."""
+    # md_ref_checker's own modules take two to three times as long to import
+    # as click's, importing the checker at startup makes it five to seven.
+    # A ratio holds steadier than a time on a loaded machine, and the best
+    # of a few runs leaves out compiling. Coverage would only slow down our
+    # modules, so it is left out.
+    env = {k: v for k, v in os.environ.items() if not k.startswith("COV_CORE_")}
+    ratios = []
+    for _ in range(3):
+        stderr = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import md_ref_checker.cli"],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=env,
+        ).stderr
+        own = click = 0
+        for line in stderr.splitlines():
+            self_us, _, name = line.split(":", 1)[1].split("|")
+            if not self_us.strip().isdigit():
+                continue  # The header
+            package = name.strip().split(".")[0]
+            if package == "md_ref_checker":
+                own += int(self_us)
+            elif package == "click":
+                click += int(self_us)
+        ratios.append(own / click)
+    assert min(ratios) < 4, f"md_ref_checker imports {min(ratios):.1f}x click's time"
+
+
 def test_cli_help(capsys: "CaptureFixture[str]") -> None:
     """Test CLI help output."""
     with pytest.raises(SystemExit) as exc_info:
@@ -98,6 +169,24 @@ def test_cli_check_unidirectional_links(
     assert "file2.md" in captured.out
 
 
+def test_cli_reference_statistics(
+    temp_dir: Path, capsys: "CaptureFixture[str]"
+) -> None:
+    """Test the reference statistics shown at verbosity 2."""
+    (temp_dir / "file1.md").write_text("Link to [[file3]]")
+    (temp_dir / "file2.md").write_text("[[file3]] and ![[file3]]")
+    (temp_dir / "file3.md").write_text("No links here")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "-v", "2"])
+    assert exc_info.value.code == 0
+
+    captured = capsys.readouterr()
+    stats = captured.out.split("引用统计:")[1]
+    assert "file3.md:\n  - 被引用次数: 2\n" in stats
+    assert "file1.md:\n  - 被引用次数: 0\n  - 引用其他文件数: 1" in stats
+
+
 def test_cli_ignore_patterns(temp_dir: Path, capsys: "CaptureFixture[str]") -> None:
     """Test CLI with ignore patterns."""
     # Create test files
@@ -124,3 +213,238 @@ def test_cli_debug_output(temp_dir: Path, capsys: "CaptureFixture[str]") -> None
 
     captured = capsys.readouterr()
     assert "[DEBUG]" in captured.out
+
+
+def test_cli_profile(temp_dir: Path, capsys: "CaptureFixture[str]") -> None:
+    """Test the profiling report."""
+    (temp_dir / "file1.md").write_text("Link to [[file2]]")
+    (temp_dir / "file2.md").write_text("Link to [[file1]]")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--no-cache", "--profile"])
+    assert exc_info.value.code == 0
+
+    captured = capsys.readouterr()
+    assert "性能分析:" in captured.out
+    assert "phase parse:" in captured.out
+    assert "cache resolution: 0 hits, 2 misses" in captured.out
+    assert "resolution step exact: 2" in captured.out
+    assert "total:" in captured.out
+
+
+def test_cli_memory_report(temp_dir: Path, capsys: "CaptureFixture[str]") -> None:
+    """Test the memory report."""
+    (temp_dir / "file1.md").write_text("Link to [[file2]]")
+    (temp_dir / "file2.md").write_text("Link to [[file1]]")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--no-cache", "--memory-report"])
+    assert exc_info.value.code == 0
+
+    captured = capsys.readouterr()
+    assert "内存报告:" in captured.out
+    assert "phase read/parse/resolve: peak" in captured.out
+    assert "structure file_refs: 2 entries" in captured.out
+
+
+def test_cli_low_memory(temp_dir: Path, capsys: "CaptureFixture[str]") -> None:
+    """Test low-memory mode and the options it can't be combined with."""
+    (temp_dir / "file1.md").write_text("Link to [[file2]] and [[missing]]")
+    (temp_dir / "file2.md").write_text("Link to [[file1]]")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--low-memory"])
+    assert exc_info.value.code == 1
+    captured = capsys.readouterr()
+    assert "无效引用 'missing'" in captured.err
+    assert "发现 1 个无效引用" in captured.err
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--low-memory", "--watch"])
+    assert exc_info.value.code == 2
+
+
+def test_cli_output_format(temp_dir: Path, capsys: "CaptureFixture[str]") -> None:
+    """Test machine readable output and capping the invalid references shown."""
+    (temp_dir / "file1.md").write_text("Link to [[file2]], [[missing]] and [[gone]]")
+    (temp_dir / "file2.md").write_text("No links here")
+    (temp_dir / "unused.png").touch()
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--format", "jsonl", "--max-errors", "1"])
+    assert exc_info.value.code == 1
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert [record["type"] for record in records] == [
+        "invalid_reference",
+        "unused_image",
+        "unidirectional_link",
+        "summary",
+    ]
+    assert records[-1]["invalid_refs"] == 2
+    assert records[-1]["omitted_invalid_refs"] == 1
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--max-errors", "0"])
+    assert exc_info.value.code == 1
+    captured = capsys.readouterr()
+    assert "无效引用 'missing'" not in captured.err
+    assert "另有 2 个无效引用未显示" in captured.err
+    assert "发现 2 个无效引用" in captured.err
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--format", "sarif", "--watch"])
+    assert exc_info.value.code == 2
+
+
+def test_cli_git(
+    temp_dir: Path, git_repo: GitRepo, capsys: "CaptureFixture[str]"
+) -> None:
+    """Test checking changed files, and checking a git revision."""
+    (temp_dir / "old.md").write_text("[[old-missing]]")
+    git_repo.commit("initial")
+    (temp_dir / "new.md").write_text("[[new-missing]]")
+    status = git_repo("status", "--porcelain")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--changed-since", "HEAD"])
+    assert exc_info.value.code == 1
+    captured = capsys.readouterr()
+    assert "无效引用 'new-missing'" in captured.err
+    assert "old-missing" not in captured.err
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--staged"])
+    assert exc_info.value.code == 0
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--staged", "--incremental"])
+    assert exc_info.value.code == 2
+
+    # The revision has no new.md
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--rev", "HEAD", "-f", "jsonl"])
+    assert exc_info.value.code == 1
+    captured = capsys.readouterr()
+    assert "old-missing" in captured.out
+    assert "new-missing" not in captured.out
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--rev", "HEAD", "--staged"])
+    assert exc_info.value.code == 2
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--rev", "HEAD", "--incremental"])
+    assert exc_info.value.code == 2
+
+    # No cache directory is left in the working tree unless one is given
+    assert git_repo("status", "--porcelain") == status
+    cache_dir = temp_dir.parent / "cache"
+    with pytest.raises(SystemExit):
+        main(["-d", str(temp_dir), "--staged", "--cache-dir", str(cache_dir)])
+    assert (cache_dir / "cache.sqlite").exists()
+
+
+def test_cli_diff(
+    temp_dir: Path, git_repo: GitRepo, capsys: "CaptureFixture[str]"
+) -> None:
+    """Test comparing the findings of two revisions."""
+    (temp_dir / "doc.md").write_text("[[fixed]]")
+    git_repo.commit()
+    (temp_dir / "doc.md").write_text("[[broken]]")
+    git_repo.commit()
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["diff", "-d", str(temp_dir), "-f", "jsonl", "HEAD~1", "HEAD"])
+    assert exc_info.value.code == 1
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r.get("change"), r.get("target")) for r in records[:-1]] == [
+        ("added", "broken"),
+        ("removed", "fixed"),
+    ]
+    assert records[-1]["added"]["invalid_refs"] == 1
+
+    # Going back fixes the new reference and breaks the old one again
+    with pytest.raises(SystemExit) as exc_info:
+        main(["diff", "-d", str(temp_dir), "--no-cache", "HEAD", "HEAD~1"])
+    assert exc_info.value.code == 1
+    captured = capsys.readouterr()
+    assert "无效引用 'fixed'" in captured.err
+    assert "已修复  无效引用 'broken'" in captured.out
+    assert "新增 1 个、修复 1 个无效引用" in captured.out
+    assert git_repo("status", "--porcelain") == ""
+
+    # Options of the check are not silently ignored before the subcommand
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-v", "2", "--ignore", "x", "diff", "-d", str(temp_dir), "A", "B"])
+    assert exc_info.value.code == 2
+    err = capsys.readouterr().err
+    assert "'-v' / '--verbosity', '-i' / '--ignore'" in err
+    assert "子命令 diff 之前的选项不会生效" in err
+
+
+def test_cli_archive(temp_dir: Path, capsys: "CaptureFixture[str]") -> None:
+    """Test checking a vault packed in a zip archive."""
+    archive = temp_dir / "vault.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("vault/doc.md", "[[missing]]")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(archive), "-f", "jsonl"])
+    assert exc_info.value.code == 1
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert (records[0]["file"], records[0]["target"]) == ("doc.md", "missing")
+    # The parse cache is kept next to the archive
+    assert (temp_dir / ".md-ref-checker").is_dir()
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(archive), "-r"])
+    assert exc_info.value.code == 2
+
+
+def test_cli_parse_cache(temp_dir: Path, capsys: "CaptureFixture[str]") -> None:
+    """Test that the parse cache is created by default and can be disabled."""
+    (temp_dir / "file1.md").write_text("Link to [[file2]]")
+    (temp_dir / "file2.md").write_text("Link to [[file1]]")
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--no-cache"])
+    assert exc_info.value.code == 0
+    assert not (temp_dir / ".md-ref-checker").exists()
+
+    cache_dir = temp_dir / "cache"
+    for _ in range(2):
+        with pytest.raises(SystemExit) as exc_info:
+            main(["-d", str(temp_dir), "--cache-dir", str(cache_dir)])
+        assert exc_info.value.code == 0
+    assert (cache_dir / "cache.sqlite").exists()
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir)])
+    assert exc_info.value.code == 0
+    assert (temp_dir / ".md-ref-checker" / "cache.sqlite").exists()
+
+
+def test_cli_watch(
+    temp_dir: Path, capsys: "CaptureFixture[str]", monkeypatch: "MonkeyPatch"
+) -> None:
+    """Test that watch mode reports new and fixed references until interrupted."""
+    (temp_dir / "doc.md").write_text("[[missing]]")
+    edits = iter(["[[doc]] [[other]]"])
+
+    def sleep(seconds: float) -> None:
+        try:
+            (temp_dir / "doc.md").write_text(next(edits))
+        except StopIteration:
+            raise KeyboardInterrupt from None
+
+    monkeypatch.setattr("md_ref_checker.watch.time.sleep", sleep)
+    with pytest.raises(SystemExit) as exc_info:
+        main(["-d", str(temp_dir), "--watch", "--no-cache"])
+    assert exc_info.value.code == 0
+
+    captured = capsys.readouterr()
+    assert "doc.md:1:1  error  无效引用 'missing'" in captured.err
+    assert "+ doc.md:1:9  无效引用 'other'" in captured.err
+    assert "- doc.md  已修复  无效引用 'missing'" in captured.out
+    assert "已停止监视" in captured.out
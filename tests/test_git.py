@@ -0,0 +1,104 @@
+"""Test cases for git module."""
+
+from pathlib import Path
+
+import pytest
+
+from md_ref_checker.git import GitStorage, changed_files, grep_markdown, list_files
+
+from .conftest import GitRepo
+
+
+@pytest.fixture
+def vault(git_repo: GitRepo) -> Path:
+    """Create a vault in a subdirectory of a repository with one commit."""
+    (git_repo.path / "outside.md").write_text("[[a]]")
+    vault = git_repo.path / "vault"
+    (vault / "sub").mkdir(parents=True)
+    (vault / "a.md").write_text("[[b]]")
+    (vault / "b.md").write_text("[[a]]")
+    (vault / "sub" / "c.md").write_text("![[pic.png]]")
+    (vault / "pic.png").touch()
+    git_repo.commit("initial")
+    return vault
+
+
+def test_list_files(vault: Path) -> None:
+    """Test listing the files of the vault without deleted or ignored ones."""
+    (vault / "new.md").touch()
+    (vault / "scratch.tmp").touch()
+    (vault / ".gitignore").write_text("*.tmp\n")
+    (vault / "b.md").unlink()
+
+    assert sorted(list_files(str(vault))) == [
+        ".gitignore",
+        "a.md",
+        "new.md",
+        "pic.png",
+        "sub/c.md",
+    ]
+
+
+def test_changed_files(git_repo: GitRepo, vault: Path) -> None:
+    """Test finding the files changed in the working tree and the index."""
+    git_repo("mv", "vault/b.md", "vault/sub/b2.md")
+    (vault / "a.md").write_text("[[sub/b2]]")
+    (vault / "new.md").touch()
+
+    changes = changed_files(str(vault), "HEAD")
+    assert changes.removed == ["b.md"]
+    assert sorted(changes.added) == ["new.md", "sub/b2.md"]
+    assert changes.modified == ["a.md"]
+
+    # Only the rename is staged
+    changes = changed_files(str(vault), staged=True)
+    assert changes.removed == ["b.md"]
+    assert changes.added == ["sub/b2.md"]
+    assert changes.modified == []
+
+    with pytest.raises(RuntimeError, match="git diff failed"):
+        changed_files(str(vault), "no-such-revision")
+
+
+def test_grep_markdown(vault: Path) -> None:
+    """Test finding the Markdown files of the vault that mention a name."""
+    assert grep_markdown(str(vault), ["a"]) == ["b.md"]
+    assert sorted(grep_markdown(str(vault), ["b", "pic"])) == ["a.md", "sub/c.md"]
+    assert grep_markdown(str(vault), ["missing"]) == []
+    assert grep_markdown(str(vault), []) == []
+
+
+def test_git_storage(git_repo: GitRepo, vault: Path) -> None:
+    """Test listing and reading the files of a revision, not the working tree."""
+    (vault / "a.md").write_text("changed")
+    (vault / "sub" / "c.md").unlink()
+    storage = GitStorage(str(vault), "HEAD")
+
+    assert sorted(entry.name for entry in storage.scandir("")) == [
+        "a.md",
+        "b.md",
+        "pic.png",
+        "sub",
+    ]
+    assert [entry.name for entry in storage.scandir("sub")] == ["c.md"]
+    assert storage.is_dir("sub/") and not storage.is_dir("a.md")
+    assert storage.exists("sub/c.md") and not storage.exists("missing.md")
+    assert storage.read("a.md") == "[[b]]"
+    assert storage.read("sub/c.md", (b"[[",)) == "![[pic.png]]"
+    assert storage.read("pic.png", (b"[[",)) == ""
+    with pytest.raises(FileNotFoundError):
+        storage.read("sub")
+    with pytest.raises(FileNotFoundError):
+        storage.scandir("missing")
+
+    # Unchanged contents have the same stat across revisions
+    stat = next(e for e in storage.scandir("") if e.name == "b.md").stat()
+    git_repo("commit", "-q", "-a", "-m", "change a")
+    entries = {e.name: e.stat() for e in GitStorage(str(vault), "HEAD").scandir("")}
+    assert (entries["b.md"].st_mtime_ns, entries["b.md"].st_size) == (
+        stat.st_mtime_ns,
+        stat.st_size,
+    )
+
+    with pytest.raises(RuntimeError, match="rev-parse failed"):
+        GitStorage(str(vault), "no-such-revision")
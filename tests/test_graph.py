@@ -0,0 +1,71 @@
+"""Test cases for graph module."""
+
+import random
+
+import pytest
+
+from md_ref_checker.graph import CompactLinkGraph, LinkGraph
+
+
+def test_links_and_backlinks() -> None:
+    """Test that links are kept in both directions."""
+    graph = LinkGraph()
+    graph.set_links("a.md", {"b.md", "c.md"})
+    graph.set_links("b.md", {"c.md"})
+
+    assert graph.links("a.md") == ["b.md", "c.md"]
+    assert graph.backlinks("c.md") == ["a.md", "b.md"]
+    assert graph.incoming_count("c.md") == 2
+    assert graph.incoming_count("a.md") == 0
+    assert graph.incoming_count("unknown.md") == 0
+    assert graph.links("unknown.md") == []
+    assert len(graph) == 6  # The three paths with and without .md
+
+    graph.set_links("a.md", {"b.md"})
+    assert graph.backlinks("c.md") == ["b.md"]
+    graph.set_links("b.md", ())
+    assert graph.backlinks("c.md") == []
+
+
+def test_unidirectional_links() -> None:
+    """Test that unidirectional links follow changes on either side."""
+    graph = LinkGraph()
+    graph.set_links("a.md", {"b.md", "pic.png"})
+    assert graph.unidirectional_links() == [("a.md", "b.md")]
+
+    graph.set_links("b.md", {"a.md"})
+    assert graph.unidirectional_links() == []
+
+    graph.set_links("b.md", ())
+    assert graph.unidirectional_links() == [("a.md", "b.md")]
+
+    # A link back to the file without its extension also counts
+    graph.set_links("c.md", {"b.md"})
+    graph.set_links("b.md", {"c"})
+    assert graph.unidirectional_links() == [("a.md", "b.md")]
+
+
+def test_compact_graph_matches_graph() -> None:
+    """Test that the compact graph answers like the regular one."""
+    names = [f"n{i}.md" for i in range(8)] + ["n1", "n2", "pic.png"]
+    for seed in range(50):
+        rnd = random.Random(seed)
+        graph, compact = LinkGraph(), CompactLinkGraph()
+        for source in rnd.sample(names[:8], rnd.randint(1, 8)):
+            targets = {rnd.choice(names) for _ in range(rnd.randint(0, 4))}
+            graph.set_links(source, targets)
+            compact.set_links(source, targets)
+        assert compact.unidirectional_links() == graph.unidirectional_links()
+        for name in names:
+            assert compact.links(name) == graph.links(name)
+            assert compact.backlinks(name) == graph.backlinks(name)
+            assert compact.incoming_count(name) == graph.incoming_count(name)
+        assert len(compact) == len(graph)
+
+
+def test_compact_graph_links_set_once() -> None:
+    """Test that the links of a file can't be replaced in the compact graph."""
+    graph = CompactLinkGraph()
+    graph.set_links("a.md", {"b.md"})
+    with pytest.raises(ValueError):
+        graph.set_links("a.md", {"c.md"})
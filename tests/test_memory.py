@@ -0,0 +1,53 @@
+"""Test cases for memory module."""
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+from md_ref_checker.checker import ReferenceChecker
+from md_ref_checker.memory import MemoryTracker, approximate_size
+from md_ref_checker.models import Reference
+
+
+def test_approximate_size() -> None:
+    """Test that containers, slots and shared objects are counted correctly."""
+    text = "x" * 1000
+    assert approximate_size(text) == sys.getsizeof(text)
+    assert approximate_size([text, text]) == sys.getsizeof(
+        [text, text]
+    ) + sys.getsizeof(text)
+    ref = Reference("a.md", text, 1, 1)
+    assert approximate_size(ref) > sys.getsizeof(ref) + sys.getsizeof(text)
+    assert approximate_size({"key": ref}) > approximate_size(ref)
+
+
+def test_memory_tracker(tmp_path: Path) -> None:
+    """Test tracking the memory of each phase of a check."""
+    for i in range(20):
+        (tmp_path / f"doc{i}.md").write_text(f"[[doc{i + 1}]] " * 50)
+
+    checker = ReferenceChecker(str(tmp_path))
+    tracker = MemoryTracker(top=3)
+    checker.phase_hook = tracker.phase_done
+    tracker.start()
+    checker.check_directory()
+    tracker.stop()
+    assert not tracemalloc.is_tracing()
+
+    assert [phase.name for phase in tracker.phases] == [
+        "walk",
+        "read/parse/resolve",
+        "image-scan",
+        "graph",
+    ]
+    files_phase = tracker.phases[1]
+    assert files_phase.growth > 0
+    assert files_phase.peak >= files_phase.current
+    assert 0 < len(files_phase.top) <= 3
+    assert tracker.peak == max(phase.peak for phase in tracker.phases)
+
+    tracker.measure(checker.structures())
+    sizes = {structure.name: structure for structure in tracker.structures}
+    assert sizes["file_refs"].entries == 1000
+    assert sizes["file_refs"].size > 0
+    assert tracker.report()[0].startswith("peak: ")
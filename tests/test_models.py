@@ -1,8 +1,9 @@
 """Tests for models module."""
 
+import pickle
 from typing import TYPE_CHECKING
 
-from md_ref_checker.models import CheckResult, Reference
+from md_ref_checker.models import CheckResult, Reference, ResultSink
 
 if TYPE_CHECKING:
     pass
@@ -61,6 +62,21 @@ def test_reference_equality() -> None:
     assert hash(ref1) == hash(ref2)
 
 
+def test_reference_compact_storage() -> None:
+    """Test that references compare without their line and pickle without it."""
+    parsed = Reference("source.md", "test.md", 2, 3, None, False, 15)
+    loaded = Reference("source.md", "test.md", 2, 3, "a  [[test.md]]", False, 15)
+    assert parsed == loaded
+    assert hash(parsed) == hash(loaded)
+    assert not hasattr(parsed, "__dict__")
+
+    copy = pickle.loads(pickle.dumps(loaded))
+    assert copy == loaded
+    assert copy.offset == 15
+    assert copy.line_content is None
+    assert Reference.from_record("source.md", loaded.to_record()) == loaded
+
+
 def test_check_result_add_invalid_ref() -> None:
     """Test adding invalid references to CheckResult."""
     result = CheckResult()
@@ -121,3 +137,72 @@ def test_check_result_merge() -> None:
     assert len(merged.unidirectional_links) == 2
     assert merged.unidirectional_links[0] == ("source1.md", "target1.md")
     assert merged.unidirectional_links[1] == ("source2.md", "target2.md")
+
+
+def test_check_result_diff() -> None:
+    """Test comparing two CheckResult instances."""
+    moved = Reference(
+        target="moved.md",
+        source_file="source.md",
+        line_number=1,
+        column=1,
+        line_content="[[moved.md]]",
+        is_embed=False,
+    )
+    fixed = Reference(
+        target="fixed.md",
+        source_file="source.md",
+        line_number=2,
+        column=1,
+        line_content="[[fixed.md]]",
+        is_embed=False,
+    )
+    old = CheckResult(
+        invalid_refs=[moved, fixed],
+        unused_images={"old.png", "both.png"},
+        unidirectional_links=[("a.md", "b.md")],
+    )
+    new = CheckResult(
+        invalid_refs=[
+            Reference(
+                target="moved.md",
+                source_file="source.md",
+                line_number=5,
+                column=3,
+                line_content="  [[moved.md]]",
+                is_embed=False,
+            )
+        ],
+        unused_images={"new.png", "both.png"},
+        unidirectional_links=[("a.md", "b.md"), ("b.md", "c.md")],
+    )
+
+    added, removed = new.diff(old)
+
+    assert not added.invalid_refs
+    assert removed.invalid_refs == [fixed]
+    assert added.unused_images == {"new.png"}
+    assert removed.unused_images == {"old.png"}
+    assert added.unidirectional_links == [("b.md", "c.md")]
+    assert not removed.unidirectional_links
+
+
+def test_check_result_update_and_send() -> None:
+    """Test accumulating results in place and passing them on to a sink."""
+    ref = Reference("source.md", "test.md", 1, 2, "[[test.md]]", False)
+    total = CheckResult()
+    for i in range(3):
+        part = CheckResult()
+        part.add_invalid_ref(ref)
+        part.add_unused_image(f"unused{i % 2}.png")
+        part.add_unidirectional_link("a.md", f"b{i}.md")
+        total.update(part)
+
+    assert total.invalid_refs == [ref] * 3
+    assert total.unused_images == {"unused0.png", "unused1.png"}
+    assert len(total.unidirectional_links) == 3
+
+    copy = CheckResult()
+    total.send(copy)
+    assert copy == total
+    total.send(ResultSink())  # The base sink discards everything
@@ -0,0 +1,148 @@
+"""Test cases for output module."""
+
+import io
+import json
+
+from md_ref_checker.models import CheckResult, Reference
+from md_ref_checker.output import (
+    JsonLinesWriter,
+    JsonWriter,
+    SarifWriter,
+    TextWriter,
+    diff_records,
+)
+
+
+def make_ref(target: str, line: int = 1) -> Reference:
+    """Create an invalid reference with its line loaded."""
+    return Reference("doc.md", target, line, 3, f"a [[{target}]]")
+
+
+def test_text_writer() -> None:
+    """Test that invalid references are written as one block, up to the cap."""
+    stream = io.StringIO()
+    writer = TextWriter(stream, max_errors=1, color=False)
+    writer.add_invalid_ref(make_ref("missing"))
+    writer.add_invalid_ref(make_ref("other", 2))
+    writer.add_unused_image("unused.png")
+    writer.close()
+
+    assert stream.getvalue() == (
+        "doc.md:1:3  error  无效引用 'missing'\n"
+        "  a [[missing]]\n"
+        "    ^\n"
+        "... 另有 1 个无效引用未显示 (--max-errors 1)\n"
+    )
+    assert writer.invalid_refs == 2
+    assert writer.unused_images == 1
+    assert writer.truncated == 1
+
+
+def test_writer_buffers_output() -> None:
+    """Test that output is held back until the buffer fills up or is closed."""
+    stream = io.StringIO()
+    writer = JsonLinesWriter(stream)
+    writer.FLUSH_INTERVAL = float("inf")
+    writer.add_unused_image("a.png")
+    assert stream.getvalue() == ""
+    writer.close()
+    assert stream.getvalue().startswith('{"type": "unused_image"')
+
+    stream = io.StringIO()
+    writer = JsonLinesWriter(stream)
+    writer.FLUSH_INTERVAL = float("inf")
+    writer.BUFFER_SIZE = 100
+    for i in range(10):
+        writer.add_unused_image(f"{i}.png")
+    assert 0 < len(stream.getvalue().splitlines()) < 10
+
+
+def test_json_lines_writer() -> None:
+    """Test one JSON object per finding, then the summary."""
+    stream = io.StringIO()
+    writer = JsonLinesWriter(stream, max_errors=0)
+    writer.add_invalid_ref(make_ref("missing"))
+    writer.add_unidirectional_link("a.md", "b.md")
+    writer.close()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert records == [
+        {"type": "unidirectional_link", "source": "a.md", "target": "b.md"},
+        {
+            "type": "summary",
+            "invalid_refs": 1,
+            "unused_images": 0,
+            "unidirectional_links": 1,
+            "omitted_invalid_refs": 1,
+        },
+    ]
+
+
+def test_json_writer() -> None:
+    """Test that the output is a single JSON document, with or without findings."""
+    stream = io.StringIO()
+    JsonWriter(stream).close()
+    assert json.loads(stream.getvalue())["findings"] == []
+
+    stream = io.StringIO()
+    writer = JsonWriter(stream)
+    writer.add_invalid_ref(make_ref("missing"))
+    writer.add_unused_image("unused.png")
+    writer.close()
+
+    document = json.loads(stream.getvalue())
+    assert document["findings"] == [
+        {
+            "type": "invalid_reference",
+            "file": "doc.md",
+            "line": 1,
+            "column": 3,
+            "target": "missing",
+            "embed": False,
+            "text": "a [[missing]]",
+        },
+        {"type": "unused_image", "file": "unused.png"},
+    ]
+    assert document["summary"]["invalid_refs"] == 1
+
+
+def test_sarif_writer() -> None:
+    """Test the SARIF log."""
+    stream = io.StringIO()
+    writer = SarifWriter(stream)
+    writer.add_invalid_ref(make_ref("missing"))
+    writer.add_unused_image("unused.png")
+    writer.add_unidirectional_link("a.md", "b.md")
+    writer.close()
+
+    log = json.loads(stream.getvalue())
+    assert log["version"] == "2.1.0"
+    run = log["runs"][0]
+    assert [rule["id"] for rule in run["tool"]["driver"]["rules"]] == [
+        "invalid-reference",
+        "unused-image",
+        "unidirectional-link",
+    ]
+    results = run["results"]
+    assert [(result["ruleId"], result["level"]) for result in results] == [
+        ("invalid-reference", "error"),
+        ("unused-image", "warning"),
+        ("unidirectional-link", "note"),
+    ]
+    assert results[0]["locations"][0]["physicalLocation"] == {
+        "artifactLocation": {"uri": "doc.md"},
+        "region": {"startLine": 1, "startColumn": 3},
+    }
+    assert run["properties"]["summary"]["invalid_refs"] == 1
+
+
+def test_diff_records() -> None:
+    """Test tagging the findings of a change as added or removed."""
+    added = CheckResult(invalid_refs=[make_ref("missing")], unused_images={"a.png"})
+    removed = CheckResult(unidirectional_links=[("a.md", "b.md")])
+
+    assert [(r["change"], r["type"]) for r in diff_records(added, removed)] == [
+        ("added", "invalid_reference"),
+        ("added", "unused_image"),
+        ("removed", "unidirectional_link"),
+    ]
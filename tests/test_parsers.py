@@ -241,3 +241,141 @@ def test_references_with_multiple_dots(parser: MarkdownParser) -> None:
         "data.backup.csv",
     ]
     assert [ref.is_embed for ref in refs] == [False, True, False, True]
+
+
+def test_column_after_inline_code(parser: MarkdownParser) -> None:
+    """Test that columns count the backticks of inline code before a reference."""
+    content = "first line\nSome `code` then [[ref]]"
+    refs = list(parser.parse_references("test.md", content))
+    assert len(refs) == 1
+    assert refs[0] == Reference(
+        source_file="test.md",
+        target="ref",
+        line_number=2,
+        column=18,
+        line_content="Some `code` then [[ref]]",
+        is_embed=False,
+    )
+
+
+def test_unclosed_inline_code(parser: MarkdownParser) -> None:
+    """Test that an unclosed backtick hides the rest of its line only."""
+    content = "[[a]] `[[b]]\n[[c]]"
+    refs = list(parser.parse_references("test.md", content))
+    assert [(ref.target, ref.line_number) for ref in refs] == [("a", 1), ("c", 2)]
+
+
+def test_indented_and_unclosed_code_blocks(parser: MarkdownParser) -> None:
+    """Test fences that are indented, and a fence that is never closed."""
+    content = "  ```\n[[a]]\n\t```js\n[[b]]\r\nx ```` [[c]]\n```\n[[d]]"
+    refs = list(parser.parse_references("test.md", content))
+    assert [(ref.target, ref.line_number) for ref in refs] == [("b", 4), ("c", 5)]
+    assert parser.line_at(content, refs[0].offset) == "[[b]]\r"
+
+
+def test_references_in_document_order(parser: MarkdownParser) -> None:
+    """Test that references on one line are returned in the order they appear."""
+    content = "![img](a.png) [[note]] ![[embed]]"
+    refs = list(parser.parse_references("test.md", content))
+    assert [(ref.target, ref.column) for ref in refs] == [
+        ("a.png", 1),
+        ("note", 15),
+        ("embed", 24),
+    ]
+
+
+def test_parse_standard_links(parser: MarkdownParser) -> None:
+    """Test parsing standard Markdown links to local files."""
+    content = (
+        "[a](other.md) [b](https://example.com) [c](#heading) [d](mailto:x@y.z)\n"
+        '[e](<my note.md>) [f](my%20note.md#part "Title") [g](../up.md)'
+    )
+    refs = list(parser.parse_references("test.md", content))
+    assert [(ref.target, ref.line_number, ref.column) for ref in refs] == [
+        ("other.md", 1, 1),
+        ("my note.md", 2, 1),
+        ("my note.md", 2, 19),
+        ("../up.md", 2, 50),
+    ]
+    assert not any(ref.is_embed for ref in refs)
+
+
+def test_parse_linked_image(parser: MarkdownParser) -> None:
+    """Test parsing both the link and the image of a linked image."""
+    content = "[![badge](badge.png)](target.md)"
+    refs = list(parser.parse_references("test.md", content))
+    assert [(ref.target, ref.column, ref.is_embed) for ref in refs] == [
+        ("target.md", 1, False),
+        ("badge.png", 2, True),
+    ]
+
+
+def test_parse_reference_links(parser: MarkdownParser) -> None:
+    """Test resolving reference-style links through the file's definitions."""
+    content = """
+See [the docs][Docs] and [docs][], then [DOCS] and ![logo][logo].
+Undefined [links][nowhere], tasks - [ ] and footnotes[^1] are not links.
+Not a definition: [docs]: elsewhere.md
+
+[docs]: <docs/guide.md> "The guide"
+  [logo]: assets/logo.png
+[unused]: unused.md
+[web]: https://example.com
+[^1]: The footnote.
+    [indented]: code.md
+    """.strip()
+    refs = list(parser.parse_references("test.md", content))
+    assert [
+        (ref.target, ref.line_number, ref.column, ref.is_embed) for ref in refs
+    ] == [
+        ("docs/guide.md", 1, 5, False),
+        ("docs/guide.md", 1, 26, False),
+        ("docs/guide.md", 1, 41, False),
+        ("assets/logo.png", 1, 52, True),
+        ("docs/guide.md", 3, 19, False),
+        # Definitions that no link uses are references themselves
+        ("unused.md", 7, 1, False),
+    ]
+
+
+def test_parse_html_images(parser: MarkdownParser) -> None:
+    """Test parsing the src of HTML img tags."""
+    content = (
+        '<img src="a.png" width="100"> <IMG alt="b" SRC=\'b b.png\'>\n'
+        '<img data-src="no.png"> <img src=c.png> <img src="https://x.y/d.png">\n'
+        '`<img src="code.png">`'
+    )
+    refs = list(parser.parse_references("test.md", content))
+    assert [(ref.target, ref.line_number, ref.column) for ref in refs] == [
+        ("a.png", 1, 1),
+        ("b b.png", 1, 31),
+        ("c.png", 2, 25),
+    ]
+    assert all(ref.is_embed for ref in refs)
+
+
+def test_brackets_without_definitions(
+    parser: MarkdownParser, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that files without definitions are scanned for inline links only."""
+    content = (
+        "A task - [ ] with [[note]], a footnote[^1] and [brackets <img src=a.png>].\n"
+        "Not a definition: [x]: y.md, ![alt [nested]](b.png)\n"
+        "[^1]: The footnote."
+    )
+    # Collecting reference-style links gives the same references
+    expected = list(MarkdownParser()._resolve("test.md", content, {"x", "^1"}))
+
+    def fail(*args: object) -> None:
+        raise AssertionError("reference-style links collected")
+
+    monkeypatch.setattr(parser, "_resolve", fail)
+    refs = list(parser.parse_references("test.md", content))
+    assert refs == expected
+    assert [
+        (ref.target, ref.line_number, ref.column, ref.is_embed) for ref in refs
+    ] == [
+        ("note", 1, 19, False),
+        ("a.png", 1, 58, True),
+        ("b.png", 2, 30, True),
+    ]
@@ -0,0 +1,56 @@
+"""Test cases for pipeline module."""
+
+import threading
+import time
+from typing import List
+
+from md_ref_checker.pipeline import PipelineStats, prefetch, timed
+
+
+def test_prefetch_keeps_order() -> None:
+    """Test that results come back in input order even if calls finish out of order."""
+
+    def slow_for_even(n: int) -> int:
+        time.sleep(0.01 if n % 2 == 0 else 0)
+        return n * n
+
+    results = list(prefetch(slow_for_even, range(10), workers=4, depth=4))
+    assert results == [(n, n * n) for n in range(10)]
+
+
+def test_prefetch_is_bounded() -> None:
+    """Test that no more than ``depth`` calls run ahead of the consumer."""
+    started: List[int] = []
+    lock = threading.Lock()
+
+    def record(n: int) -> int:
+        with lock:
+            started.append(n)
+        return n
+
+    results = prefetch(record, range(100), workers=2, depth=3)
+    assert next(results) == (0, 0)
+    time.sleep(0.05)
+    # Item 0 was consumed, so at most items 0-3 can have been submitted
+    assert len(started) <= 4
+    assert [item for item, _ in results] == list(range(1, 100))
+    assert sorted(started) == list(range(100))
+
+
+def test_prefetch_empty() -> None:
+    """Test prefetching no items."""
+    assert list(prefetch(timed(len), [], workers=2, depth=2)) == []
+
+
+def test_pipeline_stats_report() -> None:
+    """Test the per-stage report."""
+    stats = PipelineStats()
+    stats.read.add(2, 0.5, 2_000_000)
+    stats.parse.add(2, 1.0)
+    stats.resolve.add(10, 0.1)
+
+    assert stats.bottleneck() == "parse"
+    assert stats.parse.throughput() == 2.0
+    report = stats.report()
+    assert report[0].startswith("read: 2 files, 2.0 MB")
+    assert report[-1] == "bottleneck: parse"
@@ -0,0 +1,129 @@
+"""Test cases for resolver module."""
+
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from md_ref_checker.resolver import LRUCache, Resolver
+from md_ref_checker.utils import FileSystem
+
+
+@pytest.fixture
+def temp_dir(tmp_path: Path) -> Path:
+    """Create a temporary directory for testing."""
+    return tmp_path
+
+
+def make_resolver(root: Path, files: List[str], ignore: str = "") -> Resolver:
+    """Create the files and a resolver for them."""
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    if ignore:
+        (root / ".gitignore").write_text(ignore)
+    fs = FileSystem(str(root))
+    return Resolver(fs.index, fs.ignore_matcher)
+
+
+def test_resolution_order(temp_dir: Path) -> None:
+    """Test the order in which candidate paths are tried."""
+    resolver = make_resolver(
+        temp_dir,
+        ["note.md", "sub/note.md", "sub/other.md", "assets/pic.png", "x/doc.txt"],
+    )
+    assert resolver.resolve("a.md", "note") == "note.md"
+    assert resolver.resolve("sub/a.md", "note") == "note.md"  # As written first
+    assert resolver.resolve("a.md", "sub/note") == "sub/note.md"
+    assert resolver.resolve("sub/a.md", "../note.md") == "note.md"  # Relative
+    assert resolver.resolve("a.md", "other") == "sub/other.md"  # Basename
+    assert resolver.resolve("sub/a.md", "pic.png") == "assets/pic.png"  # Assets
+    assert resolver.resolve("a.md", "y/doc.txt") is None  # No basename search
+    assert resolver.resolve("a.md", "missing") is None
+
+
+def test_ignored_targets(temp_dir: Path) -> None:
+    """Test that targets in ignored paths don't resolve."""
+    resolver = make_resolver(temp_dir, ["draft/idea.md"], ignore="draft/\n")
+    assert resolver.resolve("a.md", "draft/idea") is None
+    assert resolver.resolve("a.md", "idea") is None  # Not indexed either
+
+
+def test_identical_targets_resolved_once(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that lookups are grouped and never touch the file system."""
+    resolver = make_resolver(temp_dir, ["note.md", "sub/a.md"])
+    calls = []
+    real_lookup = resolver._lookup
+
+    def lookup(path: str, try_md: bool) -> Optional[str]:
+        calls.append(path)
+        return real_lookup(path, try_md)
+
+    def no_syscalls(*args: object) -> None:
+        raise AssertionError("file system accessed")
+
+    monkeypatch.setattr(resolver, "_lookup", lookup)
+    monkeypatch.setattr(os, "stat", no_syscalls)
+    monkeypatch.setattr(os, "scandir", no_syscalls)
+
+    for source in ["a.md", "b.md", "sub/a.md", "sub/b.md"]:
+        assert resolver.resolve(source, "note") == "note.md"
+    # The target is looked up as written and in the root once; since it
+    # resolved as written, the path relative to each source is never needed
+    assert calls == ["note", "note"]
+
+
+def test_explain(temp_dir: Path) -> None:
+    """Test naming the step that resolves a target, and the cache counters."""
+    resolver = make_resolver(
+        temp_dir,
+        ["note.md", "sub/near.md", "other/far.md", "assets/pic.png", "draft/x.md"],
+        ignore="draft/\n",
+    )
+    assert resolver.explain("", "note") == "exact"
+    assert resolver.explain("sub", "near.md") == "source-relative"
+    assert resolver.explain("sub", "../note.md") == "source-relative"
+    assert resolver.explain("sub", "pic.png") == "assets"
+    assert resolver.explain("", "far") == "basename search"
+    assert resolver.explain("sub", "near") == "basename search"  # Before relative
+    assert resolver.explain("", "missing") == "unresolved"
+    assert resolver.explain("", "draft/x") == "ignored"
+
+    assert resolver.resolve_many("sub/a.md", ["near.md", "near.md", "pic.png"]) == [
+        "sub/near.md",
+        "sub/near.md",
+        "assets/pic.png",
+    ]
+    assert resolver.resolve("sub/b.md", "near.md") == "sub/near.md"
+    assert (resolver.lookups, resolver.hits, resolver.misses) == (4, 2, 2)
+    assert (resolver.target_hits, resolver.target_misses) == (0, 2)
+
+
+def test_lru_cache() -> None:
+    """Test that the least recently used entry is evicted."""
+    cache = LRUCache(2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1  # Now "b" is the least recently used
+    cache["c"] = 3
+    assert list(cache) == ["a", "c"]
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    cache["d"] = 4
+    assert list(cache) == ["a", "d"]
+
+
+def test_bounded_caches(temp_dir: Path) -> None:
+    """Test that a resolver with a cache size stays within it."""
+    resolver = make_resolver(temp_dir, ["note.md"])
+    bounded = Resolver(resolver.index, resolver.ignore_matcher, cache_size=3)
+    for i in range(10):
+        for source in ["a.md", f"dir{i}/a.md"]:
+            assert bounded.resolve(source, "note") == "note.md"
+            assert bounded.resolve(source, f"missing{i}") is None
+    assert len(bounded.resolution_cache) == 3
+    assert len(bounded.target_cache) == 3
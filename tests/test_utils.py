@@ -7,7 +7,8 @@ from typing import TYPE_CHECKING
 import pytest
 from pytest import CaptureFixture
 
-from md_ref_checker.utils import FileSystem
+from md_ref_checker.storage import LocalStorage
+from md_ref_checker.utils import FileSystem, IgnoreMatcher
 
 if TYPE_CHECKING:
     pass
@@ -85,6 +86,23 @@ def test_file_system_read_file(temp_dir: Path) -> None:
     assert content == test_content
 
 
+def test_file_system_read_file_markers(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that files without any of the markers are not decoded."""
+    (temp_dir / "plain.md").write_bytes(b"no references \xff here")
+    (temp_dir / "link.md").write_bytes("见 [[笔记]]\r\nline 2".encode())
+    fs = FileSystem(str(temp_dir))
+
+    assert fs.read_file("plain.md", (b"[[", b"](")) == ""
+    assert fs.read_file("link.md", (b"[[", b"](")) == "见 [[笔记]]\nline 2"
+
+    # Large files are memory-mapped
+    monkeypatch.setattr(LocalStorage, "MMAP_THRESHOLD", 1)
+    assert fs.read_file("plain.md", (b"[[",)) == ""
+    assert fs.read_file("link.md", (b"[[",)) == "见 [[笔记]]\nline 2"
+
+
 def test_file_system_file_exists(temp_dir: Path) -> None:
     """Test file existence check."""
     test_file = temp_dir / "test.md"
@@ -101,3 +119,115 @@ def test_file_system_debug_output(temp_dir: Path, capsys: CaptureFixture[str]) -
     fs.should_ignore("test.md")  # This method has debug output
     captured = capsys.readouterr()
     assert "Checking if path should be ignored" in captured.out
+
+
+def test_file_system_index(temp_dir: Path) -> None:
+    """Test that a single walk indexes markdown files, attachments and basenames."""
+    (temp_dir / "note.md").touch()
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub" / "note.md").touch()
+    (temp_dir / "sub" / "image.png").touch()
+    (temp_dir / ".git").mkdir()
+    (temp_dir / ".git" / "HEAD.md").touch()
+
+    fs = FileSystem(str(temp_dir))
+    index = fs.refresh_index()
+
+    assert index.markdown_files == ["note.md", "sub/note.md"]
+    assert index.attachments == ["sub/image.png"]
+    assert index.basenames["note"] == ["note.md", "sub/note.md"]
+    assert index.paths == {"note.md", "sub/note.md", "sub/image.png"}
+    assert fs.find_by_basename("image") == ["sub/image.png"]
+    assert not fs.file_exists(".git/HEAD.md")
+
+
+def test_file_system_index_single_walk(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that lookups after indexing don't touch the file system again."""
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub" / "doc.md").touch()
+    (temp_dir / "sub" / "image.png").touch()
+
+    fs = FileSystem(str(temp_dir))
+    fs.refresh_index()
+
+    def fail(*args: object) -> None:
+        raise AssertionError("unexpected file system access")
+
+    monkeypatch.setattr(os, "scandir", fail)
+    monkeypatch.setattr(os.path, "isfile", fail)
+    assert list(fs.find_files("*.md")) == ["sub/doc.md"]
+    assert list(fs.find_files("*.png")) == ["sub/image.png"]
+    assert fs.file_exists("sub/doc.md")
+    assert fs.find_by_basename("doc") == ["sub/doc.md"]
+
+
+def test_file_system_index_follows_ignore_patterns(temp_dir: Path) -> None:
+    """Test that the index is rebuilt when ignore patterns are extended."""
+    (temp_dir / "draft.md").touch()
+
+    fs = FileSystem(str(temp_dir))
+    assert fs.file_exists("draft.md")
+
+    fs.ignore_patterns.append("draft.*")
+    assert not fs.file_exists("draft.md")
+
+
+def test_ignore_matcher_buckets() -> None:
+    """Test each kind of ignore pattern."""
+    matcher = IgnoreMatcher(
+        ["/build/", "/temp*", "draft/", "notes.md", "*.tmp", "archive/*"]
+    )
+
+    # Root-anchored patterns
+    assert matcher.match("build/out.md")
+    assert matcher.match("temp.md")
+    assert not matcher.match("sub/temp.md")
+    # Directory and plain patterns
+    assert matcher.match("draft")
+    assert matcher.match("draft/a/b.md")
+    assert matcher.match("notes.md")
+    assert not matcher.match("drafts/a.md")
+    # Single-segment globs match any segment
+    assert matcher.match("a/b/c.tmp")
+    assert matcher.match("x.tmp/c.md")
+    # Multi-segment globs match the whole path
+    assert matcher.match("archive/old/doc.md")
+    assert not matcher.match("sub/archive/doc.md")
+
+    assert not matcher.match("doc.md")
+    assert matcher.explain("a/c.tmp") == "*.tmp"
+    assert matcher.explain("doc.md") is None
+
+
+def test_ignore_matcher_match_dir() -> None:
+    """Test that directories whose whole subtree is ignored are detected."""
+    matcher = IgnoreMatcher([".git/*", "node_modules/*", "a/*.md"])
+    assert matcher.match_dir(".git")
+    assert matcher.match_dir("node_modules")
+    assert not matcher.match_dir("a")
+    assert not matcher.match_dir("docs")
+
+
+def test_file_system_prunes_ignored_directories(
+    temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that the walk never descends into ignored directories."""
+    (temp_dir / "doc.md").touch()
+    (temp_dir / "node_modules" / "pkg").mkdir(parents=True)
+    (temp_dir / "node_modules" / "pkg" / "README.md").touch()
+    (temp_dir / ".trash").mkdir()
+    (temp_dir / ".trash" / "old.md").touch()
+
+    scanned = []
+    real_scandir = os.scandir
+
+    def scandir(path: str) -> "os._ScandirIterator[str]":
+        scanned.append(os.path.relpath(path, temp_dir))
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    fs = FileSystem(str(temp_dir))
+    assert fs.refresh_index().markdown_files == ["doc.md"]
+    assert scanned == ["."]
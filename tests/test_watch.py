@@ -0,0 +1,61 @@
+"""Test cases for watch module."""
+
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from md_ref_checker.checker import ReferenceChecker
+from md_ref_checker.watch import VaultWatcher, WatchEvent
+
+
+@pytest.fixture
+def temp_dir(tmp_path: Path) -> Path:
+    """Create a temporary directory for testing."""
+    return tmp_path
+
+
+def test_poll_reports_new_and_fixed_findings(temp_dir: Path) -> None:
+    """Test that a poll reports what a change broke and fixed."""
+    (temp_dir / "doc1.md").write_text("[[doc2]] ![[image.png]]")
+    (temp_dir / "doc2.md").write_text("[[doc1]]")
+
+    watcher = VaultWatcher(ReferenceChecker(str(temp_dir)), interval=0)
+    result = watcher.start()
+    assert [ref.target for ref in result.invalid_refs] == ["image.png"]
+    assert watcher.poll() is None
+
+    (temp_dir / "image.png").touch()
+    (temp_dir / "doc2.md").unlink()
+    event = watcher.poll()
+
+    assert event is not None
+    assert event.changes.added == ["image.png"]
+    assert event.changes.removed == ["doc2.md"]
+    assert [ref.target for ref in event.new.invalid_refs] == ["doc2"]
+    assert [ref.target for ref in event.fixed.invalid_refs] == ["image.png"]
+    assert [ref.target for ref in event.result.invalid_refs] == ["doc2"]
+    assert watcher.poll() is None
+
+
+def test_run_reports_changes(temp_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that run polls until stopped and reports each change."""
+    (temp_dir / "doc.md").write_text("[[missing]]")
+    watcher = VaultWatcher(ReferenceChecker(str(temp_dir)), interval=0)
+    watcher.start()
+
+    edits = iter(["[[missing]]", "[[doc]]", "[[doc]]"])
+
+    def sleep(seconds: float) -> None:
+        (temp_dir / "doc.md").write_text(next(edits) + " " * len(events))
+
+    events: List[WatchEvent] = []
+    monkeypatch.setattr("md_ref_checker.watch.time.sleep", sleep)
+    watcher.run(events.append, max_polls=3)
+
+    assert len(events) == 3
+    assert not events[0].new.invalid_refs
+    assert not events[0].fixed.invalid_refs
+    assert [ref.target for ref in events[1].fixed.invalid_refs] == ["missing"]
+    assert events[1].changes.modified == ["doc.md"]
+    assert not events[2].result.invalid_refs